@@ -1,7 +1,12 @@
-from typing import Tuple, Optional, Union, List, Any, Dict
+import copy
+import timeit
+from typing import Tuple, Optional, Union, List, Any, Dict, TYPE_CHECKING
 
 from src.ai.AI_MapRepresentation import Map, AI_Player, AI_Opponent, AI_Trade
-from src.misc.game_constants import error, UnitType, BuildingType, MoveType, UnitCost, debug
+from src.misc.game_constants import error, UnitType, BuildingType, MoveType, UnitCost, debug, Definitions
+
+if TYPE_CHECKING:
+    from src.ai.ai_worker import AIWorker
 
 """This file (together with AI_map_representation) handles the interaction between game and AI/HI"""
 
@@ -72,27 +77,42 @@ class AI_GameInterface:
     def __init__(self):
         from src.ai.ai_blueprint import AI
         self.dict_of_ais: Dict[int, AI] = {}
+        self.dict_of_workers: Dict[int, AIWorker] = {}     # if the AIs run in worker processes
+        self.__speculations: Dict[int, AI] = {}     # the copy of an AI which has computed a speculative move
         debug("AI Game interface has been initialized")
-        self.__has_finished = False     # protected variable to avoid modifying it, which would lead to RC
-        self.ref_to_move: Optional[AI_Move] = None
         self.time_begin = 0
         self.time_end = 0
 
-    def launch_AI(self, id: int, ai_str: str, ai_name: str, other_players: [int]):
+    def launch_AI(self, id: int, ai_str: str, ai_name: str, other_players: [int], seed: str):
+        """seed: of the random numbers of the AI"""
+        if Definitions.AI_WORKER_PROCESSES:
+            from src.ai.ai_worker import AIWorker
+            self.dict_of_workers[id] = AIWorker(id, ai_str, ai_name, other_players, seed)
+        else:
+            ai = AI_GameInterface.create_AI(id, ai_str, ai_name, other_players, seed)
+            if ai is not None:
+                self.dict_of_ais[id] = ai
+        # debug("size of AI dict: " + str(len(self.dict_of_ais)))
+
+    @staticmethod
+    def create_AI(id: int, ai_str: str, ai_name: str, other_players: [int], seed: str):
         from src.ai.ai_npc import AI_NPC
         from src.ai.AI_Macedon import AI_Mazedonian
         from src.ai.npc.ai_barbaric import Barbaric
         from src.ai.npc.ai_villager import Villager
 
         if ai_str == "cultivated":
-            self.dict_of_ais[id] = AI_Mazedonian(ai_name, id, other_players)
+            ai = AI_Mazedonian(ai_name, id, other_players)
         elif ai_str == "expansionist":
-            self.dict_of_ais[id] = AI_Mazedonian(ai_name, id, other_players)
+            ai = AI_Mazedonian(ai_name, id, other_players)
         elif ai_str == "barbaric":
-            self.dict_of_ais[id] = Barbaric(other_players, AI_NPC.Script.BARBARIC_HOSTILE)
+            ai = Barbaric(other_players, AI_NPC.Script.BARBARIC_HOSTILE)
         elif ai_str == "villager":
-            self.dict_of_ais[id] = Villager(other_players, AI_NPC.Script.VILLAGER)
-        # debug("size of AI dict: " + str(len(self.dict_of_ais)))
+            ai = Villager(other_players, AI_NPC.Script.VILLAGER)
+        else:
+            return None
+        ai.random.seed(seed)
+        return ai
 
     @staticmethod
     def create_ai_status(ai_stat: AI_GameStatus, turn_nr,
@@ -108,34 +128,69 @@ class AI_GameInterface:
         ai_stat.cost_building_construction = building_costs
         ai_stat.cost_unit_recruitment = unit_cost
 
-    def do_a_move(self, ai_stat: AI_GameStatus, move: AI_Move, player_id):
-        """spawns a new thread which does the AI calculations to reduce load/stalls in update thread"""
-        self.__has_finished = False
-        self.ref_to_move = move     # <-- keep reference on move, once __has_finished is true, the object is complete
-        # self.time_begin = timeit.default_timer()
-        # ai_worker = threading.Thread(target=self.run, args=(ai_stat, move, player_id))
-        # ai_worker.start()
-        self.dict_of_ais[player_id].do_move(ai_stat, move)
-        # performance logging
+    def do_a_move(self, ai_stat: AI_GameStatus, player_id) -> AI_Move:
+        """the AI computes its move, either in the calling thread or in its worker process (then the calling thread
+        waits for it). The game logic calls this from a separate thread to reduce load/stalls in update thread"""
+        self.time_begin = timeit.default_timer()
+        if player_id in self.dict_of_workers:
+            move = self.dict_of_workers[player_id].do_move(ai_stat)
+        else:
+            self.__speculations.pop(player_id, None)
+            move = AI_Move()
+            self.dict_of_ais[player_id].do_move(ai_stat, move)
+        self.time_end = timeit.default_timer()
+        self.__log_performance(ai_stat)
+        return move
+
+    def speculate_move(self, ai_stat: AI_GameStatus, player_id) -> Optional[AI_Move]:
+        """computes a move on a copy of the AI, i.e. the AI itself does not notice. If the move is used, the copy
+        replaces the AI (commit_speculation), otherwise it is dropped with the next move. None if it has failed"""
+        if player_id in self.dict_of_workers:
+            return self.dict_of_workers[player_id].speculate(ai_stat)
+        ai = copy.deepcopy(self.dict_of_ais[player_id])
+        move = AI_Move()
+        ai.do_move(ai_stat, move)
+        self.__speculations[player_id] = ai
+        return move
+
+    def commit_speculation(self, ai_stat: AI_GameStatus, player_id):
+        """the speculative move is used as the move for this game status (which has to be the same)"""
+        if player_id in self.dict_of_workers:
+            self.dict_of_workers[player_id].commit()
+        else:
+            self.dict_of_ais[player_id] = self.__speculations.pop(player_id)
+        self.__log_performance(ai_stat)
+
+    @staticmethod
+    def __log_performance(ai_stat: AI_GameStatus):
         from src.ai.performance import ScoreSpentResources
         score = ScoreSpentResources.evaluate(ai_stat.map)
         from src.ai.performance import PerformanceLogger
         PerformanceLogger.log_performance_file(ai_stat.turn_nr, ai_stat.me.id, score)
-        self.__has_finished = True
 
     def query_ai(self, query, arg, player_id) -> str:
+        worker = self.dict_of_workers.get(player_id)
         if query == "diplo":
+            if worker is not None:
+                return str(worker.diplomacy.get(arg))
             return str(self.dict_of_ais[player_id].diplomacy.get_diplomatic_value_of_player(arg))
         elif query == "state":
+            if worker is not None:
+                return worker.state_str
             return self.dict_of_ais[player_id].get_state_as_str()
         else:
             error("WRONG QUERY")
 
     def get_dump(self, player_id) -> str:
+        if player_id in self.dict_of_workers:
+            return self.dict_of_workers[player_id].dump
         return self.dict_of_ais[player_id].get_dump()
 
-    def has_finished(self):
-        return self.__has_finished
-
     def get_ai_execution_time(self) -> float:
         return self.time_end - self.time_begin
+
+    def shutdown(self):
+        """terminates the worker processes"""
+        for worker in self.dict_of_workers.values():
+            worker.close()
+        self.dict_of_workers.clear()
@@ -1,4 +1,3 @@
-import random
 import timeit
 from dataclasses import dataclass
 from enum import Enum
@@ -93,7 +92,7 @@ class AI_Mazedonian(AI):
 
         # values to move to the xml file: and dependent on personality
         self.properties: Dict[str, Any] = {}
-        from src.ai.scripts.macedon_hostile import on_setup, setup_weights, setup_movement_weights, setup_trade_weights
+        from src.ai.scripts.macedon_hostile import on_setup
         on_setup(self.properties)
 
         # self.safety_dist_to_enemy_army: int = 3
@@ -122,7 +121,10 @@ class AI_Mazedonian(AI):
         self.w_scouting_smooth_border: float = 1
         self.w_scouting_resource: float = 3
         self.w_scouting_claimed: float = 1
+        self._setup_weights()
 
+    def _setup_weights(self):
+        from src.ai.scripts.macedon_hostile import setup_weights, setup_movement_weights, setup_trade_weights
         self.weights: List[Weight] = []
         self.m_weights: List[Weight] = []
         self.trade_decisions: List[Callable[[AI_Trade, AI_GameStatus], None]] = setup_trade_weights(self)
@@ -206,11 +208,11 @@ class AI_Mazedonian(AI):
                 if has_farm:
                     # walk to random field
                     path = []
-                    idx = random.randint(0, len(ai_stat.map.own_farm_field_tiles) - 1)
+                    idx = self.random.randint(0, len(ai_stat.map.own_farm_field_tiles) - 1)
                     # print(f"from: {ai_stat.map.army_list[0].base_tile.offset_coordinates} to {ai_stat.map.own_farm_field_tiles[idx].offset_coordinates}")
                     path = essentials.a_star(ai_stat.map.army_list[0].base_tile,
                                                   ai_stat.map.own_farm_field_tiles[idx],
-                                                  ai_stat.map.walkable_tiles)
+                                                  ai_stat.map.walkable_domain)
                     if len(path) > 1:
                         move.move_army_to = path[1].offset_coordinates
                         move.doMoveArmy = True
@@ -224,7 +226,7 @@ class AI_Mazedonian(AI):
                     # attack
                     start_tile = ai_stat.map.army_list[0].base_tile
                     target_tile = self.priolist_targets[0].target.base_tile
-                    path = essentials.a_star(start_tile, target_tile, ai_stat.map.walkable_tiles)
+                    path = essentials.a_star(start_tile, target_tile, ai_stat.map.walkable_domain)
                     if len(path) > 1:
                         self.previous_attack_target = self.priolist_targets[0]
                         move.move_army_to = path[1].offset_coordinates
@@ -256,37 +258,21 @@ class AI_Mazedonian(AI):
         self.danger_zone.clear()
 
     def create_heat_maps(self, ai_stat: AI_GameStatus, move: AI_Move):
-        # cond = lambda n: AI_Toolkit.is_obj_in_list(n, ai_stat.map.walkable_tiles)
-        heat_map = essentials.simple_heat_map(ai_stat.map.building_list, ai_stat.map.walkable_tiles,
-                                              lambda n: essentials.is_obj_in_list(n, ai_stat.map.walkable_tiles))
-        self.claimed_tiles.clear()
+        # claimed tiles: walkable tiles close to an own building
         c_dist = 2 if 'claiming_distance' not in self.properties else self.properties['claiming_distance']
-        for d, s in heat_map:
-            if d < c_dist:
-                self.claimed_tiles.add(s)
-        heat_map_2 = essentials.simple_heat_map(ai_stat.map.scoutable_tiles, ai_stat.map.discovered_tiles,
-                                                lambda n: True)
+        self.claimed_tiles.clear()
+        self.claimed_tiles.update(ai_stat.map.get_distance_field("own_buildings", "walkable").within(c_dist))
 
         self.center_tile = ai_stat.map.building_list[0].base_tile
         if self.center_tile is None:
-            """code to find the center tile"""
-            max = -1
-            tile_max = None
-            for d, s in heat_map_2:
-                val = d
-                if d > max:
-                    max = d
-                    tile_max = s
+            """code to find the center tile: the discovered tile furthest away from the scoutable tiles"""
+            scoutable_field = ai_stat.map.get_distance_field("scoutable", "discovered")
+            tile_max = max(ai_stat.map.discovered_tiles, key=scoutable_field.get)
             if BASIC_DEBUG:
                 self._dump("Center is located @ " + str(tile_max.offset_coordinates))
             self.center_tile = tile_max
-        ## get heatmap for danger zone ->
-        heat_map_3 = essentials.simple_heat_map(ai_stat.map.opp_building_list, ai_stat.map.discovered_tiles,
-                                                lambda n: True)
-        for d, s in heat_map_3:
-            if d <= 2:
-                self.danger_zone.add(s)
-                # move.info_at_tile.append((s.offset_coordinates, "D"))
+        ## get heatmap for danger zone -> tiles which are at most 3 steps away from an opponent building
+        self.danger_zone.update(ai_stat.map.get_distance_field("opp_buildings", "discovered").within(3))
         # move.info_at_tile.append((self.center_tile.offset_coordinates, str("C")))
 
         # for t in ai_stat.map.walkable_tiles:
@@ -300,11 +286,11 @@ class AI_Mazedonian(AI):
 
         for e_b in ai_stat.map.opp_building_list:
             if e_b.visible:
-                if essentials.is_obj_in_list(e_b, list(self.claimed_tiles)):
+                if e_b.base_tile in self.claimed_tiles:
                     self.diplomacy.add_event(e_b.owner, e_b.offset_coordinates,
                                              DiploEventType.ENEMY_BUILDING_IN_CLAIMED_ZONE, -2, 3)
         for e_a in ai_stat.map.opp_army_list:
-            if essentials.is_obj_in_list(e_a, list(self.claimed_tiles)):
+            if e_a.base_tile in self.claimed_tiles:
                 self.diplomacy.add_event(e_a.owner, e_a.offset_coordinates,
                                          DiploEventType.ENEMY_ARMY_INVADING_CLAIMED_ZONE, -2, 3)
 
@@ -543,7 +529,7 @@ class AI_Mazedonian(AI):
                             if prio_racks.value > 0:  # not Priority.P_NO
                                 racks_opt.score = Priority.increase(racks_opt.score)
                     else:
-                        debug("Build order contains unknown building type -> " + str(t))
+                        debug("Build order contains unknown building type -> %s", t)
             if ai_stat.me.food < self.food_lower_limit:
                 if farm_opt is None:  # we force to look for a site even if the BO does not allow for it
                     farm_opt = value_farm, site_farm = self.__best_building_site_farm(ai_stat)
@@ -570,15 +556,15 @@ class AI_Mazedonian(AI):
                 tmp = False  # just for printing
                 possible_fields = []
                 score = 0
-                for n in essentials.get_neighbours_on_set(ai_t, ai_stat.map.buildable_tiles):
+                for n in essentials.get_neighbours_on_set(ai_t, ai_stat.map.buildable_domain):
                     if basic.num_resources_on_adjacent(n) == 0:
                         possible_fields.append(n)
-                    if essentials.is_obj_in_list(n, ai_stat.map.scoutable_tiles):
+                    if n in ai_stat.map.scoutable_domain:
                         score += 1
                 score += len(possible_fields)
                 amount_of_fields = min(3, len(possible_fields))
-                sampled = random.sample(possible_fields, amount_of_fields)
-                score += len(essentials.get_neighbours_on_set(ai_t, ai_stat.map.scoutable_tiles)) / 2
+                sampled = self.random.sample(possible_fields, amount_of_fields)
+                score += len(essentials.get_neighbours_on_set(ai_t, ai_stat.map.scoutable_domain)) / 2
                 # if build site is next to a resource --> reduce value by 1 for each resource field
                 score = score - basic.num_resources_on_adjacent(ai_t)
                 # make the score dependent on safety level of region
@@ -639,7 +625,7 @@ class AI_Mazedonian(AI):
             if DETAILED_DEBUG:
                 debug(f"possible candidates for a barracks: {len(candidates)}")
             if len(candidates) > 0:
-                idx = random.randint(0, len(candidates) - 1)
+                idx = self.random.randint(0, len(candidates) - 1)
                 c = 0
                 for e in candidates:
                     if idx == c:
@@ -745,7 +731,7 @@ class AI_Mazedonian(AI):
             if score > best_score:
                 best_score = score
                 best_option = UpgradeOption(BuildingType.VILLA, hut.offset_coordinates, normalize(score))
-        return [best_option]
+        return [best_option] if best_option else []
 
     def evaluate_move_scouting(self, ai_stat: AI_GameStatus) -> List[ScoutingOption]:
         """scores the scouting options, currently by the distance to a own building
@@ -770,7 +756,7 @@ class AI_Mazedonian(AI):
             # 2. increase value by proximity to claimed tiles
             num_of_claimed_tiles = 0
             for t_at_dist_1 in dist1:
-                if essentials.is_obj_in_list(t_at_dist_1, list(self.claimed_tiles)):
+                if t_at_dist_1 in self.claimed_tiles:
                     num_of_claimed_tiles = num_of_claimed_tiles + 1
             value = value + (num_of_claimed_tiles * self.w_scouting_claimed)
             # 3. try to smooth out border
@@ -917,8 +903,8 @@ class AI_Mazedonian(AI):
 
 
     def get_army_spawn_loc(self, ai_stat: AI_GameStatus) -> Tuple[int, int]:
-        nei: List[Tile] = essentials.get_neighbours_on_set(ai_stat.map.building_list[0].base_tile, ai_stat.map.walkable_tiles)
-        idx = random.randint(0, len(nei)-1)
+        nei: List[Tile] = essentials.get_neighbours_on_set(ai_stat.map.building_list[0].base_tile, ai_stat.map.walkable_domain)
+        idx = self.random.randint(0, len(nei)-1)
         return nei[idx].offset_coordinates
 
     def __count_inactive_huts(self, ai_stat) -> int:
@@ -926,7 +912,7 @@ class AI_Mazedonian(AI):
         for b in ai_stat.map.building_list:
             if b.type == BuildingType.HUT:
                 has_res = False
-                for n in essentials.get_neighbours_on_set(b.base_tile, ai_stat.map.discovered_tiles):
+                for n in essentials.get_neighbours_on_set(b.base_tile, ai_stat.map.discovered_domain):
                     if n.has_resource():
                         has_res = True
                 if not has_res:
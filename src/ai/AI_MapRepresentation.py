@@ -1,5 +1,6 @@
 import traceback
-from typing import List, Tuple, Optional, Dict
+from collections import deque
+from typing import List, Tuple, Optional, Dict, Iterable, FrozenSet
 
 from dataclasses import dataclass
 
@@ -37,12 +38,27 @@ class Tile:
         self.tile_nw: Optional[Tile] = None
 
         self.cube_coordinates = HexMap.offset_to_cube_coords(self.offset_coordinates)
+        self.index: int = -1        # position in the Map, used to index the distance fields
+
+    def __getstate__(self):
+        """the neighbours are not pickled, the Map connects its tiles again (pickling the connected tiles recursively
+        exceeds the recursion limit on larger maps)"""
+        state = self.__dict__.copy()
+        for n in ("tile_ne", "tile_e", "tile_se", "tile_sw", "tile_w", "tile_nw"):
+            state[n] = None
+        return state
+
+    def __deepcopy__(self, memo):
+        """tiles belong to a game status, copies of other objects (e.g. of an AI) share them"""
+        return self
 
     # def __eq__(self, other):
     #     return self.offset_coordinates == other.offset_coordinates
 
-    # def __hash__(self):
-    #     hash(repr(self))
+    def __hash__(self):
+        """by the coordinates instead of the id, thus sets of tiles are iterated in the same order in every run (which
+        makes games reproducible)"""
+        return hash(self.offset_coordinates)
 
     def has_resource(self):
         return self.resource is not None
@@ -72,6 +88,58 @@ class Tile:
         return self.tile_nw is not None
 
 
+class TileDomain:
+    """
+    Hashed search domain, contains the offset coordinates of its elements.
+    Checking whether a tile (or any other object with offset coordinates) is part of the domain is O(1),
+    in contrast to the lists of the Map. The Map provides domains for its tile lists (e.g. Map.walkable_domain)
+    """
+    def __init__(self, elements: Iterable):
+        self.coordinates: FrozenSet[Tuple[int, int]] = frozenset(e.offset_coordinates for e in elements)
+        self.version: Optional[int] = None      # set by the path cache, equal domains share the same version
+
+    def __contains__(self, obj) -> bool:
+        return obj.offset_coordinates in self.coordinates
+
+    def __len__(self) -> int:
+        return len(self.coordinates)
+
+
+class DistanceField:
+    """
+    Distance (number of steps) from every tile of the Map to the closest source, computed by a single breadth first
+    search which starts at all sources at once (multi-source BFS). Only tiles of the domain are expanded, the sources
+    themselves do not have to be part of it. The distances are stored in a flat list, indexed by Tile.index.
+    A source has the distance 0, tiles which cannot be reached have the distance -1
+    """
+    def __init__(self, tiles: List[Tile], sources: Iterable, domain: TileDomain):
+        self.tiles = tiles
+        self.domain = domain
+        self.distances: List[int] = [-1] * len(tiles)
+        queue = deque()
+        for s in sources:
+            t = s if type(s) is Tile else s.base_tile
+            if self.distances[t.index] == -1:
+                self.distances[t.index] = 0
+                queue.append(t)
+        while queue:
+            t = queue.popleft()
+            d = self.distances[t.index] + 1
+            for n in (t.tile_ne, t.tile_e, t.tile_se, t.tile_sw, t.tile_w, t.tile_nw):
+                if n is not None and self.distances[n.index] == -1 and n.offset_coordinates in domain.coordinates:
+                    self.distances[n.index] = d
+                    queue.append(n)
+
+    def get(self, obj) -> int:
+        """distance of a tile or AI_Element to the closest source, -1 if it cannot be reached"""
+        return self.distances[(obj if type(obj) is Tile else obj.base_tile).index]
+
+    def within(self, max_distance: int) -> List[Tile]:
+        """all tiles of the domain which are at most max_distance steps away from a source"""
+        return [t for t, d in zip(self.tiles, self.distances)
+                if 0 < d <= max_distance or (d == 0 and t.offset_coordinates in self.domain.coordinates)]
+
+
 @dataclass
 class AI_Player:
     id: int
@@ -155,6 +223,10 @@ class AI_Element:
         self.base_tile: Tile = t
         self.offset_coordinates: Tuple[int, int] = self.base_tile.offset_coordinates
 
+    def __hash__(self):
+        """see Tile.__hash__"""
+        return hash(self.offset_coordinates)
+
 
 class AI_Army(AI_Element):
     def __init__(self, t: Tile):
@@ -191,6 +263,15 @@ class Map:
     """
     Wrapper class, holding most of the information which is available to the AI at a turn
     """
+    # source sets of the distance fields, see get_distance_field
+    DISTANCE_SOURCES = {"own_buildings": "building_list", "opp_buildings": "opp_building_list",
+                        "opp_armies": "opp_army_list", "scoutable": "scoutable_tiles"}
+
+    # offset of the neighbours (ne, e, se, sw, w, nw) in offset coordinates, for even and odd rows respectively
+    # (odd rows are shifted to the right, see HexMap.offset_to_cube_coords)
+    __neighbour_offsets = (((0, 1), (1, 0), (0, -1), (-1, -1), (-1, 0), (-1, 1)),
+                           ((1, 1), (1, 0), (1, -1), (0, -1), (-1, 0), (0, 1)))
+
     def __init__(self):
         self.map: Dict[Tuple[int, int], Tile] = {}
         # additional list which contain subsets of map (only the reference on the actual tile) for fast reference
@@ -204,28 +285,129 @@ class Map:
         self.walkable_tiles: List[Tile] = []
         self.own_farm_field_tiles: List[Tile] = []
         self.discovered_tiles: List[Tile] = []
+        self.__domains: Dict[str, TileDomain] = {}      # hashed versions of the tile lists, created on demand
+        self.__tile_list: List[Optional[Tile]] = []      # all tiles, by index (None, if the tile has been removed)
+        self.__free_indices: List[int] = []             # of removed tiles, reused by the next tiles which are added
+        self.__distance_fields: Dict[Tuple[str, str], DistanceField] = {}
+
+    @property
+    def walkable_domain(self) -> TileDomain:
+        return self.__get_domain("walkable", self.walkable_tiles)
+
+    @property
+    def buildable_domain(self) -> TileDomain:
+        return self.__get_domain("buildable", self.buildable_tiles)
+
+    @property
+    def scoutable_domain(self) -> TileDomain:
+        return self.__get_domain("scoutable", self.scoutable_tiles)
+
+    @property
+    def discovered_domain(self) -> TileDomain:
+        return self.__get_domain("discovered", self.discovered_tiles)
+
+    def __get_domain(self, name: str, tiles: List[Tile]) -> TileDomain:
+        if name not in self.__domains:
+            self.__domains[name] = TileDomain(tiles)
+        return self.__domains[name]
+
+    def get_distance_field(self, sources: str, domain: str = "discovered") -> DistanceField:
+        """
+        Distance of each tile to the closest element of a source set. The field is computed once per Map (i.e. per
+        turn) and shared by all callers, e.g. the weight functions of the AI scripts
+
+        :param sources: one of DISTANCE_SOURCES: own_buildings, opp_buildings, opp_armies, scoutable
+        :param domain: tiles over which the distance is measured: walkable, buildable, scoutable or discovered
+        :return: the distance field
+        """
+        key = (sources, domain)
+        if key not in self.__distance_fields:
+            self.__distance_fields[key] = DistanceField(self.__tile_list,
+                                                        getattr(self, Map.DISTANCE_SOURCES[sources]),
+                                                        getattr(self, f"{domain}_domain"))
+        return self.__distance_fields[key]
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.connect_graph()        # the tiles are pickled without their neighbours (see Tile.__getstate__)
 
     def add_tile(self, offset_coordinates: Tuple[int, int], gt: GroundType):
         """after instantiation, fill the map. No tile with the same coordinates should be added twice"""
-        self.map[offset_coordinates] = (Tile(offset_coordinates, gt))
+        tile = Tile(offset_coordinates, gt)
+        if self.__free_indices:         # the scoutable tiles come and go, the list must not grow with every one
+            tile.index = self.__free_indices.pop()
+            self.__tile_list[tile.index] = tile
+        else:
+            tile.index = len(self.__tile_list)
+            self.__tile_list.append(tile)
+        self.map[offset_coordinates] = tile
+        self.__distance_fields.clear()
 
     def connect_graph(self):
         """call this after all tiles have been added (or to recreate the bonds)"""
-        for _, v in self.map.items():
-            for _, o_v in self.map.items():
-                other_cc = o_v.cube_coordinates
-                if HexMap.get_cc_northeast(other_cc) == v.cube_coordinates:
-                    v.tile_sw = o_v
-                if HexMap.get_cc_east(other_cc) == v.cube_coordinates:
-                    v.tile_w = o_v
-                if HexMap.get_cc_southeast(other_cc) == v.cube_coordinates:
-                    v.tile_nw = o_v
-                if HexMap.get_cc_southwest(other_cc) == v.cube_coordinates:
-                    v.tile_ne = o_v
-                if HexMap.get_cc_west(other_cc) == v.cube_coordinates:
-                    v.tile_e = o_v
-                if HexMap.get_cc_northwest(other_cc) == v.cube_coordinates:
-                    v.tile_se = o_v
+        for tile in self.map.values():
+            self.__connect_tile(tile)
+
+    def connect_tiles(self, tiles: Iterable[Tile]):
+        """connects the tiles and their neighbours, use this after adding tiles to an already connected map"""
+        for tile in tiles:
+            self.__connect_tile(tile)
+            for n in (tile.tile_ne, tile.tile_e, tile.tile_se, tile.tile_sw, tile.tile_w, tile.tile_nw):
+                if n is not None:
+                    self.__connect_tile(n)
+
+    def __connect_tile(self, tile: Tile):
+        x, y = tile.offset_coordinates
+        n_ne, n_e, n_se, n_sw, n_w, n_nw = Map.__neighbour_offsets[y & 1]
+        tile.tile_ne = self.map.get((x + n_ne[0], y + n_ne[1]))
+        tile.tile_e = self.map.get((x + n_e[0], y + n_e[1]))
+        tile.tile_se = self.map.get((x + n_se[0], y + n_se[1]))
+        tile.tile_sw = self.map.get((x + n_sw[0], y + n_sw[1]))
+        tile.tile_w = self.map.get((x + n_w[0], y + n_w[1]))
+        tile.tile_nw = self.map.get((x + n_nw[0], y + n_nw[1]))
+
+    def remove_tile(self, offset_coordinates: Tuple[int, int]):
+        """removes the tile and its bonds to the neighbours. The tile must not be part of a tile list anymore"""
+        tile = self.map.pop(offset_coordinates)
+        self.__tile_list[tile.index] = None
+        self.__free_indices.append(tile.index)
+        self.__distance_fields.clear()
+        for n in (tile.tile_ne, tile.tile_e, tile.tile_se, tile.tile_sw, tile.tile_w, tile.tile_nw):
+            if n is not None:
+                self.__connect_tile(n)
+
+    def set_tiles(self, name: str, offset_coordinates: Iterable[Tuple[int, int]]):
+        """
+        replaces one of the tile lists (scoutable, buildable, walkable or discovered) and the flags of its tiles.
+        This allows to update a Map, which is kept from one turn to the next
+        """
+        tiles: List[Tile] = getattr(self, f"{name}_tiles")
+        flag = f"is_{name}"
+        for t in tiles:
+            setattr(t, flag, False)
+        tiles.clear()
+        for c in offset_coordinates:
+            tile = self.__get_tile(c)
+            tiles.append(tile)
+            setattr(tile, flag, True)
+        self.__domains.pop(name, None)
+        self.__distance_fields.clear()
+
+    def clear_objects(self):
+        """removes all resources, armies and buildings (such that they can be added again for the next turn)"""
+        for element in self.resource_list:
+            element.base_tile.resource = None
+        for element in self.army_list + self.opp_army_list:
+            element.base_tile.army = None
+        for element in self.building_list + self.opp_building_list:
+            element.base_tile.building = None
+        self.resource_list.clear()
+        self.army_list.clear()
+        self.opp_army_list.clear()
+        self.building_list.clear()
+        self.opp_building_list.clear()
+        self.own_farm_field_tiles.clear()
+        self.__distance_fields.clear()
 
     def add_resource(self, offset_coordinates: Tuple[int, int], res: Resource):
         tile = self.__get_tile(offset_coordinates)
@@ -247,30 +429,40 @@ class Map:
     def add_own_building(self, offset_coordinates: Tuple[int, int], building: Building):
         b: AI_Building = self.__add_building(offset_coordinates, building, True)
         self.building_list.append(b)
+        self.__distance_fields.clear()
 
     def add_opp_building(self, offset_coordinates: Tuple[int, int], building: Building, id: int):
         b: AI_Building = self.__add_building(offset_coordinates, building, False)
         b.owner = id
         self.opp_building_list.append(b)
+        self.__distance_fields.clear()
 
     def set_scoutable_tile(self, offset_coordinates: Tuple[int, int]):
         tile: Tile = self.__get_tile(offset_coordinates)
         self.scoutable_tiles.append(tile)
+        self.__domains.pop("scoutable", None)
+        self.__distance_fields.clear()
         tile.is_scoutable = True
 
     def set_buildable_tile(self, offset_coordinates: Tuple[int, int]):
         tile: Tile = self.__get_tile(offset_coordinates)
         self.buildable_tiles.append(tile)
+        self.__domains.pop("buildable", None)
+        self.__distance_fields.clear()
         tile.is_buildable = True
 
     def set_walkable_tile(self, offset_coordinates: Tuple[int, int]):
         tile: Tile = self.__get_tile(offset_coordinates)
         self.walkable_tiles.append(tile)
+        self.__domains.pop("walkable", None)
+        self.__distance_fields.clear()
         tile.is_walkable = True
 
     def set_discovered_tile(self, offset_coordinates: Tuple[int, int]):
         tile: Tile = self.__get_tile(offset_coordinates)
         self.discovered_tiles.append(tile)
+        self.__domains.pop("discovered", None)
+        self.__distance_fields.clear()
         tile.is_discovered = True
 
     def __add_army(self, offset_coordinates: Tuple[int, int], army: Army) -> AI_Army:
@@ -295,11 +487,7 @@ class Map:
                     t = self.__get_tile(a.offset_coordinates)
                     ai_b.associated_tiles.append(t)
                     self.own_farm_field_tiles.append(t)
-        ai_b.visible = False
-        for t in self.discovered_tiles:
-            if t.offset_coordinates == ai_b.offset_coordinates:
-                ai_b.visible = True
-                break
+        ai_b.visible = tile.is_discovered
         tile.building = ai_b
         return ai_b
 
@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import copy
+import random
+
 from src.ai.AI_GameStatus import AI_GameStatus, AI_Move
 from src.misc.game_constants import DiploEventType, debug, hint, Definitions
 from src.misc.game_logic_misc import Logger
@@ -76,7 +79,7 @@ class AI_Diplo:
         self.events.append(ai_event)
         if event in AI_Diplo.LOGGED_EVENTS:
             Logger.log_diplomatic_event(event, rel_change, loc, lifetime, self.name)
-        print(self.events)
+        debug("%s", self.events)
 
     def calc_round(self):
         """
@@ -139,7 +142,25 @@ class AI:
         """this is used for development.
         instead of printing all AI info to the console, one can use the dump to display stats in-game"""
         self.__dump: str = ""
-        debug("AI (" + str(name) + ") is running")
+        """random numbers of the AI. The stream is seeded per game (see AI_GameInterface.create_AI), thus a game can
+        be reproduced"""
+        self.random: random.Random = random.Random()
+        debug("AI (%s) is running", name)
+
+    def _setup_weights(self):
+        """an AI with weights (closures over the AI, e.g. from a script) sets them up here, see __deepcopy__"""
+        pass
+
+    def __deepcopy__(self, memo):
+        """copy of the AI for a speculative move. The weights are closures over the original AI, thus the copy sets
+        up its own ones"""
+        ai = self.__class__.__new__(self.__class__)
+        memo[id(self)] = ai
+        for k, v in self.__dict__.items():
+            if k not in ("weights", "m_weights", "trade_decisions"):
+                setattr(ai, k, copy.deepcopy(v, memo))
+        ai._setup_weights()
+        return ai
 
     def do_move(self, ai_state: AI_GameStatus, move: AI_Move):
         """upon completion of this method, the AI should have decided on its move"""
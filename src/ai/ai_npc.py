@@ -1,5 +1,4 @@
 import importlib
-import random
 from enum import Enum
 from typing import Set, Optional, Union, List, Any, Dict
 
@@ -49,14 +48,16 @@ class AI_NPC(AI):
         self.claimed_tiles: List[Tile] = []
 
         # Load the script
-        script_loc = AI_NPC.Script.get_script_location(script)
-        on_setup = getattr(importlib.import_module(script_loc), 'on_setup')
-        setup_weights = getattr(importlib.import_module(script_loc), 'setup_weights')
-        setup_movement_weights = getattr(importlib.import_module(script_loc), 'setup_movement_weights')
-
+        self.script_loc = AI_NPC.Script.get_script_location(script)
+        on_setup = getattr(importlib.import_module(self.script_loc), 'on_setup')
 
         self.properties: Dict[str, Any] = {}
         on_setup(self.properties)
+        self._setup_weights()
+
+    def _setup_weights(self):
+        setup_weights = getattr(importlib.import_module(self.script_loc), 'setup_weights')
+        setup_movement_weights = getattr(importlib.import_module(self.script_loc), 'setup_movement_weights')
         self.weights: List[Weight] = []
         self.m_weights: List[Weight] = []
         for c, v in setup_weights(self):
@@ -184,11 +185,9 @@ class AI_NPC(AI):
         self._dump(s)
 
     def calculate_heatmaps(self, ai_stat: AI_GameStatus):
-        heat_map = essentials.simple_heat_map(ai_stat.map.building_list, ai_stat.map.walkable_tiles,
-                                              lambda n: essentials.is_obj_in_list(n, ai_stat.map.walkable_tiles))
-        for d, s in heat_map:
-            if d <= self.properties['range_claimed_tiles']:
-                self.claimed_tiles.append(s)
+        # the range is counted from the neighbours of the buildings, the distance field from the buildings
+        field = ai_stat.map.get_distance_field("own_buildings", "walkable")
+        self.claimed_tiles.extend(field.within(self.properties['range_claimed_tiles'] + 1))
 
 
     def evaluate_move_building(self, ai_stat: AI_GameStatus) -> Optional[BuildOption]:
@@ -197,7 +196,7 @@ class AI_NPC(AI):
                 if pre_t is None:     # no prerequisite, thus we can build and not upgrade
                     if ai_stat.me.resources >= ai_stat.cost_building_construction[bui_t]:
                         # find a random building location
-                        idx = random.randint(0, len(self.claimed_tiles) - 1)
+                        idx = self.random.randint(0, len(self.claimed_tiles) - 1)
                         site = self.claimed_tiles[idx].offset_coordinates
                         return BuildOption(bui_t, site, [], Priority.P_MEDIUM)
         return None
@@ -213,7 +212,7 @@ class AI_NPC(AI):
 
         if len(list_of_upgradable_buildings) == 0:
             return None          # no building available that the AI can upgrade
-        idx = random.randint(0, len(list_of_upgradable_buildings) - 1)
+        idx = self.random.randint(0, len(list_of_upgradable_buildings) - 1)
         site = list_of_upgradable_buildings[idx][0].offset_coordinates
         btype = list_of_upgradable_buildings[idx][1]
         return UpgradeOption(btype, site, Priority.P_MEDIUM)
@@ -221,10 +220,10 @@ class AI_NPC(AI):
     def evaluate_move_recruit_unit(self, ai_stat: AI_GameStatus) -> Union[None, RaiseArmyOption, RecruitmentOption]:
         if len(ai_stat.map.army_list) == 0:
             for b in ai_stat.map.building_list:
-                nei = essentials.get_neighbours_on_set(b, ai_stat.map.walkable_tiles)  # buildable -> to avoid opp armies
+                nei = essentials.get_neighbours_on_set(b, ai_stat.map.walkable_domain)  # buildable -> to avoid opp armies
                 if len(nei) == 0:
                     continue
-                x = random.sample(nei, 1)[0]
+                x = self.random.sample(nei, 1)[0]
                 return RaiseArmyOption(x.offset_coordinates, Priority.P_MEDIUM)
         for t_u in self.properties['units']:
             if ai_stat.me.population + ai_stat.cost_unit_recruitment[t_u].population <= ai_stat.me.population_limit:
@@ -0,0 +1,152 @@
+import copy
+import multiprocessing
+import os
+import timeit
+import traceback
+from typing import Optional, Dict, List, Tuple, TYPE_CHECKING
+
+from src.ai.AI_GameStatus import AI_GameStatus, AI_Move, AI_GameInterface
+from src.misc.game_constants import Definitions, MoveType, error, hint, flush_log
+
+if TYPE_CHECKING:
+    from src.ai.ai_blueprint import AI
+
+
+class AIWorker:
+    """Hosts an AI in a persistent worker process, such that its computation does not share the GIL with the
+    rendering. Every turn, the AI gets a pickled snapshot of its AI_GameStatus and replies with its AI_Move.
+    If the AI has not replied within Definitions.AI_MOVE_DEADLINE seconds, the game continues with a fallback move
+    (do nothing). The late reply is discarded once it arrives (the AI itself is not aware of that).
+    Along with the move, the worker replies with the information the UI queries (state, dump and diplomacy)."""
+
+    def __init__(self, player_id: int, ai_str: str, ai_name: str, other_players: List[int], seed: str):
+        self.player_id = player_id
+        self.ai_name = ai_name
+        # spawn instead of fork: the game process has a window (OpenGL context) and threads
+        ctx = multiprocessing.get_context("spawn")
+        self.conn, child_conn = ctx.Pipe()
+        settings = {k: v for k, v in vars(Definitions).items() if not k.startswith("__")}
+        self.process = ctx.Process(target=run_worker, name=f"AI worker {ai_name}", daemon=True,
+                                   args=(child_conn, player_id, ai_str, ai_name, other_players, settings, seed))
+        self.process.start()
+        child_conn.close()
+        self.is_alive: bool = True
+        self.seq: int = 0                   # number of the last request, replies to older requests are discarded
+        self.state_str: str = ""
+        self.dump: str = ""
+        self.diplomacy: Dict[int, float] = {}
+        self.__speculative_info: tuple = ()
+
+    def do_move(self, ai_stat: AI_GameStatus) -> AI_Move:
+        """sends the game status to the worker and blocks until its move has arrived. Once the deadline has passed
+        (or if the worker has died), this is the fallback move"""
+        reply = self.__exchange("move", ai_stat)
+        if reply is None:
+            return AIWorker.fallback_move()
+        move, (self.state_str, self.dump, self.diplomacy) = reply
+        return move
+
+    def speculate(self, ai_stat: AI_GameStatus) -> Optional[AI_Move]:
+        """the worker computes the move on a copy of the AI, which replaces the AI on commit"""
+        reply = self.__exchange("speculate", ai_stat)
+        if reply is None:
+            return None
+        move, self.__speculative_info = reply
+        return move
+
+    def commit(self):
+        """the last (speculative) request has been used"""
+        if self.is_alive:
+            try:
+                self.conn.send(("commit", self.seq, None))
+            except OSError:
+                self.__lost()
+        self.state_str, self.dump, self.diplomacy = self.__speculative_info
+
+    def __exchange(self, command: str, ai_stat: AI_GameStatus) -> Optional[Tuple[AI_Move, tuple]]:
+        """the move and the info of the reply, None if there is none in time"""
+        self.seq = self.seq + 1
+        deadline = timeit.default_timer() + Definitions.AI_MOVE_DEADLINE
+        if self.is_alive:
+            try:
+                self.conn.send((command, self.seq, ai_stat))
+            except OSError:
+                self.__lost()
+        while self.is_alive:
+            try:
+                if not self.conn.poll(max(deadline - timeit.default_timer(), 0)):
+                    hint("%s has not finished its move within %s s", self.ai_name, Definitions.AI_MOVE_DEADLINE)
+                    return None
+                seq, move, info = self.conn.recv()
+            except (EOFError, OSError):
+                self.__lost()
+                return None
+            if seq != self.seq:
+                continue                    # reply to a request which has timed out
+            if move is None:
+                error("%s has failed: %s", self.ai_name, info)
+                return None
+            return move, info
+        return None
+
+    def close(self):
+        if self.is_alive:
+            try:
+                self.conn.send(None)
+            except OSError:
+                pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.is_alive = False
+
+    def __lost(self):
+        hint("the worker process of %s has died, the AI will not move anymore", self.ai_name)
+        self.is_alive = False
+
+    @staticmethod
+    def fallback_move() -> AI_Move:
+        move = AI_Move()
+        move.move_type = MoveType.DO_NOTHING
+        move.str_rep_of_action = "fallback move"
+        return move
+
+
+def run_worker(conn, player_id: int, ai_str: str, ai_name: str, other_players: List[int],
+               settings: Dict[str, object], seed: str):
+    """main loop of the worker process. It answers a request (command, sequence number, AI_GameStatus) with
+    (sequence number, AI_Move, info) and terminates on None. The commands are 'move', 'speculate' (on a copy of the
+    AI) and 'commit' (the copy of the last speculation replaces the AI, no answer)"""
+    for k, v in settings.items():               # the game might have changed them (the process is spawned)
+        setattr(Definitions, k, v)
+    if hasattr(os, "nice"):
+        os.nice(Definitions.AI_WORKER_NICENESS)  # the rendering of the game has priority
+    ai = AI_GameInterface.create_AI(player_id, ai_str, ai_name, other_players, seed)
+    speculation: Optional[Tuple[int, AI]] = None
+    while True:
+        try:
+            request: Optional[Tuple[str, int, Optional[AI_GameStatus]]] = conn.recv()
+        except EOFError:
+            break                               # the game has been closed
+        if request is None:
+            break
+        command, seq, ai_stat = request
+        if command == "commit":
+            if speculation is not None and speculation[0] == seq:
+                ai = speculation[1]
+            speculation = None
+            continue
+        speculation = None
+        target = copy.deepcopy(ai) if command == "speculate" else ai
+        move = AI_Move()
+        try:
+            target.do_move(ai_stat, move)
+            info = (target.get_state_as_str(), target.get_dump(),
+                    {pid: target.diplomacy.get_diplomatic_value_of_player(pid) for pid in other_players})
+            if command == "speculate":
+                speculation = (seq, target)
+        except Exception:
+            move, info = None, traceback.format_exc()
+        conn.send((seq, move, info))
+    flush_log()
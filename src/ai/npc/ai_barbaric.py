@@ -66,7 +66,7 @@ class Barbaric(AI_NPC):
                 targets.append(e_a)
 
             for target in targets:
-                next_step, dist = next_step_to_target(army_tile, target.base_tile, ai_stat.map.walkable_tiles)
+                next_step, dist = next_step_to_target(army_tile, target.base_tile, ai_stat.map.walkable_domain)
                 if next_step:
                     movements.append(ArmyMovementOption(target, Priority.P_MEDIUM,
                                                         next_step.offset_coordinates))
@@ -76,7 +76,7 @@ class Barbaric(AI_NPC):
                 for h_a in ai_stat.map.opp_army_list:
                     if get_distance(h_a, army_tile) <= 2:
                         self._dump(f"evading opponent army {get_distance(h_a, army_tile)}")
-                        next_step, dist = evasive_movement(army_tile, h_a.base_tile, ai_stat.map.walkable_tiles)
+                        next_step, dist = evasive_movement(army_tile, h_a.base_tile, ai_stat.map.walkable_domain)
                         if next_step:
                             movements.append(ArmyMovementOption(h_a, Priority.P_MEDIUM,
                                                                 next_step.offset_coordinates))
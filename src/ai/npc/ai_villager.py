@@ -83,11 +83,11 @@ class Villager(AI_NPC):
             domain = [x for x in ai_stat.map.walkable_tiles if not x.has_building() and not x.has_army()]
             domain.append(army_tile)
             if not self.patrol_target:
-                self.patrol_target = random.sample(domain, 1)[0].offset_coordinates
+                self.patrol_target = self.random.sample(domain, 1)[0].offset_coordinates
             pt = get_tile_by_xy(self.patrol_target, ai_stat.map.discovered_tiles)
             if pt not in domain:
                 self._dump("relocating patrol target, it appears to be blocked")
-                pt = random.sample(domain, 1)[0]
+                pt = self.random.sample(domain, 1)[0]
             if get_distance(pt, army_tile) > 0:
                 self._dump(f"patrol tile: {pt.offset_coordinates}")
                 next_step, dist = next_step_to_target(army_tile, pt, domain)
@@ -106,8 +106,8 @@ class Villager(AI_NPC):
                     movements.append(ArmyMovementOption(self.patrol_target, Priority.P_MEDIUM,
                                                         next_step.offset_coordinates))
             if len(hostile_armies) == 0:
-                target = random.sample(get_neighbours_on_set(village_tile, ai_stat.map.walkable_tiles), 1)[0]
-                next_step, dist = next_step_to_target(army_tile, target, ai_stat.map.walkable_tiles)
+                target = self.random.sample(get_neighbours_on_set(village_tile, ai_stat.map.walkable_domain), 1)[0]
+                next_step, dist = next_step_to_target(army_tile, target, ai_stat.map.walkable_domain)
                 if next_step:
                     movements.append(ArmyMovementOption(self.patrol_target, Priority.P_MEDIUM,
                                                         next_step.offset_coordinates))
@@ -116,7 +116,7 @@ class Villager(AI_NPC):
             hostile_armies = [x for x in ai_stat.map.opp_army_list if x.owner in self.hostile_player]
             hostile_buildings = [x for x in ai_stat.map.opp_building_list if x.owner in self.hostile_player]
             for h_target in list(set().union(hostile_armies, hostile_buildings)):
-                next_step, dist = next_step_to_target(army_tile, h_target.base_tile, ai_stat.map.walkable_tiles)
+                next_step, dist = next_step_to_target(army_tile, h_target.base_tile, ai_stat.map.walkable_domain)
                 if next_step:
                     movements.append(ArmyMovementOption(h_target, Priority.P_MEDIUM, next_step.offset_coordinates))
         return movements
@@ -1,8 +1,6 @@
 from dataclasses import dataclass
 from typing import Dict, List, Tuple
 
-import matplotlib.pyplot as plt
-
 from src.ai.AI_MapRepresentation import Map
 from src.game_accessoires import Unit
 from src.misc.building import Building
@@ -51,6 +49,8 @@ class PerformanceLogger:
 
     @staticmethod
     def setup(player_ids_and_colours: List[Tuple[int, str]]):
+        PerformanceLogger.data.clear()          # the process may play more than one game (e.g. a tournament)
+        PerformanceLogger.pid_c.clear()
         for pid, c in player_ids_and_colours:
             PerformanceLogger.data[pid] = []
             PerformanceLogger.pid_c.append((pid, PerformanceLogger.__colour_to_numpy_code(c)))
@@ -61,6 +61,7 @@ class PerformanceLogger:
 
     @staticmethod
     def show():
+        import matplotlib.pyplot as plt
         y = []
         x = []
         y_idx = 0
@@ -189,7 +189,7 @@ def setup_movement_weights(self: AI_Mazedonian) -> List[Tuple[Callable, float]]:
 
     def aw1(elem: AI_Mazedonian.AttackTarget, ai_stat: AI_GameStatus) -> bool:
         if type(elem.target) == AI_Army:
-            if essentials.is_obj_in_list(elem.target, self.claimed_tiles):
+            if elem.target.base_tile in self.claimed_tiles:
                 return True
         return False
 
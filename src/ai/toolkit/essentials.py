@@ -1,20 +1,25 @@
 from __future__ import annotations
 
 import copy
+import heapq
+import itertools
 import queue
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List, Union, Tuple, Callable, Set, Optional
+from typing import List, Union, Tuple, Callable, Set, Optional, Dict, FrozenSet
 
-from src.ai.AI_MapRepresentation import Tile, AI_Element
+from src.ai.AI_MapRepresentation import Tile, AI_Element, TileDomain
 from src.hex_map import Hexagon
 from src.misc.game_constants import debug
 
 # ------------------------ Essential TOOLKIT FUNCTIONS: ------------------------
 
 AI_OBJ = Union[AI_Element, Tile]
+DOMAIN = Union[List[AI_OBJ], Set[AI_OBJ], TileDomain]
 
 
-def simple_heat_map(initial_set: List[AI_OBJ], working_set: List[AI_OBJ],
+def simple_heat_map(initial_set: List[AI_OBJ], working_set: DOMAIN,
                     condition: Callable[[AI_OBJ], bool]) -> List[Tuple[int, AI_OBJ]]:
     """
     create simple heat map.
@@ -28,11 +33,12 @@ def simple_heat_map(initial_set: List[AI_OBJ], working_set: List[AI_OBJ],
     For instance, one might want to exclude all tiles, which have a resource
 
     :param initial_set: list from where to start the search
-    :param working_set: only neighbors, which are in this list will be considered for the search
+    :param working_set: only neighbors, which are in this domain will be considered for the search
     :param condition: additional condition, see above
     :return: heat map, a tuple containing an integer value which is the distance to the closest object in initial list plus the object itself
     """
 
+    working_set = as_domain(working_set)
     heat_map: List[Tuple[int, AI_OBJ]] = []
     tmp = queue.Queue()
     discovered = set()
@@ -52,7 +58,7 @@ def simple_heat_map(initial_set: List[AI_OBJ], working_set: List[AI_OBJ],
     return heat_map
 
 
-def bfs(start: Tile, target: Tile, domain: List[Tile]) -> List[Tile]:
+def bfs(start: Tile, target: Tile, domain: DOMAIN) -> List[Tile]:
     """
 
     :param start:
@@ -60,14 +66,13 @@ def bfs(start: Tile, target: Tile, domain: List[Tile]) -> List[Tile]:
     :param domain:
     :return:
     """
+    domain = as_domain(domain)
     path: List[Tile] = []
     tmp = queue.Queue()
     tmp.put((0, start))
     discovered = set()
     path_endpoint = None
-    for d in domain:
-        d.pre = None
-        d.dist = -1
+    start.pre = None
 
     while not tmp.empty():
         d, s = tmp.get()
@@ -109,66 +114,127 @@ class AStarNode:
         return self.base_tile.offset_coordinates == other.base_tile.offset_coordinates
 
 
-def a_star(start: Tile, target: Tile, domain: List[Tile]) -> List[Tile]:
+def a_star(start: Tile, target: Tile, domain: DOMAIN) -> List[Tile]:
     """
     A* path finding routine, in sparse hexagonal maps a relatively fast way of finding the shortest path
     from start to target
-    As heuristic, I use the distance between two nodes
+    As heuristic, I use the distance between two nodes. The open list is a binary heap (ties are broken by
+    insertion order), expanded tiles are kept in a closed set and for each tile only the best g value is kept,
+    such that no tile is expanded twice.
 
     :param start: start tile
     :param target: target tile
     :param domain: search domain which as to be explored. This has to be a connected graph. Also, start and finish
     should be part of the domain
-    :return: a path, including the start and finish tile
+    :return: a path, including the start and finish tile. Only the start tile, if there is no path
     """
+    domain = as_domain(domain)
     if target not in domain or start not in domain:
         print("no pathfinding possible")
         return [start]
+    path = path_cache.get(start, target, domain)
+    if path is None:
+        path = _search_path(start, target, domain)
+        path_cache.put(start, target, domain, path)
+    return path
 
-    start_node = AStarNode(start)
-    end_node = AStarNode(target)
-
-    open_list = []
-    closed_list = []
-
-    open_list.append(start_node)
-    while len(open_list) > 0:
-        current_node = open_list[0]
-        current_index = 0
-        for index, item in enumerate(open_list):
-            if item.f < current_node.f:
-                current_node = item
-                current_index = index
 
-        open_list.pop(current_index)
-        closed_list.append(current_node)
+def _search_path(start: Tile, target: Tile, domain: TileDomain) -> List[Tile]:
+    """the actual A* search, see a_star"""
+    counter = itertools.count()
+    open_heap: List[Tuple[int, int, int, Tile]] = [(get_distance(start, target), next(counter), 0, start)]
+    best_g: Dict[Tile, int] = {start: 0}
+    parent: Dict[Tile, Optional[Tile]] = {start: None}
+    closed_set: Set[Tile] = set()
 
-        if current_node == end_node:
+    while open_heap:
+        _, _, g, current = heapq.heappop(open_heap)
+        if current in closed_set:
+            continue        # outdated entry, the tile was pushed again with a better g
+        if current.offset_coordinates == target.offset_coordinates:
             path = []
-            current = current_node
             while current is not None:
-                path.append(current.base_tile)
-                current = current.parent
-            return path[::-1]   # is this the same as [::-1] <-> reverse?
-
-        children = []
-        for child in get_neighbours_on_set(current_node, domain):
-            children.append(AStarNode(child, parent=current_node))
-
-        for child in children:
-            for c in closed_list:
-                if child == c:
-                    continue
-
-            child.g = current_node.g + 1
-            child.h = get_distance(end_node.base_tile, child.base_tile)
-            child.f = child.g + child.h
-
-            for open_node in open_list:
-                if child == open_node and child.g > open_node.g:
-                    continue
-
-            open_list.append(child)
+                path.append(current)
+                current = parent[current]
+            return path[::-1]
+        closed_set.add(current)
+        for child in get_neighbours_on_set(current, domain):
+            if child in closed_set:
+                continue
+            child_g = g + 1
+            if child_g >= best_g.get(child, child_g + 1):
+                continue
+            best_g[child] = child_g
+            parent[child] = current
+            heapq.heappush(open_heap, (child_g + get_distance(child, target), next(counter), child_g, child))
+    return [start]
+
+
+class PathCache:
+    """
+    Caches the results of a_star. A path is stored by its offset coordinates for the key
+    (start, target, domain version). Domains with the same coordinates share a version, such that
+    a query is also answered from the cache in the next turn, as long as the domain did not change (the Map is
+    created every turn). If a domain changes, it gets a new version and the paths found on the old one are not
+    used anymore. Only the paths of the last MAX_DOMAINS domain versions are kept.
+    The cache is shared by all AIs of the process, which may run in more than one thread (the game logic and the
+    thread of the AI moves, which also speculates, see GameLogic). Thus get, put and clear take a lock. The tiles
+    of a path belong to the Map of the caller, which is only used by the thread of its AI.
+    """
+    MAX_DOMAINS = 32
+
+    def __init__(self):
+        self.__versions: Dict[FrozenSet[Tuple[int, int]], int] = {}
+        # domain version -> (start, target) -> coordinates of the path, the least recently used domain first
+        self.__paths: OrderedDict[int, Dict[Tuple[Tuple[int, int], Tuple[int, int]], Tuple]] = OrderedDict()
+        self.__version_counter = itertools.count()
+        self.__lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, start: Tile, target: Tile, domain: TileDomain) -> Optional[List[Tile]]:
+        with self.__lock:
+            paths = self.__get_paths(domain)
+            coordinates = paths.get((start.offset_coordinates, target.offset_coordinates))
+            if coordinates is None:
+                self.misses = self.misses + 1
+                return None
+            self.hits = self.hits + 1
+        # the path is rebuilt from the start tile, since the tiles belong to the Map of the current turn
+        path = [start]
+        for c in coordinates[1:]:
+            path.append(next(n for n in get_neighbours(path[-1]) if n.offset_coordinates == c))
+        return path
+
+    def put(self, start: Tile, target: Tile, domain: TileDomain, path: List[Tile]):
+        coordinates = tuple(t.offset_coordinates for t in path)
+        with self.__lock:
+            self.__get_paths(domain)[(start.offset_coordinates, target.offset_coordinates)] = coordinates
+
+    def clear(self):
+        with self.__lock:
+            self.__versions.clear()
+            self.__paths.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __get_paths(self, domain: TileDomain):
+        """called with the lock held"""
+        if domain.version is None:
+            if domain.coordinates not in self.__versions:
+                self.__versions[domain.coordinates] = next(self.__version_counter)
+            domain.version = self.__versions[domain.coordinates]
+        if domain.version in self.__paths:
+            self.__paths.move_to_end(domain.version)
+        else:
+            self.__paths[domain.version] = {}
+            if len(self.__paths) > PathCache.MAX_DOMAINS:
+                old_version, _ = self.__paths.popitem(last=False)
+                self.__versions = {k: v for k, v in self.__versions.items() if v != old_version}
+        return self.__paths[domain.version]
+
+
+path_cache = PathCache()
 
 
 def dijkstra_pq(start: Tile, target: Tile, domain: List[Tile]) -> List[Tile]:
@@ -256,20 +322,26 @@ def get_tile_by_xy(coords, discovered_tiles: []):
     return None
 
 
-def get_neighbours_on_set(tile: Union[AI_OBJ, AStarNode], working_set: List[Tile]) -> List[Tile]:
+def get_neighbours_on_set(tile: Union[AI_OBJ, AStarNode], working_set: DOMAIN) -> List[Tile]:
     """
+    (!) If this is called repeatedly on the same list, pass a TileDomain instead (see as_domain)
 
     :param tile:
     :param working_set: the domain, in which the neighbors are searched
     :return: a list of all neighbors of the tile, which are also in the working list
     """
-    # return [x for x in get_neighbours(tile) if x in working_set]
-    ret = []
-    for x in get_neighbours(tile):
-        for w in working_set:
-            if x.offset_coordinates == w.offset_coordinates:
-                ret.append(x)
-    return ret
+    working_set = as_domain(working_set)
+    return [x for x in get_neighbours(tile) if x in working_set]
+
+
+def as_domain(domain: DOMAIN) -> TileDomain:
+    """
+    returns the hashed version of the domain, such that the membership test is O(1).
+    Creating it is O(n), hence do this once per search (or use the domains of the Map, which exist once per turn)
+    """
+    if isinstance(domain, TileDomain):
+        return domain
+    return TileDomain(domain)
 
 
 def get_neighbours(e: Union[AI_OBJ, AStarNode]) -> List[Tile]:
@@ -350,16 +422,17 @@ def cube_distance(a, b):
     return (abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) / 2
 
 
-def is_obj_in_list(obj: Union[AI_OBJ, Hexagon], domain: List[Union[AI_OBJ, Hexagon]]) -> bool:
+def is_obj_in_list(obj: Union[AI_OBJ, Hexagon], domain: Union[List[Union[AI_OBJ, Hexagon]], TileDomain]) -> bool:
     """
     check whether a the offset coordinates of an object match the ones of an element in the list
     comparison is done via the coordinates of the element
 
     :param obj: any object, which has offset_coordinates AI_Object or Hexagon
-    :param domain: comparison list
+    :param domain: comparison list, or a TileDomain (O(1))
     :return: True, if the object is in the list, else False
     """
-
+    if isinstance(domain, TileDomain):
+        return obj in domain
     for e in domain:
         if e.offset_coordinates == obj.offset_coordinates:
             return True
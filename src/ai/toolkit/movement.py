@@ -1,4 +1,4 @@
-from typing import Optional, List, Tuple
+from typing import Optional, Tuple
 
 from src.ai.AI_MapRepresentation import Tile
 from src.ai.toolkit import essentials
@@ -8,7 +8,8 @@ from src.misc.game_constants import error
 # ------------------------ Movement TOOLKIT FUNCTIONS: ------------------------
 
 
-def next_step_to_target(current_tile: Tile, target_tile: Tile, domain: List[Tile]) -> Tuple[Optional[Tile], int]:
+def next_step_to_target(current_tile: Tile, target_tile: Tile,
+                        domain: essentials.DOMAIN) -> Tuple[Optional[Tile], int]:
     """
     basic movement, returns next step, not the complete path
 
@@ -29,7 +30,7 @@ def next_step_to_target(current_tile: Tile, target_tile: Tile, domain: List[Tile
     return path[1], len(path) - 1          # return next step and distance of the path
 
 
-def evasive_movement(current_tile: Tile, target_tile: Tile, domain: List[Tile]) -> Tuple[Optional[Tile], int]:
+def evasive_movement(current_tile: Tile, target_tile: Tile, domain: essentials.DOMAIN) -> Tuple[Optional[Tile], int]:
     """
     This movement calculates the next step which maximizes the distance to the target_tile
     Use with method to avoid collision between the entity placed on the current_tile, with a potentially
@@ -46,6 +47,7 @@ def evasive_movement(current_tile: Tile, target_tile: Tile, domain: List[Tile])
     if not target_tile:
         error("target tile is None")
         return None, -1
+    domain = essentials.as_domain(domain)       # hash it once, it is used for up to 7 searches
     longest_path: Tuple[int, Optional[Tile]] = (-1, None)
     for nei in essentials.get_neighbours_on_set(current_tile, domain):
         step, dist = next_step_to_target(nei, target_tile, domain)
@@ -57,7 +59,7 @@ def evasive_movement(current_tile: Tile, target_tile: Tile, domain: List[Tile])
 
 
 def protective_movement(current_tile: Tile, target_tile: Tile, protected_tile: Tile,
-                        domain: List[Tile]) -> Tuple[Optional[Tile], int]:
+                        domain: essentials.DOMAIN) -> Tuple[Optional[Tile], int]:
     """
     If an army/obj chooses to use protective movement, it will stay close to the entity it is protecting
     It will position itself such that it intercepts the incoming hostile entity on the target tile if possible
@@ -71,6 +73,7 @@ def protective_movement(current_tile: Tile, target_tile: Tile, protected_tile: T
     if not (current_tile and target_tile and protected_tile):
         error("a tile is None")
         return None, -1
+    domain = essentials.as_domain(domain)       # hash it once, it is used for up to 7 searches
     shortest_path: Tuple[int, Optional[Tile]] = (1000, None)
     for nei in essentials.get_neighbours_on_set(protected_tile, domain):
         step, dist = next_step_to_target(nei, target_tile, domain)
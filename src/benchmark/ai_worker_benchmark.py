@@ -0,0 +1,63 @@
+import os
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+from src.game_logic import GameLogic
+from src.headless import HeadlessGameLogic
+from src.misc.game_constants import Definitions, LogLevel
+
+# measures the frame times of the update loop while the AIs compute their moves, once with the AIs in threads (as it
+# used to be) and once in worker processes. A frame polls the game logic (handle_turn) and simulates the rendering
+# by FRAME_WORK seconds of python code, i.e. it needs the GIL.
+# run from the src directory: python benchmark/ai_worker_benchmark.py
+
+GAME_FILE = "../resources/game_ai_vs_npc.xml"
+TURNS = 100
+FRAME_WORK = 0.005
+
+
+class PolledGameLogic(HeadlessGameLogic):
+    """starts the AIs like the game does (thread or worker process), instead of waiting for them"""
+
+    def _start_ai_worker(self, player):
+        GameLogic._start_ai_worker(self, player)
+
+
+def simulate_rendering():
+    end = timeit.default_timer() + FRAME_WORK
+    while timeit.default_timer() < end:
+        pass
+
+
+def benchmark(ai_workers: bool) -> [float]:
+    gl = PolledGameLogic(GAME_FILE, ai_workers=ai_workers)
+    gl.setup()
+    frame_times = []
+    while gl.winner is None and gl.turn_nr < TURNS:
+        t1 = timeit.default_timer()
+        gl.playNextTurn = True
+        gl.handle_turn()
+        simulate_rendering()
+        frame_times.append(timeit.default_timer() - t1)
+    gl.shutdown()
+    return sorted(frame_times)
+
+
+def main():
+    Definitions.DEBUG_MODE = False
+    Definitions.LOG_LEVEL = LogLevel.ERROR          # the worker processes do not write to the redirected stdout
+    print(f"{'':>10}{'frames':>8}{'mean':>12}{'99th pct':>12}{'max':>12}")
+    for name, ai_workers in (("threads", False), ("processes", True)):
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            times = benchmark(ai_workers)
+        mean = sum(times) / len(times)
+        print(f"{name:>10}{len(times):>8}{mean * 1000:>9.2f} ms{times[int(len(times) * 0.99)] * 1000:>9.2f} ms"
+              f"{times[-1] * 1000:>9.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+
+from src.game_file_reader import GameFileReader
+from src.misc.game_constants import Definitions
+
+# measures how long it takes to read all data of a game file, as the GameLogic does at startup.
+# 'xml' parses the xml file (untangle), 'compiled' loads the cached compiled file. 'first launch' parses and stores it.
+# The map of the game file is enlarged to size x size tiles (copies of the original rows and columns).
+# run from the src directory: python benchmark/game_file_benchmark.py
+
+BASE_GAME_FILE = "../resources/game_ai_vs_npc.xml"
+MAP_SIZES = [20, 50, 100, 200]
+REPETITIONS = 5
+
+
+def create_game_file(size: int, directory: str) -> str:
+    """copies the base game file and repeats its map and its objects up to size x size tiles"""
+    with open(BASE_GAME_FILE) as f:
+        xml = f.read()
+    for tag in ("map", "map_obj"):
+        start = xml.index(f"<{tag}>") + len(f"<{tag}>")
+        end = xml.index(f"</{tag}>")
+        rows = [row.split() for row in xml[start:end].strip().splitlines()]
+        rows = [(row * (size // len(row) + 1))[:size] for row in rows]
+        rows = (rows * (size // len(rows) + 1))[:size]
+        xml = xml[:start] + "\n" + "\n".join("  ".join(row) for row in rows) + "\n" + xml[end:]
+    file = path.join(directory, f"game_{size}.xml")
+    with open(file, "w") as f:
+        f.write(xml)
+    return file
+
+
+def read_all(game_file: str):
+    reader = GameFileReader(game_file)
+    reader.read_textures_to_dict({})
+    reader.read_map([])
+    reader.read_map_obj([])
+    reader.read_resource_info({})
+    reader.read_building_info({})
+    reader.read_unit_info({})
+    reader.read_player_info([])
+
+
+def benchmark(size: int, directory: str) -> (float, float, float):
+    file = create_game_file(size, directory)
+    Definitions.USE_SCENARIO_CACHE = False
+    t_xml = timeit.timeit(lambda: read_all(file), number=REPETITIONS) / REPETITIONS
+    Definitions.USE_SCENARIO_CACHE = True
+    t1 = timeit.default_timer()
+    read_all(file)
+    t2 = timeit.default_timer()
+    t_compiled = timeit.timeit(lambda: read_all(file), number=REPETITIONS) / REPETITIONS
+    return t_xml, t2 - t1, t_compiled
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    Definitions.SCENARIO_CACHE_PATH = path.join(directory, "compiled")
+    try:
+        print(f"{'map size':>10}{'xml':>14}{'first launch':>16}{'compiled':>14}")
+        for size in MAP_SIZES:
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                t_xml, t_first, t_compiled = benchmark(size, directory)
+            print(f"{f'{size}x{size}':>10}{t_xml * 1000:>11.1f} ms{t_first * 1000:>13.1f} ms{t_compiled * 1000:>11.1f} ms")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import os
+import re
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+from src.ai.AI_GameStatus import AI_GameStatus
+from src.headless import HeadlessGameLogic
+
+# measures how long it takes to construct the game status (the input of the AI) depending on the map size.
+# The player has discovered the whole map, which is the worst case. The first game status of a player builds the AI map,
+# the following ones only apply the changes (here: none, apart from the objects)
+# run from the src directory: python benchmark/game_status_benchmark.py
+
+BASE_GAME_FILE = "../resources/game_ai_vs_npc.xml"
+MAP_SIZES = [20, 40, 60, 80, 100]
+REPETITIONS = 5
+
+
+def create_game_file(size: int) -> str:
+    """copies the base game file and replaces its map by a grass map of size x size tiles without any objects"""
+    with open(BASE_GAME_FILE) as f:
+        xml = f.read()
+    rows = "\n".join("  ".join(["gr"] * size) for _ in range(size))
+    obj_rows = "\n".join("  ".join(["--"] * size) for _ in range(size))
+    xml = re.sub(r"<map>.*?</map>", f"<map>\n{rows}\n</map>", xml, flags=re.DOTALL)
+    xml = re.sub(r"<map_obj>.*?</map_obj>", f"<map_obj>\n{obj_rows}\n</map_obj>", xml, flags=re.DOTALL)
+    fd, file = tempfile.mkstemp(suffix=".xml")
+    with os.fdopen(fd, "w") as f:
+        f.write(xml)
+    return file
+
+
+def benchmark(size: int) -> (float, float):
+    file = create_game_file(size)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            gl = HeadlessGameLogic(file)
+            gl.setup()
+            gl.updata_map()
+        player = gl.player_list[0]
+        player.discovered_tiles.update(gl.hex_map.map)
+        t1 = timeit.default_timer()
+        gl.construct_game_status(player, AI_GameStatus())
+        t2 = timeit.default_timer()
+        for _ in range(REPETITIONS):
+            gl.construct_game_status(player, AI_GameStatus())
+        t3 = timeit.default_timer()
+        return t2 - t1, (t3 - t2) / REPETITIONS
+    finally:
+        os.remove(file)
+
+
+def main():
+    print(f"{'map size':>10}{'tiles':>8}{'full':>14}{'incremental':>14}")
+    for size in MAP_SIZES:
+        full, incremental = benchmark(size)
+        print(f"{f'{size}x{size}':>10}{size * size:>8}{full * 1000:>11.1f} ms{incremental * 1000:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
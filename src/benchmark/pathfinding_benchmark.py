@@ -0,0 +1,73 @@
+import os
+import random
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+from src.ai.AI_GameStatus import AI_GameStatus
+from src.ai.toolkit import essentials
+from src.headless import HeadlessGameLogic
+
+# measures essentials.a_star on the shipped scenario maps. The player has discovered the whole map and paths are
+# searched between random pairs of walkable tiles. Each path is checked against the distance of a breadth first search.
+# The same queries are repeated on the game status of the next turn, these are answered by the path cache
+# run from the src directory: python benchmark/pathfinding_benchmark.py
+
+GAME_FILES = ["../resources/game_ai_vs_npc.xml", "../resources/game_me_vs_npc.xml"]
+NUM_OF_PAIRS = 500
+SEED = 0
+
+
+def benchmark(game_file: str) -> (int, float, float, int):
+    """returns the number of searched paths, the mean time per search (without and with cache) and the number of
+    non-optimal paths"""
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        gl = HeadlessGameLogic(game_file)
+        gl.setup()
+        gl.updata_map()
+    player = gl.player_list[0]
+    player.discovered_tiles.update(gl.hex_map.map)
+    ai_stat = AI_GameStatus()
+    gl.construct_game_status(player, ai_stat)
+    domain = ai_stat.map.walkable_domain
+    tiles = ai_stat.map.walkable_tiles
+
+    rnd = random.Random(SEED)
+    pairs = [(rnd.choice(tiles), rnd.choice(tiles)) for _ in range(NUM_OF_PAIRS)]
+    essentials.path_cache.clear()
+    t1 = timeit.default_timer()
+    paths = [essentials.a_star(start, target, domain) for start, target in pairs]
+    t2 = timeit.default_timer()
+
+    next_ai_stat = AI_GameStatus()
+    gl.construct_game_status(player, next_ai_stat)
+    next_tiles = {t.offset_coordinates: t for t in next_ai_stat.map.walkable_tiles}
+    next_pairs = [(next_tiles[s.offset_coordinates], next_tiles[t.offset_coordinates]) for s, t in pairs]
+    t3 = timeit.default_timer()
+    for start, target in next_pairs:
+        essentials.a_star(start, target, next_ai_stat.map.walkable_domain)
+    t4 = timeit.default_timer()
+
+    non_optimal = 0
+    for (start, target), p in zip(pairs, paths):
+        # the heat map starts counting at 0 for the neighbours of the start tile
+        dist = {s: d + 1 for d, s in essentials.simple_heat_map([start], domain, lambda n: True)}
+        dist[start] = 0
+        expected = dist[target] + 1 if target in dist else 1          # path includes start and target
+        if len(p) != expected:
+            non_optimal = non_optimal + 1
+    return len(pairs), (t2 - t1) / len(pairs), (t4 - t3) / len(pairs), non_optimal
+
+
+def main():
+    print(f"{'game file':<40}{'paths':>8}{'a_star':>14}{'cached':>14}{'non optimal':>14}")
+    for game_file in GAME_FILES:
+        n, t, t_cached, non_optimal = benchmark(game_file)
+        print(f"{path.basename(game_file):<40}{n:>8}{t * 1000:>11.3f} ms{t_cached * 1000:>11.3f} ms{non_optimal:>14}")
+
+
+if __name__ == "__main__":
+    main()
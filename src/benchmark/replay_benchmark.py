@@ -0,0 +1,88 @@
+import os
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+from typing import Optional
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+from src.headless import HeadlessGameLogic
+from src.misc.game_constants import Definitions, GAME_LOGIC_CLK_SPEED
+from src.misc.replay import Replay, encode_move
+
+# plays a seeded game with and without recording it, then fast-forwards the recorded game to its last turn.
+# Compares the fast-forward with watching the game at the clock of the game (GAME_LOGIC_CLK_SPEED per turn of a
+# player, in automatic mode) and checks that the fast-forwarded game is the recorded one (by recording it again).
+# Also checks that games with seeds out of the range of a fixed size int are recorded and replayed byte for byte.
+# run from the src directory: python benchmark/replay_benchmark.py
+
+GAME_FILE = "../resources/game_ai_vs_npc.xml"
+MAX_TURNS = 300
+SEED = 7
+ODD_SEEDS = (-1, 2 ** 64)
+
+
+def play(record: Optional[str] = None, seed: int = SEED) -> (HeadlessGameLogic, float):
+    gl = HeadlessGameLogic(GAME_FILE, seed=seed)
+    gl.setup()
+    if record:
+        gl.record(record)
+    t1 = timeit.default_timer()
+    gl.play(MAX_TURNS)
+    t2 = timeit.default_timer()
+    gl.shutdown()
+    return gl, t2 - t1
+
+
+def recorded_moves(file: str, turn_nr: int) -> [bytes]:
+    return [encode_move(t, pid, move) for t, pid, move in Replay(file).moves if t < turn_nr]
+
+
+def replays_identically(seed: int, directory: str) -> bool:
+    """records a game, fast-forwards it to its last turn and plays it to its end while recording it again"""
+    file, file_again = path.join(directory, f"{seed}.replay"), path.join(directory, f"{seed}_again.replay")
+    play(file, seed)
+    replay = Replay(file)
+    gl = HeadlessGameLogic(replay.game_xml_file, seed=replay.seed)
+    gl.setup()
+    gl.record(file_again)
+    gl.fast_forward(replay, replay.last_turn)
+    gl.play(MAX_TURNS)
+    gl.shutdown()
+    with open(file, "rb") as f, open(file_again, "rb") as f_again:
+        return replay.seed == seed and f.read() == f_again.read()
+
+
+def main():
+    Definitions.DEBUG_MODE = False
+    directory = tempfile.mkdtemp()
+    file, file_ff = path.join(directory, "benchmark.replay"), path.join(directory, "fast_forward.replay")
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        gl, t_plain = play()
+        gl_rec, t_rec = play(file)
+        replay = Replay(file)
+        gl_ff = HeadlessGameLogic(replay.game_xml_file, seed=replay.seed)
+        gl_ff.setup()
+        gl_ff.record(file_ff)
+        t1 = timeit.default_timer()
+        gl_ff.fast_forward(replay, replay.last_turn)
+        t_ff = timeit.default_timer() - t1
+        gl_ff.shutdown()
+        identical = {seed: replays_identically(seed, directory) for seed in ODD_SEEDS}
+    moves = gl_rec.recorder.num_moves
+    size = os.path.getsize(file)
+    print(f"game: {gl_rec.turn_nr} turns, {moves} moves")
+    print(f"playing:              {t_plain * 1000:>9.1f} ms")
+    print(f"playing + recording:  {t_rec * 1000:>9.1f} ms")
+    print(f"replay:               {size:>9} bytes ({size / max(moves, 1):.1f} bytes per move)")
+    print(f"fast-forward to {gl_ff.turn_nr:>4}: {t_ff * 1000:>9.1f} ms "
+          f"(at the clock of the game: {gl_ff.turn_nr * len(gl_ff.player_list) * GAME_LOGIC_CLK_SPEED:.0f} s)")
+    print(f"same moves: {recorded_moves(file, gl_ff.turn_nr) == recorded_moves(file_ff, gl_ff.turn_nr)}")
+    for seed, same in identical.items():
+        print(f"seed {seed}: replayed byte for byte: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import time
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+from src.game_logic import GameLogic
+from src.headless import HeadlessGameLogic
+from src.misc.game_constants import Definitions, LogLevel
+
+# measures the latency of the AI turns, i.e. the time from the start of a turn until the move has been executed, with
+# and without speculative AI moves. Between two turns, the game loop waits PAUSE seconds, as the game does for the
+# animations and the clock (GAME_LOGIC_CLK_SPEED). Meanwhile, the next AI can compute its move in advance.
+# run from the src directory: python benchmark/speculation_benchmark.py
+
+GAME_FILE = "../resources/game_ai_vs_npc.xml"
+TURNS = 60
+PAUSE = 0.02
+# name: (speculative AI, AI worker processes)
+CONFIGS = {"threads": (False, False),
+           "threads + speculation": (True, False),
+           "processes": (False, True),
+           "processes + speculation": (True, True)}
+
+
+class PolledGameLogic(HeadlessGameLogic):
+    """starts the AIs like the game does (in the AI thread), instead of computing the move directly"""
+
+    def _start_ai_worker(self, player):
+        GameLogic._start_ai_worker(self, player)
+
+
+def benchmark(speculative: bool, ai_workers: bool) -> (float, float, float):
+    """returns the mean and the maximal latency of the turns and the share of used speculative moves"""
+    Definitions.SPECULATIVE_AI = speculative
+    gl = PolledGameLogic(GAME_FILE, ai_workers=ai_workers)
+    gl.setup()
+    latencies = []
+    while gl.winner is None and gl.turn_nr < TURNS:
+        if speculative:
+            gl.speculate_next_turn()                # as GameLogic.update does while waiting for the next turn
+        time.sleep(PAUSE)
+        t1 = timeit.default_timer()
+        gl.handle_turn(block=True)
+        latencies.append(timeit.default_timer() - t1)
+    gl.shutdown()
+    used = gl.speculations_used / len(latencies)
+    return sum(latencies) / len(latencies), max(latencies), used
+
+
+def main():
+    Definitions.DEBUG_MODE = False
+    Definitions.LOG_LEVEL = LogLevel.ERROR          # the worker processes do not write to the redirected stdout
+    print(f"{'':>24}{'mean':>12}{'max':>12}{'speculative':>14}")
+    for name, (speculative, ai_workers) in CONFIGS.items():
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            mean, worst, used = benchmark(speculative, ai_workers)
+        print(f"{name:>24}{mean * 1000:>9.2f} ms{worst * 1000:>9.2f} ms{used:>14.0%}")
+
+
+if __name__ == "__main__":
+    main()
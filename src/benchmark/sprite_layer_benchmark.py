@@ -0,0 +1,140 @@
+import random
+import timeit
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+
+import arcade
+
+from src.hex_map import HexMap
+from src.misc.camera import Camera
+from src.misc.sprites import DepthSortedSpriteList, SpriteLayer
+
+# measures the cost of keeping the game object layer in depth order. A map of size x size tiles carries one object
+# per tile (resources, buildings, armies). During a turn ARMY_MOVES armies move to a neighbouring row.
+# 'resort' is the old approach: after each move every sprite is removed, sorted by center_y and appended again.
+# 'depth layer' only repositions the moved sprite in the DepthSortedSpriteList.
+# 'frame' is the time of a draw call right after the turn (the sprite buffers are rebuilt), 'idle frame' the time
+# of a draw call without changes.
+# The second table compares drawing the ground of the map as a single sprite list with the culled SpriteLayer (only
+# the chunks on screen are drawn), each with a changed tile ('frame') and without changes ('idle frame').
+# Needs a display (an OpenGL context), run from the src directory: python benchmark/sprite_layer_benchmark.py
+
+MAP_SIZES = [20, 40, 60, 80]
+GROUND_MAP_SIZES = [20, 50, 100, 200]
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+ARMY_MOVES = 20
+SEED = 0
+
+
+def resort(sprite_list: arcade.SpriteList):
+    li = list(sprite_list)
+    for s in li:
+        sprite_list.remove(s)
+    li.sort(key=lambda x: x.center_y, reverse=True)
+    for s in li:
+        sprite_list.append(s)
+
+
+def create_sprite(offset_coords) -> arcade.Sprite:
+    sprite = arcade.SpriteSolidColor(30, 30, arcade.color.WHITE)
+    sprite.center_x, sprite.center_y = HexMap.offset_to_pixel_coords(offset_coords)
+    return sprite
+
+
+def benchmark(size: int, depth_sorted: bool) -> (float, float, float):
+    """returns the time of a turn, of the first frame after the turn and of an idle frame"""
+    rnd = random.Random(SEED)
+    sprite_list = DepthSortedSpriteList() if depth_sorted else arcade.SpriteList()
+    sprites = []
+    for y in range(size):
+        for x in range(size):
+            sprite = create_sprite((x, y))
+            sprites.append((sprite, y))
+            if depth_sorted:
+                sprite_list.add(sprite, y)
+            else:
+                sprite_list.append(sprite)
+    if not depth_sorted:
+        resort(sprite_list)
+    sprite_list.draw()
+    moves = []
+    for _ in range(ARMY_MOVES):
+        sprite, y = rnd.choice(sprites)
+        moves.append((sprite, max(0, y - 1) if rnd.random() < .5 else min(size - 1, y + 1)))
+
+    t1 = timeit.default_timer()
+    for sprite, new_y in moves:
+        sprite.center_y = HexMap.offset_to_pixel_coords((0, new_y))[1]
+        if depth_sorted:
+            sprite_list.reposition(sprite, new_y)
+        else:
+            resort(sprite_list)
+    t2 = timeit.default_timer()
+    sprite_list.draw()
+    t3 = timeit.default_timer()
+    sprite_list.draw()
+    t4 = timeit.default_timer()
+    return t2 - t1, t3 - t2, t4 - t3
+
+
+def draw(layer, viewport):
+    if isinstance(layer, SpriteLayer):
+        layer.draw(viewport)
+    else:
+        layer.draw()
+
+
+def benchmark_culling(size: int, culled: bool) -> (float, float):
+    """returns the time of a frame after a tile has changed and of an idle frame"""
+    camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+    camera.set_center(HexMap.offset_to_pixel_coords((size // 2, size // 2)))
+    viewport = camera.get_viewport()
+    arcade.set_viewport(*viewport)
+    layer = SpriteLayer() if culled else arcade.SpriteList()
+    center_sprite = None
+    for y in range(size):
+        for x in range(size):
+            sprite = create_sprite((x, y))
+            if culled:
+                layer.add(sprite, (x, y))
+            else:
+                layer.append(sprite)
+            if (x, y) == (size // 2, size // 2):
+                center_sprite = sprite
+    draw(layer, viewport)
+    t1 = timeit.default_timer()
+    layer.remove(center_sprite)
+    if culled:
+        layer.add(center_sprite, (size // 2, size // 2))
+    else:
+        layer.append(center_sprite)
+    draw(layer, viewport)
+    t2 = timeit.default_timer()
+    draw(layer, viewport)
+    t3 = timeit.default_timer()
+    return t2 - t1, t3 - t2
+
+
+def main():
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, "sprite layer benchmark")
+    window.set_visible(False)
+    print(f"{'map size':>10}{'sprites':>9}{'':>14}{'turn':>14}{'frame':>14}{'idle frame':>14}")
+    for size in MAP_SIZES:
+        for depth_sorted in (False, True):
+            turn, frame, idle = benchmark(size, depth_sorted)
+            name = "depth layer" if depth_sorted else "resort"
+            print(f"{f'{size}x{size}':>10}{size * size:>9}{name:>14}{turn * 1000:>11.1f} ms{frame * 1000:>11.1f} ms"
+                  f"{idle * 1000:>11.1f} ms")
+    print(f"\n{'map size':>10}{'tiles':>9}{'':>14}{'frame':>14}{'idle frame':>14}")
+    for size in GROUND_MAP_SIZES:
+        for culled in (False, True):
+            frame, idle = benchmark_culling(size, culled)
+            name = "sprite layer" if culled else "sprite list"
+            print(f"{f'{size}x{size}':>10}{size * size:>9}{name:>14}{frame * 1000:>11.1f} ms{idle * 1000:>11.1f} ms")
+    window.close()
+
+
+if __name__ == "__main__":
+    main()
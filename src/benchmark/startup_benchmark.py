@@ -0,0 +1,94 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))          # the AI scripts are loaded from src
+
+# measures the startup of a game: 'load' is the construction of the GameLogic (mainly loading the textures), 'setup'
+# creates the map and the objects (and loads the textures on first use, if lazy), 'first frame' draws all sprites
+# once (the sprite lists build their textures). Each configuration runs in a new process, so that no texture is cached.
+# 'before' decodes all textures serially, as it used to be. The atlas is built once before it is measured.
+# Needs a display (an OpenGL context), run from the src directory: python benchmark/startup_benchmark.py
+
+GAME_FILE = "../resources/game_ai_vs_npc.xml"
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+REPETITIONS = 3
+# name: (use atlas, number of threads, lazy loading)
+CONFIGS = {"before": (False, 1, False),
+           "threads": (False, 4, False),
+           "threads + lazy": (False, 4, True),
+           "atlas + lazy": (True, 4, True)}
+
+
+def run(config: str, atlas_path: str, conn):
+    """runs in the child process and sends the times to the parent (the output of the game is not parsed)"""
+    import arcade
+    from src.game import ZlvlRenderer
+    from src.game_logic import GameLogic
+    from src.misc.camera import Camera
+    from src.misc.game_constants import Definitions, NUM_Z_LEVELS
+    from src.misc.sprites import SpriteLayer
+    Definitions.USE_TEXTURE_ATLAS, Definitions.TEXTURE_LOADING_THREADS, Definitions.LAZY_TEXTURE_LOADING = \
+        CONFIGS[config]
+    Definitions.TEXTURE_ATLAS_PATH = atlas_path
+    Definitions.SHOW_AI_CTRL = False
+    window = arcade.Window(SCREEN_WIDTH, SCREEN_HEIGHT, "startup benchmark")
+    window.set_visible(False)
+    renderer = ZlvlRenderer(NUM_Z_LEVELS, Camera(SCREEN_WIDTH, SCREEN_HEIGHT))
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        t1 = timeit.default_timer()
+        gl = GameLogic(GAME_FILE, renderer.z_levels)
+        t2 = timeit.default_timer()
+        gl.setup()
+        t3 = timeit.default_timer()
+        for z in renderer.z_levels:
+            if isinstance(z, SpriteLayer):
+                z.draw(None)
+            else:
+                z.draw()
+        t4 = timeit.default_timer()
+    window.close()
+    conn.send((t2 - t1, t3 - t2, t4 - t3))
+    conn.close()
+
+
+def measure(config: str, atlas_path: str) -> (float, float, float):
+    """returns the mean times of the configuration"""
+    ctx = multiprocessing.get_context("spawn")        # a new process, nothing is cached
+    times = []
+    for _ in range(REPETITIONS):
+        conn, child_conn = ctx.Pipe(duplex=False)
+        process = ctx.Process(target=run, args=(config, atlas_path, child_conn))
+        process.start()
+        child_conn.close()
+        try:
+            times.append(conn.recv())
+        except EOFError:                                # the process has died without sending the times
+            process.join()
+            raise RuntimeError(f"the benchmark of {config} has failed (exit code {process.exitcode})")
+        process.join()
+    return tuple(sum(t) / len(times) for t in zip(*times))
+
+
+def main():
+    atlas_path = tempfile.mkdtemp()
+    try:
+        measure("atlas + lazy", atlas_path)                 # builds the atlas
+        print(f"{'':>16}{'load':>14}{'setup':>14}{'first frame':>14}{'total':>14}")
+        for config in CONFIGS:
+            load, setup, frame = measure(config, atlas_path)
+            total = load + setup + frame
+            print(f"{config:>16}{load * 1000:>11.1f} ms{setup * 1000:>11.1f} ms{frame * 1000:>11.1f} ms"
+                  f"{total * 1000:>11.1f} ms")
+    finally:
+        shutil.rmtree(atlas_path)
+
+
+if __name__ == "__main__":
+    main()
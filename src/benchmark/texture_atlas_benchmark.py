@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import timeit
+from contextlib import redirect_stdout
+from os import sys, path
+
+sys.path.append(path.dirname(path.dirname(path.dirname(path.abspath(__file__)))))
+
+from PIL import Image
+
+from src.game_file_reader import GameFileReader
+from src.misc.texture_atlas import TextureAtlas
+
+# measures how long it takes to get the images of the textures of a game file (including the sprite sheets of the flags)
+# 'files' decodes one file per texture (as arcade.load_texture does), 'atlas (build)' packs the images into sheets and
+# stores them, 'atlas (cached)' reads the stored (uncompressed) sheets and cuts out the images.
+# Only the images are loaded, the upload to the graphics card is not part of it. Hence, no display is required.
+# run from the src directory: python benchmark/texture_atlas_benchmark.py
+
+GAME_FILES = ["../resources/game_ai_vs_npc.xml", "../resources/game_me_vs_npc.xml"]
+FLAG_SHEETS = ["../resources/objects/animated/flag_100_sprite_{}.png".format(c) for c in ("red", "blue", "yellow")]
+REPETITIONS = 5
+
+
+def requested_files(game_file: str) -> [str]:
+    tex_dict = {}
+    GameFileReader(game_file).read_textures_to_dict(tex_dict)
+    return list(dict.fromkeys(v[0] for v in tex_dict.values())) + [f for f in FLAG_SHEETS if path.isfile(f)]
+
+
+def load_files(files: [str]):
+    return [Image.open(f).convert("RGBA") for f in files]
+
+
+def load_atlas(atlas_path: str, files: [str]):
+    atlas = TextureAtlas(atlas_path)
+    atlas.load(files)
+    return [atlas.get_image(f) for f in files]
+
+
+def benchmark(game_file: str) -> (int, float, float, float):
+    files = requested_files(game_file)
+    atlas_path = tempfile.mkdtemp()
+    try:
+        t_files = timeit.timeit(lambda: load_files(files), number=REPETITIONS) / REPETITIONS
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            t1 = timeit.default_timer()
+            load_atlas(atlas_path, files)
+            t2 = timeit.default_timer()
+            t_cached = timeit.timeit(lambda: load_atlas(atlas_path, files), number=REPETITIONS) / REPETITIONS
+        for f, image in zip(files, load_atlas(atlas_path, files)):
+            if image.tobytes() != Image.open(f).convert("RGBA").tobytes():
+                print(f"atlas image differs from {f}")
+        return len(files), t_files, t2 - t1, t_cached
+    finally:
+        shutil.rmtree(atlas_path)
+
+
+def main():
+    print(f"{'game file':<30}{'images':>8}{'files':>14}{'atlas (build)':>16}{'atlas (cached)':>16}")
+    for game_file in GAME_FILES:
+        n, t_files, t_build, t_cached = benchmark(game_file)
+        print(f"{path.basename(game_file):<30}{n:>8}{t_files * 1000:>11.1f} ms{t_build * 1000:>13.1f} ms"
+              f"{t_cached * 1000:>13.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
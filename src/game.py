@@ -1,11 +1,15 @@
+import argparse
 import time
-from typing import Any, List, Optional
+from typing import Optional
 
 import os
 from os import sys, path
 import timeit
 
+import arcade
+
 from src.misc.camera import Camera
+from src.misc.sprites import SpriteLayer
 
 sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
 # print(os.getcwd())
@@ -14,6 +18,7 @@ from src.ui.human import HumanInteraction
 from src.console import Console
 from src.game_logic import GameLogic
 from src.misc.game_constants import *
+from src.misc.replay import Replay
 from src.ui.ui import UI
 from src.ui.extern.extern_ai_display import AIControl
 from src.ui.extern.extern_startup_display import StartUp, DecisionType, Decision
@@ -26,67 +31,32 @@ SETUP_COMMANDS = "../resources/initial_commands.txt"
 
 
 class ZlvlRenderer:
-    def __init__(self, num_levels):
-        self.camera_x = 0
-        self.camera_y = 0
-        self.rel_x = 0
-        self.rel_y = 0
-        self.camera_has_moved = False
+    """draws the z levels through the camera. The map and the game objects are culled (see SpriteLayer)"""
+    def __init__(self, num_levels, camera: Camera):
+        self.camera: Camera = camera
         self.z_levels: [arcade.SpriteList] = []
         for i in range(num_levels):
-            self.z_levels.append(arcade.SpriteList())
+            if i in (Z_MAP, Z_AUX, Z_GAME_OBJ):
+                self.z_levels.append(SpriteLayer())
+            else:
+                self.z_levels.append(arcade.SpriteList())
         self.ui = None
-        self.gl = None
-        self.up_key = False
-        self.down_key = False
-        self.left_key = False
-        self.right_key = False
-        self.camera_event_listener: List[Any] = []
 
     def render(self):
-
+        viewport = self.camera.get_viewport()
+        arcade.set_viewport(*viewport)
         for z in self.z_levels:
-            z.draw()
+            if isinstance(z, SpriteLayer):
+                z.draw(viewport)
+            else:
+                z.draw()
+        arcade.set_viewport(0, self.camera.screen_width, 0, self.camera.screen_height)
 
         self.ui.draw()
 
-    def update(self, delta_t: float):
-        rel = int(float(CAMERA_SENSITIVITY) * delta_t)
-        if self.up_key:
-            self.camera_has_moved = True
-            self.rel_y = - rel
-            self.camera_y = self.camera_y + self.rel_y
-        elif self.down_key:
-            self.camera_has_moved = True
-            self.rel_y = rel
-            self.camera_y = self.camera_y + self.rel_y
-        if self.left_key:
-            self.camera_has_moved = True
-            self.rel_x = rel
-            self.camera_x = self.camera_x + self.rel_x
-        elif self.right_key:
-            self.camera_has_moved = True
-            self.rel_x = - rel
-            self.camera_x = self.camera_x + self.rel_x
-
-        if self.camera_has_moved:
-            for s_list in self.z_levels:
-                for sp in s_list:
-                    sp.center_x = sp.center_x + self.rel_x
-                    sp.center_y = sp.center_y + self.rel_y
-            self.gl.set_camera_pos(self.camera_x, self.camera_y)
-            self.gl.animator.update_camera_pos((self.camera_x, self.camera_y))
-            #self.gl.animator.camera_pos = (self.camera_x, self.camera_y)
-            self.ui.camera_pos = (self.camera_x, self.camera_y)
-            for listener in self.camera_event_listener:
-                listener.camera_pos = (self.camera_x, self.camera_y)
-            self.camera_has_moved = False
-            self.rel_x = 0
-            self.rel_y = 0
-
 
 class Game(arcade.Window):
-    def __init__(self, width, height, title, game_xml_file):
+    def __init__(self, width, height, title, game_xml_file, seed: Optional[int] = None):
         super().__init__(width, height, title)
 
         file_path = os.path.dirname(os.path.abspath(__file__))
@@ -94,16 +64,16 @@ class Game(arcade.Window):
         sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
         print('working dir: ' + str(os.getcwd()))
 
-        self.z_level_renderer: ZlvlRenderer = ZlvlRenderer(NUM_Z_LEVELS)
-        self.game_logic: GameLogic = GameLogic(game_xml_file, self.z_level_renderer.z_levels)
+        self.camera: Camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.z_level_renderer: ZlvlRenderer = ZlvlRenderer(NUM_Z_LEVELS, self.camera)
+        self.game_logic: GameLogic = GameLogic(game_xml_file, self.z_level_renderer.z_levels, seed)
         self.hi = HumanInteraction(self.game_logic, self.z_level_renderer.z_levels[2],
                                    self.z_level_renderer.z_levels[4])
         self.console: Console = Console()
         self.ui = UI(self.game_logic, self.hi, SCREEN_WIDTH, SCREEN_HEIGHT)
         self.z_level_renderer.ui = self.ui
-        self.z_level_renderer.gl = self.game_logic
-        self.z_level_renderer.camera_event_listener.append(self.hi)
-        self.camera: Optional[Camera] = None
+        self.camera.register(self.ui, self.ui.update_camera_pos)
+        self.camera.register(self.hi, self.hi.update_camera_pos)
 
         self.commands: [(str, str)] = []
 
@@ -122,9 +92,10 @@ class Game(arcade.Window):
 
     def setup(self):
         arcade.set_background_color(arcade.color.BLACK)
-        self.camera = Camera(SCREEN_WIDTH, SCREEN_HEIGHT)
         self.commands.extend(self.console.initial_commands(SETUP_COMMANDS))
         self.game_logic.setup()
+        if Definitions.REPLAY_FILE:
+            self.game_logic.record(Definitions.REPLAY_FILE)
         self.ui.setup()
         self.game_logic.human_interface = self.hi
         if Definitions.SHOW_AI_CTRL:
@@ -140,6 +111,7 @@ class Game(arcade.Window):
     def on_close(self):
         if Definitions.SHOW_AI_CTRL:
             self.ai_ctrl.close()
+        self.game_logic.shutdown()
 
         if Definitions.SHOW_STATS_ON_EXIT:
             from src.ai.performance import PerformanceLogger
@@ -154,7 +126,7 @@ class Game(arcade.Window):
         self.commands.extend(self.console.get())
         self.game_logic.update(delta_time, self.commands, self.wall_clock_time)
         self.ui.update(self.wall_clock_time)
-        self.z_level_renderer.update(delta_time)
+        self.camera.update(delta_time)
         self.commands.clear()
 
         self.num_of_sprites = 0
@@ -215,42 +187,26 @@ class Game(arcade.Window):
 
     def on_key_press(self, key: int, modifiers: int):
         if key == arcade.key.UP:
-            self.z_level_renderer.up_key = True
+            self.camera.up_key = True
         if key == arcade.key.DOWN:
-            self.z_level_renderer.down_key = True
+            self.camera.down_key = True
         if key == arcade.key.LEFT:
-            self.z_level_renderer.left_key = True
+            self.camera.left_key = True
         if key == arcade.key.RIGHT:
-            self.z_level_renderer.right_key = True
-        # if key == arcade.key.UP:
-        #     self.z_level_renderer.up_key = True
-        # if key == arcade.key.DOWN:
-        #     self.z_level_renderer.down_key = True
-        # if key == arcade.key.LEFT:
-        #     self.z_level_renderer.left_key = True
-        # if key == arcade.key.RIGHT:
-        #     self.z_level_renderer.right_key = True
+            self.camera.right_key = True
         self.ui.handle_key_input(key)
 
 
 
     def on_key_release(self, key: int, modifiers: int):
         if key == arcade.key.UP:
-            self.z_level_renderer.up_key = False
+            self.camera.up_key = False
         if key == arcade.key.DOWN:
-            self.z_level_renderer.down_key = False
+            self.camera.down_key = False
         if key == arcade.key.LEFT:
-            self.z_level_renderer.left_key = False
+            self.camera.left_key = False
         if key == arcade.key.RIGHT:
-            self.z_level_renderer.right_key = False
-        # if key == arcade.key.UP:
-        #     self.camera.up_key = False
-        # if key == arcade.key.DOWN:
-        #     self.camera.down_key = False
-        # if key == arcade.key.LEFT:
-        #     self.camera.left_key = False
-        # if key == arcade.key.RIGHT:
-        #     self.camera.right_key = False
+            self.camera.right_key = False
         if key == arcade.key.SPACE:
             self.ui.next_turn_button.on_release()
 
@@ -261,8 +217,25 @@ class Game(arcade.Window):
 
 
 def main():
+    parser = argparse.ArgumentParser(description="starts the game")
+    parser.add_argument("--replay", metavar="FILE",
+                        help="plays the game of a replay file (see --record) up to --fast-forward at once, then the "
+                             "game continues")
+    parser.add_argument("--fast-forward", type=int, metavar="TURN",
+                        help="the turn up to which the recorded moves are played (by default the last recorded one)")
+    parser.add_argument("--record", metavar="FILE",
+                        help="records the moves to a replay file (e.g. ../resources/generated/replays/game.replay)")
+    parser.add_argument("--ai-workers", action="store_true",
+                        help=f"runs the AIs in worker processes (with a deadline of {Definitions.AI_MOVE_DEADLINE} s "
+                             f"per move)")
+    args = parser.parse_args()
+    Definitions.AI_WORKER_PROCESSES = args.ai_workers
+    if args.record:
+        Definitions.REPLAY_FILE = args.record
+    replay: Optional[Replay] = Replay(args.replay) if args.replay else None
+
     dcn: Optional[Decision] = None
-    if Definitions.SHOW_STARTUP_CTRL:
+    if Definitions.SHOW_STARTUP_CTRL and replay is None:
         startup_ctrl = StartUp("../resources/")
         startup_ctrl.start()  # start thread
         while True:
@@ -282,10 +255,14 @@ def main():
         Definitions.ALLOW_CONSOLE_CMDS = dcn.allow_command_line_input
         Definitions.DEBUG_MODE = dcn.enable_debug_mode
         game_xml_file = dcn.xml_file_location
+    if replay:
+        game_xml_file = replay.game_xml_file
     print(f"Game XML file: {game_xml_file}")
 
-    window = Game(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, game_xml_file)
+    window = Game(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE, game_xml_file, replay.seed if replay else None)
     window.setup()
+    if replay:
+        window.game_logic.fast_forward(replay, args.fast_forward if args.fast_forward is not None else replay.last_turn)
     window.set_update_rate(1/60)
     arcade.finish_render()
     arcade.run()
@@ -1,16 +1,21 @@
 from __future__ import annotations
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional, TYPE_CHECKING
 
-import arcade
-from arcade import AnimationKeyframe
+from src.hex_map import Hexagon, HexMap
+from src.misc.game_constants import ResourceType, error, GroundType, PlayerColour, UnitType, UnitCost, Definitions
 
-from src.hex_map import Hexagon
-from src.misc.game_constants import ResourceType, error, GroundType, PlayerColour, UnitType, UnitCost
+if TYPE_CHECKING:
+    import arcade
+    from src.misc.building import Building
+    from src.player import Player
 
 
 class Drawable:
     def __init__(self):
-        self.sprite: arcade.Sprite = arcade.Sprite()
+        self.sprite: Optional[arcade.Sprite] = None     # remains None in headless mode
+        if not Definitions.HEADLESS:
+            import arcade
+            self.sprite = arcade.Sprite()
         self.tex_counter = -1  # this variable is supposed to count the number of textures
         self.__active_tex = -1
         self.tex_code = ""
@@ -18,11 +23,16 @@ class Drawable:
         self.update_interval = 0.2
         self.__time = .0
 
-    def set_sprite_pos(self, pos_pixel: (int, int), camera_pos):
-        self.sprite.center_x = pos_pixel[0] + self.offset[0] + camera_pos[0]
-        self.sprite.center_y = pos_pixel[1] + self.offset[1] + camera_pos[1]
+    def set_sprite_pos(self, pos_pixel: (int, int)):
+        """the position on the map (in pixels). The camera is applied while rendering"""
+        if self.sprite is None:
+            return
+        self.sprite.center_x = pos_pixel[0] + self.offset[0]
+        self.sprite.center_y = pos_pixel[1] + self.offset[1]
 
     def add_texture(self, tex: arcade.Texture):
+        if self.sprite is None:
+            return
         if self.__active_tex == -1:
             self.__active_tex = 0
         self.sprite.append_texture(tex)
@@ -31,13 +41,19 @@ class Drawable:
 
     def set_tex_offset(self, offset: (int, int)):
         self.offset = offset
+        if self.sprite is None:
+            return
         self.sprite.center_x = self.sprite.center_x + offset[0]
         self.sprite.center_y = self.sprite.center_y + offset[1]
 
     def set_tex_scale(self, scale: float):
+        if self.sprite is None:
+            return
         self.sprite.scale = scale
 
     def set_active_texture(self, idx: int):
+        if self.sprite is None:
+            return
         if self.tex_counter >= idx:
             self.sprite.set_texture(idx)
             self.__active_tex = idx
@@ -45,6 +61,8 @@ class Drawable:
             error("Drawable: No texture at index: " + str(idx))
 
     def next_frame(self, d_t):
+        if self.sprite is None:
+            return
         self.__time = self.__time + d_t
         if self.__time >= self.update_interval:
             self.__active_tex = (self.__active_tex + 1) % (self.tex_counter + 1)
@@ -53,12 +71,56 @@ class Drawable:
 
 
 class Ground(Drawable):
+    """once the ground is placed on a hexagon, its flags are stored in the arrays of the HexMap (see bind)"""
 
     def __init__(self, str_code: str):
         super().__init__()
-        self.walkable: bool = False
-        self.buildable: bool = False
-        self.ground_type: GroundType = GroundType.get_type_from_strcode(str_code)
+        self.__hex_map: Optional[HexMap] = None
+        self.__index: int = -1
+        self.__walkable: bool = False
+        self.__buildable: bool = False
+        self.__ground_type: GroundType = GroundType.get_type_from_strcode(str_code)
+
+    def bind(self, hex_map: HexMap, index: int):
+        hex_map.walkable[index] = self.__walkable
+        hex_map.buildable[index] = self.__buildable
+        hex_map.ground_type[index] = self.__ground_type.value
+        self.__hex_map = hex_map
+        self.__index = index
+
+    @property
+    def walkable(self) -> bool:
+        if self.__hex_map is None:
+            return self.__walkable
+        return bool(self.__hex_map.walkable[self.__index])
+
+    @walkable.setter
+    def walkable(self, value: bool):
+        self.__walkable = value
+        if self.__hex_map is not None:
+            self.__hex_map.walkable[self.__index] = value
+
+    @property
+    def buildable(self) -> bool:
+        if self.__hex_map is None:
+            return self.__buildable
+        return bool(self.__hex_map.buildable[self.__index])
+
+    @buildable.setter
+    def buildable(self, value: bool):
+        self.__buildable = value
+        if self.__hex_map is not None:
+            self.__hex_map.buildable[self.__index] = value
+
+    @property
+    def ground_type(self) -> GroundType:
+        return self.__ground_type
+
+    @ground_type.setter
+    def ground_type(self, value: GroundType):
+        self.__ground_type = value
+        if self.__hex_map is not None:
+            self.__hex_map.ground_type[self.__index] = value.value
 
 
 class Resource(Drawable):
@@ -178,18 +240,41 @@ class Army(Drawable):
                 self.get_amount_by_unit(UnitType.BABARIC_SOLDIER))
 
 
-class Flag(arcade.AnimatedTimeBasedSprite):
-    def __init__(self, pos: Tuple[int, int], animated_tex: List[arcade.Texture], scale=1):
-        super().__init__(scale=scale, center_x=pos[0], center_y=pos[1])
-        i = 0
-        for tex in animated_tex:
-            self.append_texture(tex)
-            self.frames.append(AnimationKeyframe(i, 80, tex))
-            i += 1
-        self.set_texture(0)
-
-
 class Scenario:
     def __init__(self):
         self.resource_list: [Resource] = []
         self.aux_sprites: [(Hexagon, Drawable)] = []
+        self.occupancy: OccupancyIndex = OccupancyIndex()
+
+
+class OccupancyIndex:
+    """
+    What is located on a hexagon, by the index of the hexagon (see Hexagon.index).
+    The index is maintained by the GameLogic (add_resource, del_resource, add_building, del_building, add_army,
+    move_army, del_army), such that "what is on this hex" does not require to scan the lists of all players
+    """
+    def __init__(self):
+        self.resources: Dict[int, Resource] = {}
+        self.buildings: Dict[int, Tuple[Building, Player]] = {}
+        self.armies: Dict[int, List[Tuple[Army, Player]]] = {}     # a list, to be on the safe side
+
+    def add_army(self, army: Army, player: Player):
+        self.armies.setdefault(army.tile.index, []).append((army, player))
+
+    def remove_army(self, army: Army):
+        occupants = self.armies.get(army.tile.index, [])
+        for i, (a, _) in enumerate(occupants):
+            if a is army:
+                occupants.pop(i)
+                break
+        if len(occupants) == 0:
+            self.armies.pop(army.tile.index, None)
+
+    def get_armies(self, hexagon: Hexagon) -> List[Tuple[Army, Player]]:
+        return list(self.armies.get(hexagon.index, []))
+
+    def get_building(self, hexagon: Hexagon) -> Optional[Tuple[Building, Player]]:
+        return self.buildings.get(hexagon.index)
+
+    def get_resource(self, hexagon: Hexagon) -> Optional[Resource]:
+        return self.resources.get(hexagon.index)
@@ -1,80 +1,163 @@
-from typing import Dict, Any
-from src.misc.game_constants import UnitType, BuildingType, ResourceType
+import hashlib
+import os
+import pickle
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+from src.misc.game_constants import UnitType, BuildingType, ResourceType, Definitions, hint
 
 import untangle
 
 
 class GameFileReader:
+    """Reads the game data (textures, map, objects and the tables of resources, buildings, units and players) of a game
+    file. Parsing the xml file is slow, hence the file is compiled once into plain data (the map as arrays of code
+    indices), which is cached on disk (pickle) under the hash of the file. The xml file is only parsed if the file has
+    changed since"""
+    FORMAT_VERSION = 1          # increase if the compiled data changes, this invalidates all cached files
+
     def __init__(self, xml_game_data: str):
-        self.xml_parser = untangle.parse(xml_game_data)
+        self.xml_parser = None
+        self.data: Optional[Dict[str, Any]] = None
+        if Definitions.USE_SCENARIO_CACHE:
+            self.data = self.__load_compiled(xml_game_data)
+        if self.data is None:
+            self.xml_parser = untangle.parse(xml_game_data)
+            self.data = self.__compile()
+            if Definitions.USE_SCENARIO_CACHE:
+                self.__save_compiled(xml_game_data, self.data)
 
     def read_textures_to_dict(self, tex_dict: {}):
-        for elem in self.xml_parser.game.textures.children:
-            tex_dict[elem.get_attribute('code')] = (elem.cdata,
-                                                    int(elem.get_attribute('offsetX')),
-                                                    int(elem.get_attribute('offsetY')),
-                                                    float(elem.get_attribute('scale')))
+        tex_dict.update(self.data['textures'])
 
     def read_map(self, map_list: [str]):
-        raw: str = self.xml_parser.game.map.cdata
-        row_wise: [str] = raw.strip().splitlines()
-        row_wise.reverse()
-        for row in row_wise:
-            map_list.append(row.split())
+        codes, grid = self.data['map']
+        for row in grid:
+            map_list.append([codes[i] for i in row.tolist()])
 
     def read_map_obj(self, map_obj_list: [(str, int, int)]):
         """fills the list with the strcode, as well as the position in offset coordinates"""
-        raw: str = self.xml_parser.game.map_obj.cdata
-        row_wise: [str] = raw.strip().splitlines()
-        row_wise.reverse()
-        for y in range(len(row_wise)):
-            s_split = row_wise[y].split()
-            for x in range(len(s_split)):
-                if s_split[x] != "--":
-                    map_obj_list.append((s_split[x], x, y))
+        codes, objs = self.data['map_obj']
+        for i, x, y in objs.tolist():
+            map_obj_list.append((codes[i], x, y))
 
     def read_resource_info(self, resource_info: Dict[ResourceType, Dict[str, Any]]):
-        for elem in self.xml_parser.game.resources.children:
-            from src.misc.game_constants import ResourceType
-            resource_info[ResourceType.get_type_from_strcode(elem.get_attribute('code'))] = {
-                'amount': int(elem.get_attribute('amount'))}
+        for code, info in self.data['resources']:
+            resource_info[ResourceType.get_type_from_strcode(code)] = dict(info)
 
     def read_building_info(self, building_info: Dict[BuildingType, Dict[str, Any]]):
-        for elem in self.xml_parser.game.buildings.children:
-            building_info[BuildingType.get_type_from_strcode(elem.get_attribute('code'))] = {
-                'tex_code': elem.get_attribute('code'),
-                'construction_cost': int(elem.get_attribute('construction_cost')),
-                'culture_per_turn': int(elem.get_attribute('culture_per_turn')),
-                'resource_per_field': int(elem.get_attribute('resource_per_field')),
-                'resource_per_turn': int(elem.get_attribute('resource_per_turn')),
-                'sight_range': int(elem.get_attribute('sight_range')),
-                'food_consumption': int(elem.get_attribute('food_consumption')),
-                'construction_time': int(elem.get_attribute('construction_time')),
-                'defensive_value': int(elem.get_attribute('defensive_value')),
-                'flag_x': int(elem.get_attribute('flag_x')),
-                'flag_y': int(elem.get_attribute('flag_y')),
-                'grant_pop': int(elem.get_attribute('grant_pop')),
-                'description': elem.cdata}
+        for code, info in self.data['buildings']:
+            building_info[BuildingType.get_type_from_strcode(code)] = dict(info)
 
     def read_player_info(self, player_info: [(str, {})]):
-        for elem in self.xml_parser.game.players.children:
-            player_info.append((elem.cdata,
+        for name, info in self.data['players']:
+            player_info.append((name, dict(info)))
+
+    def read_unit_info(self, unit_info: Dict[UnitType, Dict[str, Any]]):
+        for code, info in self.data['units']:
+            unit_info[UnitType.get_type_from_strcode(code)] = dict(info)
+
+    def __compile(self) -> Dict[str, Any]:
+        """reads all sections of the xml file. A file may contain only some of the sections, reading a missing one
+        fails"""
+        game = self.xml_parser.game
+        sections = {elem._name for elem in game.children}
+        data = {}
+        if 'textures' in sections:
+            data['textures'] = {elem.get_attribute('code'): (elem.cdata,
+                                                             int(elem.get_attribute('offsetX')),
+                                                             int(elem.get_attribute('offsetY')),
+                                                             float(elem.get_attribute('scale')))
+                                for elem in game.textures.children}
+        if 'map' in sections:
+            row_wise: [str] = game.map.cdata.strip().splitlines()
+            row_wise.reverse()
+            data['map'] = GameFileReader.__to_grid([row.split() for row in row_wise])
+        if 'map_obj' in sections:
+            row_wise: [str] = game.map_obj.cdata.strip().splitlines()
+            row_wise.reverse()
+            obj_codes: List[str] = []
+            objs = []
+            for y in range(len(row_wise)):
+                s_split = row_wise[y].split()
+                for x in range(len(s_split)):
+                    if s_split[x] != "--":
+                        if s_split[x] not in obj_codes:
+                            obj_codes.append(s_split[x])
+                        objs.append((obj_codes.index(s_split[x]), x, y))
+            data['map_obj'] = (obj_codes, np.array(objs, dtype=np.int32).reshape(-1, 3))
+        if 'resources' in sections:
+            data['resources'] = [(elem.get_attribute('code'), {'amount': int(elem.get_attribute('amount'))})
+                                 for elem in game.resources.children]
+        if 'buildings' in sections:
+            data['buildings'] = [(elem.get_attribute('code'),
+                                  {'tex_code': elem.get_attribute('code'),
+                                   'construction_cost': int(elem.get_attribute('construction_cost')),
+                                   'culture_per_turn': int(elem.get_attribute('culture_per_turn')),
+                                   'resource_per_field': int(elem.get_attribute('resource_per_field')),
+                                   'resource_per_turn': int(elem.get_attribute('resource_per_turn')),
+                                   'sight_range': int(elem.get_attribute('sight_range')),
+                                   'food_consumption': int(elem.get_attribute('food_consumption')),
+                                   'construction_time': int(elem.get_attribute('construction_time')),
+                                   'defensive_value': int(elem.get_attribute('defensive_value')),
+                                   'flag_x': int(elem.get_attribute('flag_x')),
+                                   'flag_y': int(elem.get_attribute('flag_y')),
+                                   'grant_pop': int(elem.get_attribute('grant_pop')),
+                                   'description': elem.cdata})
+                                 for elem in game.buildings.children]
+        if 'players' in sections:
+            data['players'] = [(elem.cdata,
                                 {'colour' : elem.get_attribute('colour'),
                                  'spawn_x': int(elem.get_attribute('spawn_x')),
                                  'spawn_y': int(elem.get_attribute('spawn_y')),
                                  'ai'     : elem.get_attribute('ai'),
                                  'army_rel_to_spawn_x': int(elem.get_attribute('army_rel_to_spawn_x')),
-                                 'army_rel_to_spawn_y': int(elem.get_attribute('army_rel_to_spawn_y'))}))
+                                 'army_rel_to_spawn_y': int(elem.get_attribute('army_rel_to_spawn_y'))})
+                               for elem in game.players.children]
+        if 'units' in sections:
+            data['units'] = [(elem.get_attribute('code'),
+                              {'attack': int(elem.get_attribute('attack')),
+                               'defence': int(elem.get_attribute('defence')),
+                               'name': elem.get_attribute('name'),
+                               'population': int(elem.get_attribute('population')),
+                               'cost_resource': int(elem.get_attribute('cost_resource')),
+                               'cost_culture': int(elem.get_attribute('cost_culture')),
+                               'description': elem.cdata})
+                             for elem in game.units.children]
+        return data
 
-    def read_unit_info(self, unit_info: Dict[UnitType, Dict[str, Any]]):
-        for elem in self.xml_parser.game.units.children:
-            unit_info[UnitType.get_type_from_strcode(elem.get_attribute('code'))] = {
-                'attack': int(elem.get_attribute('attack')),
-                'defence': int(elem.get_attribute('defence')),
-                'name': elem.get_attribute('name'),
-                'population': int(elem.get_attribute('population')),
-                'cost_resource': int(elem.get_attribute('cost_resource')),
-                'cost_culture': int(elem.get_attribute('cost_culture')),
-                'description': elem.cdata}
+    @staticmethod
+    def __to_grid(rows: [[str]]) -> (List[str], List[np.ndarray]):
+        """the codes of the map and per row an array of indices into the codes (rows may differ in length)"""
+        codes = sorted({code for row in rows for code in row})
+        index = {code: i for i, code in enumerate(codes)}
+        return codes, [np.array([index[code] for code in row], dtype=np.uint16) for row in rows]
+
+    @staticmethod
+    def __compiled_file(xml_game_data: str) -> str:
+        with open(xml_game_data, "rb") as f:
+            digest = hashlib.sha1(f.read())
+        digest.update(str(GameFileReader.FORMAT_VERSION).encode())
+        return os.path.join(Definitions.SCENARIO_CACHE_PATH, digest.hexdigest() + ".pickle")
 
+    def __load_compiled(self, xml_game_data: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(GameFileReader.__compiled_file(xml_game_data), "rb") as f:
+                return pickle.load(f)
+        except OSError:
+            return None
+        except Exception as e:      # the cache is only an optimisation, e.g. it may be written by another numpy
+            hint("GameFileReader: unable to load the compiled game file, %s is parsed again: %r", xml_game_data, e)
+            return None
 
+    def __save_compiled(self, xml_game_data: str, data: Dict[str, Any]):
+        try:
+            os.makedirs(Definitions.SCENARIO_CACHE_PATH, exist_ok=True)
+            file = GameFileReader.__compiled_file(xml_game_data)
+            tmp_file = f"{file}.{os.getpid()}.tmp"
+            with open(tmp_file, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, file)          # other processes (e.g. of a tournament) never read half a file
+            hint(f"GameFileReader: compiled {xml_game_data}")
+        except OSError as e:
+            hint(f"GameFileReader: unable to store the compiled game file: {e}")
@@ -1,46 +1,72 @@
-import threading
+from __future__ import annotations
+
+import pickle
+import random
 import timeit
-from typing import Optional, List, Set, Dict
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, List, Set, Dict, Tuple, TYPE_CHECKING
+
+import numpy as np
 
 from src.ai.AI_GameStatus import AI_GameStatus, AI_Move, AI_GameInterface
-from src.game_accessoires import Scenario, Ground, Resource, Drawable, Flag
+from src.game_accessoires import Scenario, Ground, Resource, Drawable
 from src.game_file_reader import GameFileReader
-from src.hex_map import HexMap, MapStyle
+from src.hex_map import HexMap, MapStyle, HexagonSet
 from src.misc.animation import Animator
 from src.misc.game_constants import *
 from src.misc.game_logic_misc import *
+from src.misc.replay import Replay, ReplayInteraction, ReplayRecorder
 from src.misc.trade_hub import TradeHub
-from src.texture_store import TextureStore
-from src.ui.extern.extern_ai_display import AIControl
+
+if TYPE_CHECKING:
+    import arcade
+    from src.ai.AI_MapRepresentation import Map
+    from src.misc.sprites import Flag
+    from src.texture_store import TextureStore
+    from src.ui.extern.extern_ai_display import AIControl
+    from src.ui.human import HumanInteraction
 
 
 # from threading import Thread
 
 
 class GameLogic:
-    def __init__(self, game_xml_file: str, z_levels: [arcade.SpriteList]):
-        self.texture_store: TextureStore = TextureStore.instance()
+    PASSABLE_GROUND = (GroundType.GRASS.value, GroundType.STONE.value, GroundType.MIXED.value)
+
+    def __init__(self, game_xml_file: str, z_levels: Optional[List[arcade.SpriteList]], seed: Optional[int] = None):
+        """all random numbers of the game (the map and the AIs) are drawn from streams derived from the seed, such
+        that the game can be reproduced (see record and fast_forward). By default, the seed is random"""
+        self.seed: int = seed if seed is not None else random.getrandbits(32)
+        self.random: random.Random = random.Random(f"{self.seed}/game")
+        self.game_xml_file: str = game_xml_file
+        self.texture_store: Optional[TextureStore] = None
         self.game_file_reader: GameFileReader = GameFileReader(game_xml_file)
-        self.z_levels: [arcade.SpriteList] = z_levels               # reference to the sprite lists
+        self.z_levels: Optional[List[arcade.SpriteList]] = z_levels       # reference to the sprite lists
         self.hex_map: Optional[HexMap] = None
-        from src.ui.human import HumanInteraction
         self.human_interface: Optional[HumanInteraction] = None
         self.ai_interface: AI_GameInterface = AI_GameInterface()
+        self.__ai_executor: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AI")
+        self.__ai_move: Optional[Future] = None        # the move of the current (AI) player, once it is done
+        # the speculative move of the next AI player: (player id, expected game status (pickled), move)
+        self.__speculation: Optional[Tuple[int, bytes, Future]] = None
+        self.speculations_used: int = 0
+        self.speculations_discarded: int = 0
+        self.recorder: Optional[ReplayRecorder] = None
+        self.__replay: Optional[Replay] = None         # while fast-forwarding
         self.scenario: Scenario = Scenario()
         self.income_calc: IncomeCalculator = IncomeCalculator(self.hex_map, self.scenario)
         self.animator: Animator = Animator()
         self.trade_hub: TradeHub = TradeHub()
-
-        tex_dict = {}
-        self.game_file_reader.read_textures_to_dict(tex_dict)
-        self.texture_store.load_textures(tex_dict)
-
-        self.__camera_pos: (int, int) = (0, 0)
+        # persistent AI map per player id and the masks (of the hex map) it has been updated from last time
+        self.__ai_maps: Dict[int, Tuple[Map, Dict[str, np.ndarray]]] = {}
 
         self.player_list: [Player] = []
         self.map_view: [bool] = []              # true if we show the players view, otherwise false
         self.change_in_map_view = MAP_HACK_ENABLE_AT_STARTUP
         self.map_hack = MAP_HACK_ENABLE_AT_STARTUP
+        self.__shown_tiles: Optional[HexagonSet] = None     # tiles which are not covered by the fog of war
+        self.__claimed: Optional[np.ndarray] = None     # per tile: number of buildings which have it associated
         self.winner: Optional[Player] = None
 
         # read game data
@@ -66,11 +92,7 @@ class GameLogic:
             self.map_view.append(False)
             pid = pid + 1
 
-        # load textures which depend on player
-        for p in self.player_list:
-            c = p.colour_code
-            self.texture_store.load_animated_texture("{}_flag".format(c), 10, lambda i: (0, 100 * i), 108, 100,
-                                                     "../resources/objects/animated/flag_100_sprite_{}.png".format(c))
+        self._load_textures()
 
         # self.ai_running = False
         # game status
@@ -101,6 +123,9 @@ class GameLogic:
         # setup hex map
         self.hex_map = HexMap((len(map_data[0]), len(map_data)), MapStyle.S_V_C)
         self.income_calc.hex_map = self.hex_map         # TODO make sure to set the hex_map everywhere. Ugly!
+        for player in self.player_list:
+            player.discovered_tiles = HexagonSet(self.hex_map)
+        self.__shown_tiles = HexagonSet(self.hex_map)
 
         #TODO do this somewhere else
 
@@ -110,7 +135,7 @@ class GameLogic:
         # for x in range(6):
         #     for y in range(5):
         #         d = Drawable()
-        #         d.set_sprite_pos((x_off * x + 100, y_off * y), self.__camera_pos)
+        #         d.set_sprite_pos((x_off * x + 100, y_off * y))
         #         self.__set_sprite(d, "ocean")
         #         self.z_levels[0].append(d.sprite)
 
@@ -120,25 +145,23 @@ class GameLogic:
                 hex: Hexagon = self.hex_map.get_hex_by_offset((x, y))
                 ground: Ground = Ground(map_data[y][x])
                 hex.ground = ground
-                ground.set_sprite_pos(HexMap.offset_to_pixel_coords((x, y)), self.__camera_pos)
-                ground.add_texture(self.texture_store.get_texture("fw"))
                 ground.tex_code = map_data[y][x]
-                self.z_levels[Z_MAP].append(ground.sprite)
+                self._draw_ground(ground, (x, y))
 
         from src.misc.smooth_map import SmoothMap
         SmoothMap.smooth_map(self.hex_map)
         #SmoothMap.adjust_elevation(self.hex_map)
+        self.__reset_map_state()            # from now on, the objects maintain the state of their tiles
 
         # assign textures
         for hexagon in self.hex_map.map:
-            self.__set_sprite(hexagon.ground, hexagon.ground.tex_code)
+            self._set_sprite(hexagon.ground, hexagon.ground.tex_code)
 
         for map_obj in map_obj_data:
             hex: Hexagon = self.hex_map.get_hex_by_offset((map_obj[1], map_obj[2]))
             if map_obj[0] == "f2":
                 # get str_code with variance
-                import random
-                var = random.randint(0, 6)
+                var = self.random.randint(0, 6)
                 r: Resource = Resource(hex, ResourceType.FOREST)
                 r.tex_code = "forest_3_var{}".format(var)
                 self.add_resource(r)
@@ -153,7 +176,8 @@ class GameLogic:
             for p in self.player_list:
                 if p != player:
                     other_players_ids.append(p.id)
-            self.ai_interface.launch_AI(player.id, player.ai_str, "AI_" + player.name, other_players_ids)
+            self.ai_interface.launch_AI(player.id, player.ai_str, "AI_" + player.name, other_players_ids,
+                                        f"{self.seed}/ai/{player.id}")
             base_hex: Hexagon = self.hex_map.get_hex_by_offset(player.spaw_loc)
             InitialCondition.set_init_values(player, base_hex, self)
             # b_type = player.get_initial_building_type()
@@ -172,8 +196,7 @@ class GameLogic:
             #     self.add_army(army, player)
             player_ids.append((player.id, player.colour_code))
 
-        self.__reorder_spritelist(self.z_levels[Z_GAME_OBJ])
-        self.toggle_fog_of_war_lw(self.hex_map.map)
+        self.toggle_fog_of_war_lw()
 
         from src.ai.performance import PerformanceLogger
         PerformanceLogger.setup(player_ids)
@@ -184,6 +207,36 @@ class GameLogic:
             self.playNextTurn = True
             self.nextPlayerButtonPressed = True
 
+    def record(self, file: str):
+        """records the moves of the game from now on to a replay file"""
+        self.recorder = ReplayRecorder(file, self.game_xml_file, self.seed)
+
+    def fast_forward(self, replay: Replay, turn_nr: int):
+        """plays the recorded moves up to the beginning of the turn turn_nr at once (without animations and
+        without waiting for the clock), afterwards the game continues as usual. The game has to be set up with the
+        seed of the replay. The AIs compute their moves anyway, such that they are in the same state as in the
+        recorded game, but the recorded moves are played. The last recorded turn is played live, as it might be
+        incomplete (e.g. if the game has crashed)"""
+        turn_nr = min(turn_nr, replay.last_turn)
+        human_interface = self.human_interface
+        self.human_interface = ReplayInteraction(replay)
+        self.__replay = replay
+        try:
+            while self.winner is None and self.turn_nr < turn_nr:
+                self.handle_turn(block=True)
+        finally:
+            self.__replay = None
+            self.human_interface = human_interface
+
+    def __replayed_move(self, player: Player, ai_move: Optional[AI_Move]) -> Optional[AI_Move]:
+        """while fast-forwarding, the recorded move is played, even if the AI has decided differently (e.g. if its
+        code has changed or if it has missed the deadline in the recorded game)"""
+        recorded = self.__replay.next_move(self.turn_nr, player.id)
+        if not Replay.is_same_move(ai_move, recorded):
+            hint("turn %s: %s has decided differently than in the replay, the recorded move is played",
+                 self.turn_nr, player.name)
+        return recorded
+
     def set_ai_ctrl_frame(self, ai_ctrl_frame: Optional[AIControl]):
         self.ai_ctrl_frame = ai_ctrl_frame
 
@@ -207,6 +260,8 @@ class GameLogic:
             self.handle_turn()
             #t2 = timeit.default_timer()
             #debug(f"update loop took: {(t2 - t1):.6} s [{orig_state}]")
+        elif Definitions.SPECULATIVE_AI:
+            self.speculate_next_turn()
         # ----------------------------------------
         # t99 = timeit.default_timer()
         if self.show_key_frame_animation:
@@ -215,10 +270,10 @@ class GameLogic:
         # t100 = timeit.default_timer()
         if self.change_in_map_view:
             t1 = timeit.default_timer()
-            self.toggle_fog_of_war_lw(self.hex_map.map, show_update_bar=True)
+            self.toggle_fog_of_war_lw(show_update_bar=True)
             self.change_in_map_view = False
             t2 = timeit.default_timer()
-            debug(f"change map view routine took: {(t2 - t1) :.6} s")
+            debug("change map view routine took: %.6f s", t2 - t1)
         # t101 = timeit.default_timer()
         self.animator.update(wall_clock_time)
         self.total_time = timestamp_start - timeit.default_timer()
@@ -226,8 +281,9 @@ class GameLogic:
         # if t102 - t97 > 0.1:
         #     print(f"1:{t98 - t97}, 2:{t99 - t98}, 3:{t100 - t99}, 4:{t101 - t100}, 5:{t102- t101}")
 
-    def handle_turn(self):
-        """handles the turn for a player (human, ai or npc), extends the main update loop"""
+    def handle_turn(self, block: bool = False):
+        """handles the turn for a player (human, ai or npc), extends the main update loop.
+        If block is set, it waits for the move of an AI instead of returning (to be called again next frame)"""
 
         if self.logic_state is GameLogicState.NOT_READY:
             error(f"game logic not ready, logic state: {self.logic_state}")
@@ -246,6 +302,7 @@ class GameLogic:
                 self.play_players_turn(player)
                 self.logic_state = GameLogicState.WAITING_FOR_AGENT
                 self.nextPlayerButtonPressed = False
+                self.__speculate_during_turn()
 
             elif self.logic_state is GameLogicState.WAITING_FOR_AGENT:
                 h_move = self.human_interface.get_partial_move()
@@ -254,6 +311,7 @@ class GameLogic:
                     new_ai_stat = AI_GameStatus()
                     self.construct_game_status(player, new_ai_stat)
                     self.human_interface.update_game_status(new_ai_stat)
+                    self.__speculate_during_turn()
 
                 if self.human_interface.is_move_complete() or self.nextPlayerButtonPressed:
                     self.logic_state = GameLogicState.TURN_COMPLETE
@@ -262,10 +320,13 @@ class GameLogic:
                 self.play_players_turn(player)
                 self.logic_state = GameLogicState.WAITING_FOR_AGENT
 
-            elif self.logic_state is GameLogicState.WAITING_FOR_AGENT:
-                if self.ai_interface.has_finished():
+            # the move may be done already (e.g. headless), then the turn is completed in this call
+            if self.logic_state is GameLogicState.WAITING_FOR_AGENT:
+                if block or self.__ai_move is None or self.__ai_move.done():
 
-                    ai_move = self.ai_interface.ref_to_move
+                    ai_move = self.__take_ai_move()
+                    if self.__replay is not None:
+                        ai_move = self.__replayed_move(player, ai_move)
 
                     # debug("AI took {} ms".format(self.ai_interface.get_ai_execution_time()))
                     if ai_move:  # player might have lost
@@ -279,6 +340,8 @@ class GameLogic:
 
         if self.logic_state is GameLogicState.TURN_COMPLETE:
             self.nextPlayerButtonPressed = False
+            if self.recorder is not None:
+                self.recorder.flush()
             if self.current_player == 0:  # next time player 0 plays -> new turn
                 self.turn_nr = self.turn_nr + 1
                 self.trade_hub.next_turn(self.player_list)
@@ -290,15 +353,103 @@ class GameLogic:
             # hint("                              SUCCESSFULLY PLAYED TURN")
             self.logic_state = GameLogicState.READY_FOR_TURN
 
-    def spawn_ai_thread(self, player):
+    def compute_ai_move(self, player: Player) -> AI_Move:
+        """creates the game status for the AI and lets it compute its move (in its worker process, if
+        Definitions.AI_WORKER_PROCESSES)"""
         ai_game_status = AI_GameStatus()
-        ai_move = AI_Move()
         self.construct_game_status(player, ai_game_status)
-        self.ai_interface.do_a_move(ai_game_status, ai_move, player.id)
+        speculation, self.__speculation = self.__speculation, None
+        if speculation is not None and speculation[0] == player.id:
+            ai_move = self.__use_speculation(speculation, ai_game_status)
+            if ai_move is not None:
+                return ai_move
+        return self.ai_interface.do_a_move(ai_game_status, player.id)
+
+    def speculate_next_turn(self):
+        """while the game waits for the next turn (clock, animations), the next player (if it is an AI) computes its
+        move in advance"""
+        player = self.player_list[self.current_player]
+        if self.logic_state is GameLogicState.READY_FOR_TURN and \
+                (self.__speculation is None or self.__speculation[0] != player.id):
+            self.__speculate(player, turn_ends=False)
+
+    def __speculate_during_turn(self):
+        """while the (human) player decides, the next player (if it is an AI) computes its move"""
+        next_player = self.player_list[(self.current_player + 1) % len(self.player_list)]
+        self.__speculate(next_player, turn_ends=self.current_player == 0)   # see TURN_COMPLETE in handle_turn
+
+    def __speculate(self, player: Player, turn_ends: bool):
+        """if Definitions.SPECULATIVE_AI: the AI computes its move in advance (in the AI thread, on a copy of the
+        AI), for the game status it expects at the beginning of its turn. The move is used if the game status turns
+        out to be the same (see compute_ai_move). turn_ends is true, if a new turn (turn_nr) begins before"""
+        if not Definitions.SPECULATIVE_AI or player.player_type is PlayerType.HUMAN or player.has_lost:
+            return
+        if self.__speculation is not None and not self.__speculation[2].done():
+            return              # the AI thread is still busy with the last one, it will be compared anyway
+        expected = self.__expected_game_status(player, turn_ends)
+        if expected is None:
+            self.__speculation = None
+        elif self.__speculation is None or self.__speculation[:2] != (player.id, expected):
+            ai_game_status = pickle.loads(expected)         # a copy of its own for the AI
+            self.__speculation = (player.id, expected,
+                                  self.__ai_executor.submit(self.ai_interface.speculate_move, ai_game_status, player.id))
+
+    def __expected_game_status(self, player: Player, turn_ends: bool) -> Optional[bytes]:
+        """the game status (pickled) of the player at the beginning of its turn (see play_players_turn), if nothing
+        happens until then. None if this is not predictable cheaply (if resources are depleted, buildings are
+        destroyed or trades expire) or if the player will lose. The game state is not changed"""
+        if any(res.remaining_amount <= 0 for res in self.scenario.resource_list):
+            return None
+        if any(b.building_state == BuildingState.DESTROYED for b in player.buildings):
+            return None
+        if turn_ends and any(trade.life_time <= 1 for trade in self.trade_hub.trades.values()):
+            return None
+        buildings = [(b, b.building_state, b.construction_time) for b in player.buildings]
+        properties = (player.income, player.amount_of_resources, player.food, player.culture)
+        resources = [(res, res.remaining_amount) for res in self.scenario.resource_list]   # harvested by the income
+        turn_nr = self.turn_nr
+        try:
+            for b in player.buildings:      # as in update_player_properties, but without changing the textures
+                if b.building_state == BuildingState.UNDER_CONSTRUCTION:
+                    if b.construction_time == 0:
+                        b.building_state = BuildingState.ACTIVE
+                    else:
+                        b.construction_time = b.construction_time - 1
+            self.__collect_income(player)
+            if self.check_lose_condition(player):
+                return None
+            if turn_ends:
+                self.turn_nr = turn_nr + 1
+            ai_game_status = AI_GameStatus()
+            self.construct_game_status(player, ai_game_status, speculative=True)
+            return pickle.dumps(ai_game_status, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            for b, building_state, construction_time in buildings:
+                b.building_state = building_state
+                b.construction_time = construction_time
+            player.income, player.amount_of_resources, player.food, player.culture = properties
+            for res, remaining_amount in resources:
+                res.remaining_amount = remaining_amount
+            self.turn_nr = turn_nr
+
+    def __use_speculation(self, speculation: Tuple[int, bytes, Future],
+                          ai_game_status: AI_GameStatus) -> Optional[AI_Move]:
+        """the speculative move, if it has been computed for the same game status"""
+        player_id, expected, future = speculation
+        if future.exception() is not None or future.result() is None:
+            return None
+        if pickle.dumps(ai_game_status, protocol=pickle.HIGHEST_PROTOCOL) != expected:
+            debug("speculative move of player %s is discarded, the game status has changed", player_id)
+            self.speculations_discarded = self.speculations_discarded + 1
+            return None
+        self.ai_interface.commit_speculation(ai_game_status, player_id)
+        self.speculations_used = self.speculations_used + 1
+        return future.result()
 
     def play_players_turn(self, player: Player):
         """wrapper function, extends the main update loop"""
         # debug(f"Play move of player {player.name} [pid: {player.id}]")
+        self.__ai_move = None
         self.updata_map()
         if self.check_win_condition(player):
             self.winner = player
@@ -313,8 +464,7 @@ class GameLogic:
             ai_move = AI_Move()
             self.human_interface.request_move(ai_game_status, ai_move, player.id)
         else:
-            ai_worker = threading.Thread(target=self.spawn_ai_thread, args=(player, ))
-            ai_worker.start()
+            self._start_ai_worker(player)
 
         # ai_game_status = AI_GameStatus()
         # self.construct_game_status(player, ai_game_status)
@@ -325,6 +475,32 @@ class GameLogic:
         # else:
         #     self.ai_interface.do_a_move(ai_game_status, ai_move, player.id)
 
+    def _start_ai_worker(self, player: Player):
+        """the AI computes its move in a separate thread, handle_turn takes it once the future is done"""
+        self.__ai_move = self.__ai_executor.submit(self.compute_ai_move, player)
+
+    def __take_ai_move(self) -> Optional[AI_Move]:
+        future, self.__ai_move = self.__ai_move, None
+        if future is None:
+            return None
+        try:
+            return future.result()
+        except Exception:
+            error("the AI has failed to compute its move: %s", traceback.format_exc())
+            return None
+
+    def _set_ai_move(self, ai_move: AI_Move):
+        """sets the move of the current player as done (for subclasses which compute it without thread)"""
+        self.__ai_move = Future()
+        self.__ai_move.set_result(ai_move)
+
+    def shutdown(self):
+        """stops the thread and the worker processes of the AIs"""
+        self.__ai_executor.shutdown(wait=False)
+        self.ai_interface.shutdown()
+        if self.recorder is not None:
+            self.recorder.close()
+
     def update_player_properties(self, player):
         """calculate income, new culture level, food, etc."""
         # continue build buildings
@@ -337,46 +513,34 @@ class GameLogic:
             if b.building_state == BuildingState.DESTROYED:
                 self.del_building(b, player)
 
+        self.__collect_income(player)
+
+    def __collect_income(self, player: Player):
         player.income = self.income_calc.calculate_income(player)
         player.amount_of_resources = player.amount_of_resources + player.income
         player.food = player.food + self.income_calc.calculate_food(player)
         player.culture = player.culture + self.income_calc.calculate_culture(player)
 
-    def construct_game_status(self, player: Player, ai_game_status: AI_GameStatus):
-        """constructs an object, which holds the current view of the game out of a players perspective"""
+    def construct_game_status(self, player: Player, ai_game_status: AI_GameStatus, speculative: bool = False):
+        """constructs an object, which holds the current view of the game out of a players perspective.
+        If speculative, the attacks on the player are kept for its actual game status"""
 
         # tiles = self.get_all_at_once(player)
         # scoutable_tiles_1 = tiles[0]
         # buildable_tiles_1 = tiles[1]
         # walkable_tiles_1 = tiles[2]
 
-        scoutable_tiles = self.get_scoutable_tiles(player)
-        buildable_tiles = self.get_buildable_tiles(player)
-        walkable_tiles = self.get_walkable_tiles(player)
-        known_resources = self.get_known_resources(player)
-        enemy_buildings = self.get_enemy_buildings(player, scoutable_tiles)  # tuple set((bld, owner_id))
-        enemy_armies = self.get_enemy_armies(player)        # tuple set((army, owner_id))
-
-        # build the map representation for the AI
-        # all tiles is the union of scoutable and known tiles
-        from src.ai.AI_MapRepresentation import Map
-        ai_map: Map = Map()
-        for s in scoutable_tiles:
-            ai_map.add_tile(s.offset_coordinates, s.ground.ground_type)
-        for s in player.discovered_tiles:
-            ai_map.add_tile(s.offset_coordinates, s.ground.ground_type)
-        ai_map.connect_graph()
-
-        # TODO speed up (iterate only once over the map) by doing the scoutables, one can get all others "for free"
-        for h in scoutable_tiles:
-            ai_map.set_scoutable_tile(h.offset_coordinates)
-        for h in walkable_tiles:
-            ai_map.set_walkable_tile(h.offset_coordinates)
-        for h in buildable_tiles:
-            ai_map.set_buildable_tile(h.offset_coordinates)
-        for h in player.discovered_tiles:
-            ai_map.set_discovered_tile(h.offset_coordinates)
-
+        discovered = player.discovered_tiles.mask.copy()         # the AI map keeps the masks until the next turn
+        masks: Dict[str, np.ndarray] = {"scoutable": self.get_scoutable_mask(player, discovered),
+                                        "walkable": self.get_walkable_mask(player, discovered),
+                                        "buildable": self.get_buildable_mask(player, discovered),
+                                        "discovered": discovered}
+        known_resources = self.get_known_resources(player, discovered)
+        enemy_buildings = self.get_enemy_buildings(player, masks["scoutable"] | discovered)  # [(bld, owner_id)]
+        enemy_armies = self.get_enemy_armies(player, discovered)        # [(army, owner_id)]
+
+        # the map representation of the AI is kept from one turn to the next and only the changes are applied
+        ai_map = self.__update_ai_map(player, masks)
         for r in known_resources:
             ai_map.add_resource(r.tile.offset_coordinates, r)
         for b in player.buildings:
@@ -415,7 +579,38 @@ class GameLogic:
 
         AI_GameInterface.create_ai_status(ai_game_status, self.turn_nr, scout_cost,
                                           ai_map, me, opponents, b_costs, u_costs, trades)
-        player.attacked_set.clear()
+        if not speculative:
+            player.attacked_set.clear()
+
+    def __update_ai_map(self, player: Player, masks: Dict[str, np.ndarray]) -> Map:
+        """
+        updates the AI map of the player with the changes since its last game status: tiles which have been
+        discovered (or are no longer scoutable) and changed tile lists. The objects (resources, buildings and armies)
+        are few, they are added again every time
+        """
+        from src.ai.AI_MapRepresentation import Map
+        if player.id not in self.__ai_maps:
+            empty = np.zeros(len(self.hex_map.map), dtype=bool)
+            self.__ai_maps[player.id] = (Map(), {name: empty for name in masks})
+        ai_map, prev_masks = self.__ai_maps[player.id]
+        ai_map.clear_objects()
+
+        # all tiles is the union of scoutable and known tiles
+        in_map = masks["scoutable"] | masks["discovered"]
+        prev_in_map = prev_masks["scoutable"] | prev_masks["discovered"]
+        added = []
+        for h in self.hex_map.get_hexagons(np.flatnonzero(in_map & ~prev_in_map)):
+            ai_map.add_tile(h.offset_coordinates, h.ground.ground_type)
+            added.append(ai_map.get_tile(h.offset_coordinates))
+        ai_map.connect_tiles(added)
+        for name, mask in masks.items():
+            if not np.array_equal(mask, prev_masks[name]):
+                ai_map.set_tiles(name, (h.offset_coordinates for h in self.hex_map.get_hexagons(np.flatnonzero(mask))))
+        for h in self.hex_map.get_hexagons(np.flatnonzero(prev_in_map & ~in_map)):
+            ai_map.remove_tile(h.offset_coordinates)
+
+        self.__ai_maps[player.id] = (ai_map, masks)
+        return ai_map
 
     def destroy_player(self, player):
         """cleans up the board, if a player has lost"""
@@ -429,49 +624,81 @@ class GameLogic:
         PerformanceLogger.log_performance_file(self.turn_nr, player.id, 0)
 
     def updata_map(self):
-        """this function makes sure that the map remains well defined"""
-        for hex in self.hex_map.map:
-            if hex.ground.ground_type == GroundType.OTHER:
-                error("Unknown ground type is a problem! {}".format(hex.offset_coordinates))
-            if hex.ground.ground_type == GroundType.GRASS or\
-                    hex.ground.ground_type == GroundType.STONE or\
-                    hex.ground.ground_type == GroundType.MIXED:
-                hex.ground.walkable = True
-                hex.ground.buildable = True
-            elif hex.ground.ground_type == GroundType.WATER_DEEP:
-                hex.ground.walkable = False
-                hex.ground.buildable = False
-            else:
-                hint("GameLogic cannot update map! Unknown ground type")
+        """this function makes sure that the map remains well defined. The flags of the tiles are maintained by the
+        methods which change the map (see __update_tile_state), only depleted resources are removed here"""
+        for res in list(self.scenario.resource_list):
+            if res.remaining_amount <= 0:
+                self.del_resource(res)
 
+        for p in self.player_list:
+            for a in p.armies:
+                pix_loc = HexMap.offset_to_pixel_coords(a.tile.offset_coordinates)
+                a.set_sprite_pos(pix_loc)
+
+        if Definitions.CHECK_MAP_STATE:
+            self.check_map_state()
+
+    def check_map_state(self) -> bool:
+        """compares the incrementally maintained state of the map with a full recomputation"""
+        is_consistent = True
+        for name, expected in self.__compute_map_state().items():
+            actual = getattr(self.hex_map, name)
+            for i in np.flatnonzero(actual != expected):
+                error(f"Map state: {name} of {self.hex_map.map[i].offset_coordinates} is {actual[i]}, "
+                      f"expected {expected[i]}")
+                is_consistent = False
+        return is_consistent
+
+    def __compute_map_state(self) -> Dict[str, np.ndarray]:
+        """computes the flags of all tiles from the ground and the objects on the map"""
+        hm = self.hex_map
+        walkable = np.isin(hm.ground_type, GameLogic.PASSABLE_GROUND)
+        buildable = walkable.copy()
+        owner = np.full(len(hm.map), -1, dtype=hm.owner.dtype)
+        resource = np.full(len(hm.map), -1, dtype=hm.resource.dtype)
         for player in self.player_list:
             for building in player.buildings:
                 for ass in building.associated_tiles:
-                    ass.ground.buildable = False
-                building.tile.ground.buildable = False
+                    buildable[ass.index] = False
+                buildable[building.tile.index] = False
+                owner[building.tile.index] = player.id
                 if building.building_state == BuildingState.UNDER_CONSTRUCTION or \
                         building.building_state == BuildingState.ACTIVE:
-                    building.tile.ground.walkable = False
-            # self.update_fog_of_war(player)
-
+                    walkable[building.tile.index] = False
         for res in self.scenario.resource_list:
-            if res.remaining_amount <= 0:
-                self.del_resource(res)
-                continue
-            res.tile.ground.walkable = False
-            res.tile.ground.buildable = False
-
-        for p in self.player_list:
-            for a in p.armies:
-                pix_loc = HexMap.offset_to_pixel_coords(a.tile.offset_coordinates)
-                a.set_sprite_pos(pix_loc, self.__camera_pos)
-
-        # This is a bit of brute force approach and not really necessary. However, animations made it hard
-        # to track when updates are necessary, however the method is still very fast
-        self.__reorder_spritelist(self.z_levels[Z_GAME_OBJ])
+            walkable[res.tile.index] = False
+            buildable[res.tile.index] = False
+            resource[res.tile.index] = res.resource_type.value
+        return {"walkable": walkable, "buildable": buildable, "owner": owner, "resource": resource}
+
+    def __reset_map_state(self):
+        hm = self.hex_map
+        for i in np.flatnonzero(hm.ground_type == GroundType.OTHER.value):
+            error("Unknown ground type is a problem! {}".format(hm.map[i].offset_coordinates))
+        if not np.all(np.isin(hm.ground_type, GameLogic.PASSABLE_GROUND) |
+                      (hm.ground_type == GroundType.WATER_DEEP.value)):
+            hint("GameLogic cannot update map! Unknown ground type")
+        self.__claimed = np.zeros(len(hm.map), dtype=np.int16)
+        for name, values in self.__compute_map_state().items():
+            getattr(hm, name)[:] = values
+
+    def __update_tile_state(self, hex: Hexagon):
+        """recomputes the flags of a single tile, after an object on it has changed"""
+        hm = self.hex_map
+        i = hex.index
+        res = self.scenario.occupancy.resources.get(i)
+        occupant = self.scenario.occupancy.buildings.get(i)
+        passable = hm.ground_type[i] in GameLogic.PASSABLE_GROUND
+        blocks = occupant is not None and (occupant[0].building_state == BuildingState.UNDER_CONSTRUCTION or
+                                           occupant[0].building_state == BuildingState.ACTIVE)
+        hm.walkable[i] = passable and res is None and not blocks
+        hm.buildable[i] = passable and res is None and occupant is None and self.__claimed[i] == 0
+        hm.owner[i] = occupant[1].id if occupant is not None else -1
+        hm.resource[i] = res.resource_type.value if res is not None else -1
 
     def exec_ai_move(self, ai_move: AI_Move, player: Player):
-
+        if self.recorder is not None:
+            self.recorder.record(self.turn_nr, player.id, ai_move)
         self.__check_validity(ai_move)
         for d in self.hex_map.map:
             d.debug_msg = ""
@@ -488,7 +715,7 @@ class GameLogic:
 
         if ai_move.move_type == MoveType.DO_RAISE_ARMY:
             if len(player.armies) == 0:
-                hint(f"spawning army at {ai_move.loc}")
+                hint("spawning army at %s", ai_move.loc)
                 base_hex = self.hex_map.get_hex_by_offset(ai_move.loc)
                 army = Army(base_hex, player.id)
                 self.add_army(army, player)
@@ -500,11 +727,11 @@ class GameLogic:
                 t_u = ai_move.type
                 cost = Unit.get_unit_cost(t_u)
                 if player.amount_of_resources < cost.resources:
-                    error("Not enough resources to recruit unit: " + str(t_u))
+                    error("Not enough resources to recruit unit: %s", t_u)
                 elif player.culture < cost.culture:
-                    error("Not enough culture to recruit unit: " + str(t_u))
+                    error("Not enough culture to recruit unit: %s", t_u)
                 elif player.get_population_limit() < player.get_population() + cost.population:
-                    error("Not enough free population to recruit " + str(t_u))
+                    error("Not enough free population to recruit %s", t_u)
                 else:
                     player.amount_of_resources = player.amount_of_resources - cost.resources
                     player.culture = player.culture - cost.culture
@@ -515,7 +742,7 @@ class GameLogic:
 
         if ai_move.move_type == MoveType.DO_BUILD:
             if not self.hex_map.get_hex_by_offset(ai_move.loc).ground.buildable:
-                error("Exec AI Move: Location is not buildable! {}".format(ai_move.loc))
+                error("Exec AI Move: Location is not buildable! %s", ai_move.loc)
                 return
             b_type = 0
             if player.is_barbaric:
@@ -541,13 +768,13 @@ class GameLogic:
                 # The sight range is only extended with the player is not barbaric
 
             else:
-                error("Exec AI Move: Cannot build building! BuildingType:" + str(b_type))
+                error("Exec AI Move: Cannot build building! BuildingType:%s", b_type)
         if ai_move.move_type == MoveType.DO_SCOUT:
             #FIXME cost of scouting is hardcoded
             if player.amount_of_resources >= 1:
                 player.discovered_tiles.add(self.hex_map.get_hex_by_offset(ai_move.loc))
                 player.amount_of_resources = player.amount_of_resources - 1
-                self.toggle_fog_of_war_lw(player.discovered_tiles)
+                self.update_fog_of_war(player)
 
         elif ai_move.move_type == MoveType.DO_UPGRADE_BUILDING:
             b_old: Optional[Building] = None
@@ -566,7 +793,7 @@ class GameLogic:
                 # print(b_new.tex_code)
                 self.add_building(b_new, player)
             else:
-                error(f"Exec AI Move: Not enough resources to upgrade type{b_old.building_type} to {b_type}")
+                error("Exec AI Move: Not enough resources to upgrade type%s to %s", b_old.building_type, b_type)
 
         if ai_move.doMoveArmy:
             if len(player.armies) == 1:             #FIXME has support for only 1 army here
@@ -581,7 +808,7 @@ class GameLogic:
                     else:
                         error("Cannot move army, it appears a building has been built on this tile")
                 else:
-                    error(f"Invalid target for army movement: {ai_move.move_army_to}")
+                    error("Invalid target for army movement: %s", ai_move.move_army_to)
             else:
                 error("No army available")
 
@@ -626,190 +853,134 @@ class GameLogic:
 
     def get_all_at_once(self, player: Player) -> List[Set[Hexagon]]:
         """returns scoutable, buildable and walkable tiles at once"""
-        set_walkable = set()
-        set_buildable = set()
-        set_scoutable = set()
-        for hex in player.discovered_tiles:
-            for n in self.hex_map.get_neighbours(hex):
-                if n not in player.discovered_tiles:
-                    set_scoutable.add(n)
-            if hex.ground.buildable:
-                set_buildable.add(hex)
-            if hex.ground.walkable:
-                set_walkable.add(hex)
-        for p in self.player_list:      # enemy buildings are walkable (to attack them) if they are scouted
-            if p.id != player.id:
-                for b in p.buildings:
-                    if b.tile in player.discovered_tiles:
-                        set_walkable.add(b.tile)
-                for army in p.armies:
-                    if army.tile in set_buildable:
-                        set_buildable.remove(army.tile)
-        return [set(filter(None, set_scoutable)), set(filter(None, set_buildable)), set(filter(None, set_walkable))]
+        discovered = player.discovered_tiles.mask
+        return [set(self.hex_map.get_hexagons(np.flatnonzero(mask)))
+                for mask in (self.get_scoutable_mask(player, discovered), self.get_buildable_mask(player, discovered),
+                             self.get_walkable_mask(player, discovered))]
 
     def get_scoutable_tiles(self, player: Player) -> set:
-        s_set = set()
-        for hex in player.discovered_tiles:
-            if hex.ground.walkable:
-                for h in self.hex_map.get_neighbours(hex):
-                    if h not in player.discovered_tiles:
-                        s_set.add(h)
-        return set(filter(None, s_set))
+        return set(self.hex_map.get_hexagons(np.flatnonzero(self.get_scoutable_mask(player))))
 
     def get_buildable_tiles(self, player: Player) -> Set[Hexagon]:
-        b_set = set()
-        for hex in player.discovered_tiles:
-            if hex.ground.buildable:
-                b_set.add(hex)
-        for p in self.player_list:          # army may block
-            for army in p.armies:
-                if army.tile in b_set:
-                    b_set.remove(army.tile)
-        return b_set
+        return set(self.hex_map.get_hexagons(np.flatnonzero(self.get_buildable_mask(player))))
 
     def get_walkable_tiles(self, player):
-        b_set = set()
-        for hex in player.discovered_tiles:
-            if hex.ground.walkable:
-                b_set.add(hex)
-        for p in self.player_list:      # enemy buildings are walkable (to attack them) if they are scouted
-            if p.id != player.id:
-                for b in p.buildings:
-                    if b.tile in player.discovered_tiles:
-                        b_set.add(b.tile)
-        return b_set
-
-    def get_known_resources(self, player: Player) -> set:
-        r_set = set()
-        for res in self.scenario.resource_list:
-            if res.tile in player.discovered_tiles:
-                r_set.add(res)
-        return r_set
-
-    def get_enemy_buildings(self, player: Player, scoutable_tiles: Set[Hexagon]) -> set:
-        e_set = set()
-        u = set().union(player.discovered_tiles, scoutable_tiles)
-        for other_player in self.player_list:
-            if other_player.id != player.id:
-                for o_b in other_player.buildings:
-                    for my_dis in u:
-                        if o_b.tile.offset_coordinates == my_dis.offset_coordinates:
-                            e_set.add((o_b, other_player.id))
-        return e_set
-
-    def get_enemy_armies(self, player:  Player) -> set:
-        e_set = set()
-        for other_player in self.player_list:
-            if other_player != player:
-                for army in other_player.armies:
-                    if army.tile in player.discovered_tiles:
-                        e_set.add((army, other_player.id))
-        return e_set
+        return set(self.hex_map.get_hexagons(np.flatnonzero(self.get_walkable_mask(player))))
+
+    def get_scoutable_mask(self, player: Player, discovered: Optional[np.ndarray] = None) -> np.ndarray:
+        """the masks are boolean arrays over the hex map. discovered is the mask of the player's discovered tiles,
+        by default the one of player.discovered_tiles"""
+        if discovered is None:
+            discovered = player.discovered_tiles.mask
+        return self.hex_map.get_neighbour_mask(discovered & self.hex_map.walkable) & ~discovered
+
+    def get_buildable_mask(self, player: Player, discovered: Optional[np.ndarray] = None) -> np.ndarray:
+        if discovered is None:
+            discovered = player.discovered_tiles.mask
+        mask = discovered & self.hex_map.buildable
+        mask[list(self.scenario.occupancy.armies)] = False          # army may block
+        return mask
+
+    def get_walkable_mask(self, player: Player, discovered: Optional[np.ndarray] = None) -> np.ndarray:
+        if discovered is None:
+            discovered = player.discovered_tiles.mask
+        mask = discovered & self.hex_map.walkable
+        # enemy buildings are walkable (to attack them) if they are scouted
+        enemy_buildings = [i for i, (b, p) in self.scenario.occupancy.buildings.items() if p.id != player.id]
+        mask[enemy_buildings] |= discovered[enemy_buildings]
+        return mask
+
+    def get_known_resources(self, player: Player, discovered: Optional[np.ndarray] = None) -> list:
+        """the objects are listed in the order of the occupancy (not as sets, which are ordered by the ids of the
+        objects), thus the AIs get the same game status in every run"""
+        if discovered is None:
+            discovered = player.discovered_tiles.mask
+        return [res for i, res in self.scenario.occupancy.resources.items() if discovered[i]]
+
+    def get_enemy_buildings(self, player: Player, known: np.ndarray) -> list:
+        """known is the mask of the discovered and scoutable tiles of the player"""
+        return [(b, p.id) for i, (b, p) in self.scenario.occupancy.buildings.items()
+                if p.id != player.id and known[i]]
+
+    def get_enemy_armies(self, player: Player, discovered: Optional[np.ndarray] = None) -> list:
+        if discovered is None:
+            discovered = player.discovered_tiles.mask
+        return [(a, p.id) for i, armies in self.scenario.occupancy.armies.items() if discovered[i]
+                for a, p in armies if p.id != player.id]
 
     def update_fog_of_war(self, player):
-        if self.map_hack:
+        """shows the tiles which the player has discovered since the last update (if the map shows its view)"""
+        if self.map_hack or not self.map_view[player.id]:
             return
-        if self.map_view[player.id]:
-            for hex in player.discovered_tiles:
-                hex.ground.set_active_texture(1)
-                # hex.ground.sprite.alpha = 255
-            for res in self.scenario.resource_list:
-                if res.tile in player.discovered_tiles:
-                    res.sprite.alpha = 255
-            for p in self.player_list:
-                for a in p.armies:
-                    if a.tile in player.discovered_tiles:
-                        a.sprite.alpha = 255
-                for b in p.buildings:
-                    if b.tile in player.discovered_tiles:
-                        b.sprite.alpha = 255
-                        b.flag.alpha = 255
-                        for a in b.associated_drawables:
-                            a.sprite.alpha = 255
-        self.__reorder_spritelist(self.z_levels[Z_GAME_OBJ])
-
-    def toggle_fog_of_war_lw(self, tile_list: Set[Hexagon], show_update_bar=False):
-        t1 = timeit.default_timer()
-        v = 255 if self.map_hack else 0
-        for res in self.scenario.resource_list:
-            res.sprite.alpha = v
-        tot = len(tile_list)
-        counter = 0
+        revealed = np.flatnonzero(player.discovered_tiles.mask & ~self.__shown_tiles.mask)
+        self.__shown_tiles.mask[revealed] = True
+        for hex in self.hex_map.get_hexagons(revealed):
+            self._apply_fog(hex)
+
+    def toggle_fog_of_war_lw(self, show_update_bar=False):
+        """recomputes the shown tiles after the map view has changed. Only the tiles which leave or enter the fog of
+        war are updated"""
+        shown = np.full(len(self.hex_map.map), self.map_hack)
+        if not self.map_hack:
+            for player in self.player_list:
+                if self.map_view[player.id]:
+                    shown |= player.discovered_tiles.mask
+        changed = self.hex_map.get_hexagons(np.flatnonzero(shown != self.__shown_tiles.mask))
+        self.__shown_tiles.mask[:] = shown
         if show_update_bar:
             start_progress("Updating map view")
-        if self.change_in_map_view:
-            for hex in tile_list:
-                if counter % 5 == 0 and show_update_bar:
-                    progress(counter)
-                counter = counter + 1
-                hex.ground.set_active_texture(1 if self.map_hack else 0)
-                # hex.ground.sprite.alpha = 255 if self.map_hack else 0
+        for counter, hex in enumerate(changed):
+            if counter % 5 == 0 and show_update_bar:
+                progress(counter * 100 / len(changed))
+            self._apply_fog(hex)
         if show_update_bar:
             end_progress()
-        for player in self.player_list:
-            for a in player.armies:
-                a.sprite.alpha = v
-            for b in player.buildings:
-                b.sprite.alpha = v
-                b.flag.alpha = v
-                for a in b.associated_drawables:
-                    a.sprite.alpha = v
-        t2 = timeit.default_timer()
-        for player in self.player_list:
-            self.update_fog_of_war(player)
-        t3 = timeit.default_timer()
-        # debug("Toggeling the map took: {} s (fog of war update: {})".format(t3 - t1, t3 - t2))
 
     def add_resource(self, resource: Resource):
         self.scenario.resource_list.append(resource)
-        resource.set_sprite_pos(HexMap.offset_to_pixel_coords(resource.tile.offset_coordinates), self.__camera_pos)
-        self.__set_sprite(resource, resource.tex_code)
-        self.z_levels[Z_GAME_OBJ].append(resource.sprite)
+        self.scenario.occupancy.resources[resource.tile.index] = resource
+        resource.set_sprite_pos(HexMap.offset_to_pixel_coords(resource.tile.offset_coordinates))
+        self._set_sprite(resource, resource.tex_code)
+        self._add_sprite(resource.sprite, Z_GAME_OBJ, resource.tile.offset_coordinates)
+        self.__update_tile_state(resource.tile)
+        self._apply_fog(resource.tile)
 
     def del_resource(self, resource: Resource):
         self.scenario.resource_list.remove(resource)
-        self.z_levels[Z_GAME_OBJ].remove(resource.sprite)
+        self.scenario.occupancy.resources.pop(resource.tile.index, None)
+        self.__update_tile_state(resource.tile)
+        self._remove_sprite(resource.sprite, Z_GAME_OBJ)
 
     def add_animated_flag(self, colour_code: str, pos: Tuple[int, int]) -> Flag:
+        from src.misc.sprites import Flag
         a_tex = self.texture_store.get_animated_texture('{}_flag'.format(colour_code))
         flag = Flag(pos, a_tex, 0.2)
-        self.z_levels[Z_FLYING].append(flag)
+        self._add_sprite(flag, Z_FLYING)
         return flag
 
     # def add_flag(self, flag: Flag, colour_code: str):
     #     a_tex = self.texture_store.get_animated_texture('{}_flag'.format(colour_code))
     #     for tex in a_tex:
     #         flag.add_texture(tex)
-    #     flag.set_sprite_pos(flag.position, self.__camera_pos)
+    #     flag.set_sprite_pos(flag.position)
     #     flag.set_tex_scale(0.20)
     #     flag.update_interval = 0.1
     #     flag.sprite.set_texture(0)
     #     self.animator.key_frame_animations.append(flag)
     #     self.z_levels[2].append(flag.sprite)
 
-    def del_flag(self, flag: Flag):
-        self.z_levels[Z_FLYING].remove(flag)
+    def del_flag(self, flag: Optional[Flag]):
+        if flag:
+            self._remove_sprite(flag, Z_FLYING)
 
     def add_building(self, building: Building, player: Player):
         # hint("adding a building")
         player.buildings.append(building)
-        position = HexMap.offset_to_pixel_coords(building.tile.offset_coordinates)
-        building.set_sprite_pos(position, self.__camera_pos)
-        self.__set_sprite(building, building.tex_code)
+        self.scenario.occupancy.buildings[building.tile.index] = (building, player)
+        self._draw_building(building, player)
         building.set_state_active()
         if building.construction_time > 0:
-            building.add_tex_construction(self.texture_store.get_texture("cs"))
             building.set_state_construction()
-        building.add_tex_destruction(self.texture_store.get_texture("ds"))
-        self.z_levels[Z_GAME_OBJ].append(building.sprite)
-        # add the flag:
-        # flag = Flag((position[0] + building.flag_offset[0], position[1] + building.flag_offset[1]),
-        #            player.colour)
-        #self.add_flag(flag, player.colour_code)
-        pos = (position[0] + building.flag_offset[0] + self.__camera_pos[0],
-               position[1] + building.flag_offset[1] + self.__camera_pos[1])
-        flag = self.add_animated_flag(player.colour_code, pos)
-        building.flag = flag
         if building.building_type == BuildingType.FARM:
             for a in building.associated_tiles:
                 self.extend_building(building, a, "cf")
@@ -818,140 +989,223 @@ class GameLogic:
                 building.building_type == BuildingType.VILLAGE_3:
             for n in self.hex_map.get_neighbours(building.tile):
                 building.associated_tiles.append(n)
-        building.tile.ground.walkable = False
-        building.tile.ground.buildable = False
-        self.toggle_fog_of_war_lw(player.discovered_tiles)
-        self.__reorder_spritelist(self.z_levels[Z_GAME_OBJ])
-
+        for a in building.associated_tiles:
+            self.__claimed[a.index] += 1
+            self.__update_tile_state(a)
+        self.__update_tile_state(building.tile)
+        self.update_fog_of_war(player)
+        self._apply_fog(building.tile)
 
     def extend_building(self, building: Building, tile: Hexagon, tex_code: str):
         # building.associated_tiles.append(tile)
         drawable = Drawable()
-        drawable.set_sprite_pos(HexMap.offset_to_pixel_coords(tile.offset_coordinates), self.__camera_pos)
+        drawable.set_sprite_pos(HexMap.offset_to_pixel_coords(tile.offset_coordinates))
         building.associated_drawables.append(drawable)
         drawable.sprite.alpha = 100
-        self.__set_sprite(drawable, tex_code)
-        self.z_levels[Z_GAME_OBJ].append(drawable.sprite)
+        self._set_sprite(drawable, tex_code)
+        self._add_sprite(drawable.sprite, Z_GAME_OBJ, tile.offset_coordinates)
 
     def del_building(self, building: Building, player: Player):
         self.del_flag(building.flag)
         for drawable in building.associated_drawables:
-            self.z_levels[Z_GAME_OBJ].remove(drawable.sprite)
+            self._remove_sprite(drawable.sprite, Z_GAME_OBJ)
         player.buildings.remove(building)
-        self.z_levels[Z_GAME_OBJ].remove(building.sprite)
+        self.scenario.occupancy.buildings.pop(building.tile.index, None)
+        for a in building.associated_tiles:
+            self.__claimed[a.index] -= 1
+            self.__update_tile_state(a)
+        self.__update_tile_state(building.tile)
+        self._remove_sprite(building.sprite, Z_GAME_OBJ)
 
     def add_army(self, army: Army, player: Player):
         player.armies.append(army)
-        army.set_sprite_pos(HexMap.offset_to_pixel_coords(army.tile.offset_coordinates), self.__camera_pos)
+        self.scenario.occupancy.add_army(army, player)
+        army.set_sprite_pos(HexMap.offset_to_pixel_coords(army.tile.offset_coordinates))
         army.is_barbaric = player.is_barbaric
-        self.__set_sprite(army, "f1_" + player.colour_code)
-        self.toggle_fog_of_war_lw(player.discovered_tiles)
-        self.z_levels[Z_GAME_OBJ].append(army.sprite)
+        self._set_sprite(army, "f1_" + player.colour_code)
+        self._add_sprite(army.sprite, Z_GAME_OBJ, army.tile.offset_coordinates)
+        self._apply_fog(army.tile)
 
     def move_army(self, army: Army, player: Player, pos: (int, int)):
         is_moving = True
         new_hex = self.hex_map.get_hex_by_offset(pos)
         if new_hex is None:
-            error("Error in army movment: ->" + str(pos))
+            error("Error in army movment: ->%s", pos)
             return
         if self.hex_map.hex_distance(new_hex, army.tile) != 1:
             error("Army cannot 'fly'. AI tries to move more than 1 tile. strange..!?!?!?!")
-            hint(str(new_hex.offset_coordinates))
-            hint(str(army.tile.offset_coordinates))
+            hint("%s", new_hex.offset_coordinates)
+            hint("%s", army.tile.offset_coordinates)
             return          # try to recover from there.
         # make sure the new hex is empty
         if player.armies[0].get_population() == 0:
             hint("army has population 0 and cannot be moved")
             return
-        for p in self.player_list:
+        occupancy = self.scenario.occupancy
+        for hostile_army, p in occupancy.get_armies(new_hex):
             if p != player:
-                for hostile_army in p.armies:
-                    if hostile_army.tile.offset_coordinates == new_hex.offset_coordinates:
-                        if hostile_army.get_population() > 0:
-                            pre_att_u = army.get_units_as_tuple()
-                            pre_def_u = hostile_army.get_units_as_tuple()
-                            outcome: BattleAfterMath = FightCalculator.army_vs_army(army, hostile_army)
-                            post_att_u = army.get_units_as_tuple()
-                            post_def_u = hostile_army.get_units_as_tuple()
-                            Logger.log_battle_army_vs_army_log(pre_att_u, pre_def_u, post_att_u, post_def_u,
-                                                               outcome, player.name, p.name)
-                            p.attacked_set.add((player.id, hostile_army.tile.offset_coordinates))
-                            if hostile_army.get_population() == 0:
-                                self.del_army(hostile_army, p)
-                            if army.get_population() == 0:
-                                self.del_army(army, player)
-                            # does not execute moving the army
-                            is_moving = False
-                        else:
-                            self.del_army(hostile_army, p)
-                            is_moving = False
-                for b in p.buildings:
-                    if b.tile.offset_coordinates == new_hex.offset_coordinates:
-                        pre_att_u = army.get_units_as_tuple()
-                        pre_b = b.defensive_value
-                        outcome: BattleAfterMath = FightCalculator.army_vs_building(army, b)
-                        post_att_u = army.get_units_as_tuple()
-                        post_b = b.defensive_value
-                        Logger.log_battle_army_vs_building(pre_att_u, post_att_u, pre_b, post_b,
-                                                           outcome, player.name, p.name)
-                        p.attacked_set.add((player.id, b.tile.offset_coordinates))
-                        if b.defensive_value == -1:
-                            b.set_state_destruction()
-                        if army.get_population() == 0:
-                            self.del_army(army, player)
-                            is_moving = False
+                if hostile_army.get_population() > 0:
+                    pre_att_u = army.get_units_as_tuple()
+                    pre_def_u = hostile_army.get_units_as_tuple()
+                    outcome: BattleAfterMath = FightCalculator.army_vs_army(army, hostile_army)
+                    post_att_u = army.get_units_as_tuple()
+                    post_def_u = hostile_army.get_units_as_tuple()
+                    Logger.log_battle_army_vs_army_log(pre_att_u, pre_def_u, post_att_u, post_def_u,
+                                                       outcome, player.name, p.name)
+                    p.attacked_set.add((player.id, hostile_army.tile.offset_coordinates))
+                    if hostile_army.get_population() == 0:
+                        self.del_army(hostile_army, p)
+                    if army.get_population() == 0:
+                        self.del_army(army, player)
+                    # does not execute moving the army
+                    is_moving = False
+                else:
+                    self.del_army(hostile_army, p)
+                    is_moving = False
+        occupant = occupancy.get_building(new_hex)
+        if occupant is not None and occupant[1] != player:
+            b, p = occupant
+            pre_att_u = army.get_units_as_tuple()
+            pre_b = b.defensive_value
+            outcome: BattleAfterMath = FightCalculator.army_vs_building(army, b)
+            post_att_u = army.get_units_as_tuple()
+            post_b = b.defensive_value
+            Logger.log_battle_army_vs_building(pre_att_u, post_att_u, pre_b, post_b,
+                                               outcome, player.name, p.name)
+            p.attacked_set.add((player.id, b.tile.offset_coordinates))
+            if b.defensive_value == -1:
+                b.set_state_destruction()
+                self.__update_tile_state(b.tile)
+            if army.get_population() == 0:
+                self.del_army(army, player)
+                is_moving = False
         if is_moving:
             if self.hex_map.hex_distance(new_hex, army.tile) == 1:
-                self.animator.add_move_animation(army, new_hex.offset_coordinates, float(.4))
+                self._animate_move(army, new_hex)
+                occupancy.remove_army(army)
                 army.tile = new_hex
+                occupancy.add_army(army, player)
                 # hint('army is moving to ' + str(army.tile.offset_coordinates))
                 #army.set_sprite_pos(HexMap.offset_to_pixel_coords(new_hex.offset_coordinates))
-                self.__reorder_spritelist(self.z_levels[Z_GAME_OBJ])
-                self.toggle_fog_of_war_lw(player.discovered_tiles)
+                self._move_sprite(army.sprite, Z_GAME_OBJ, new_hex.offset_coordinates)
+                self._apply_fog(new_hex)
             else:
-                error(f"Army cannot move that far: {self.hex_map.hex_distance(new_hex, army.tile)}")
+                error("Army cannot move that far: %s", self.hex_map.hex_distance(new_hex, army.tile))
 
 
 
 
     def del_army(self, army: Army, player: Player):
-        hint("Game Logic: deleting army of player " + str(player.name))
+        hint("Game Logic: deleting army of player %s", player.name)
         self.animator.stop_animation(army)
-        self.z_levels[Z_GAME_OBJ].remove(army.sprite)
+        self._remove_sprite(army.sprite, Z_GAME_OBJ)
         player.armies.remove(army)
+        self.scenario.occupancy.remove_army(army)
+
+    # ----------------- RENDERING ----------------------
+    # The methods below only affect the visual representation of the game. The HeadlessGameLogic
+    # overrides them, hence the rules of the game must not depend on them.
+
+    def _load_textures(self):
+        from src.texture_store import TextureStore
+        self.texture_store = TextureStore.instance()
+        tex_dict = {}
+        self.game_file_reader.read_textures_to_dict(tex_dict)
+        flag_sheets = {p.colour_code: "../resources/objects/animated/flag_100_sprite_{}.png".format(p.colour_code)
+                       for p in self.player_list}
+        eager = None
+        if Definitions.LAZY_TEXTURE_LOADING:
+            # the textures of the map, its objects and the fog of war are needed right away, the others on first use
+            map_data: [[str]] = []
+            self.game_file_reader.read_map(map_data)
+            map_obj_data: [(str, int, int)] = []
+            self.game_file_reader.read_map_obj(map_obj_data)
+            eager = {"fw"} | {code for row in map_data for code in row} | {obj[0] for obj in map_obj_data}
+        self.texture_store.load_textures(tex_dict, list(flag_sheets.values()), eager)
+        # load textures which depend on player
+        for c, sheet in flag_sheets.items():
+            self.texture_store.load_animated_texture("{}_flag".format(c), 10, lambda i: (0, 100 * i), 108, 100, sheet)
+
+    def _draw_ground(self, ground: Ground, offset_coords: Tuple[int, int]):
+        ground.set_sprite_pos(HexMap.offset_to_pixel_coords(offset_coords))
+        ground.add_texture(self.texture_store.get_texture("fw"))
+        self._add_sprite(ground.sprite, Z_MAP, offset_coords)
 
-    def __set_sprite(self, drawable: Drawable, tex_code: str):
+    def _draw_building(self, building: Building, player: Player):
+        """sets the sprite, the construction and destruction texture and the flag of a new building"""
+        position = HexMap.offset_to_pixel_coords(building.tile.offset_coordinates)
+        building.set_sprite_pos(position)
+        self._set_sprite(building, building.tex_code)
+        if building.construction_time > 0:
+            building.add_tex_construction(self.texture_store.get_texture("cs"))
+        building.add_tex_destruction(self.texture_store.get_texture("ds"))
+        self._add_sprite(building.sprite, Z_GAME_OBJ, building.tile.offset_coordinates)
+        # add the flag:
+        # flag = Flag((position[0] + building.flag_offset[0], position[1] + building.flag_offset[1]),
+        #            player.colour)
+        #self.add_flag(flag, player.colour_code)
+        pos = (position[0] + building.flag_offset[0], position[1] + building.flag_offset[1])
+        building.flag = self.add_animated_flag(player.colour_code, pos)
+
+    def _animate_move(self, army: Army, new_hex: Hexagon):
+        if self.__replay is None:
+            self.animator.add_move_animation(army, new_hex.offset_coordinates, float(.4))
+        else:                                   # no animations while fast-forwarding
+            army.set_sprite_pos(HexMap.offset_to_pixel_coords(new_hex.offset_coordinates))
+
+    def _add_sprite(self, sprite: arcade.Sprite, z_level: int, offset_coords: Optional[Tuple[int, int]] = None):
+        """the sprite layers (see game.py) draw a sprite with a map position behind the sprites of lower rows and
+        cull it while its tile is not on screen"""
+        if offset_coords is None:
+            self.z_levels[z_level].append(sprite)
+        else:
+            self.z_levels[z_level].add(sprite, offset_coords)
+
+    def _remove_sprite(self, sprite: arcade.Sprite, z_level: int):
+        self.z_levels[z_level].remove(sprite)
+
+    def _apply_fog(self, hex: Hexagon):
+        """shows or hides the ground and the objects of a single tile, depending on the fog of war"""
+        is_shown = hex in self.__shown_tiles
+        alpha = 255 if is_shown else 0
+        hex.ground.set_active_texture(1 if is_shown else 0)
+        res = self.scenario.occupancy.get_resource(hex)
+        if res is not None:
+            res.sprite.alpha = alpha
+        occupant = self.scenario.occupancy.get_building(hex)
+        if occupant is not None:
+            b = occupant[0]
+            b.sprite.alpha = alpha
+            if b.flag is not None:
+                b.flag.alpha = alpha
+            for a in b.associated_drawables:
+                a.sprite.alpha = alpha
+        for a, _ in self.scenario.occupancy.get_armies(hex):
+            a.sprite.alpha = alpha
+
+    def _set_sprite(self, drawable: Drawable, tex_code: str):
         drawable.add_texture(self.texture_store.get_texture(tex_code))
         drawable.set_tex_offset(self.texture_store.get_tex_offest(tex_code))
         drawable.set_tex_scale(self.texture_store.get_tex_scale(tex_code))
 
-    def __reorder_spritelist(self, sl: arcade.SpriteList):          #TODO ugly
-        li = []
-        for s in sl:
-            li.append(s)
-        for s in li:
-            sl.remove(s)
-        # TODO: BAD:to make the army appear on top of fields I substract by height. That must be a better solution
-        # li.sort(key=lambda x: x.center_y - (x._height - 30), reverse=True)
-        li.sort(key=lambda x: x.center_y, reverse=True)
-        for s in li:
-            sl.append(s)
-
-    def set_camera_pos(self, pos_x, pos_y):
-        self.__camera_pos = (pos_x, pos_y)
+    def _move_sprite(self, sprite: arcade.Sprite, z_level: int, offset_coords: Tuple[int, int]):
+        """repositions a sprite, which moves to another tile, in a sprite layer"""
+        self.z_levels[z_level].reposition(sprite, offset_coords)
 
     def get_map_element(self, offset_coords):
         # do this in zlvl order
-        for res in self.scenario.resource_list:
-            if res.tile.offset_coordinates == offset_coords:
-                return res, Resource
-        for p in self.player_list:
-            for b in p.buildings:
-                if b.tile.offset_coordinates == offset_coords:
-                    return b, Building
-            for a in p.armies:
-                if a.tile.offset_coordinates == offset_coords:
-                    return a, Army
+        hexagon = self.hex_map.get_hex_by_offset(offset_coords)
+        if hexagon is None:
+            return None, None
+        res = self.scenario.occupancy.get_resource(hexagon)
+        if res is not None:
+            return res, Resource
+        occupant = self.scenario.occupancy.get_building(hexagon)
+        if occupant is not None:
+            return occupant[0], Building
+        armies = self.scenario.occupancy.get_armies(hexagon)
+        if len(armies) > 0:
+            return armies[0][0], Army
         return None, None
 
     def add_aux_sprite(self, hex, tex_code):              # TODO ugly method duplicated
@@ -960,10 +1214,9 @@ class GameLogic:
     def __add_aux_sprite(self, hex: Hexagon, tex_code: str):
         aux = Drawable()
         self.scenario.aux_sprites.append((hex, aux))
-        aux.set_sprite_pos(HexMap.offset_to_pixel_coords(hex.offset_coordinates), self.__camera_pos)
-        self.__set_sprite(aux, tex_code)
-        self.z_levels[Z_AUX].append(aux.sprite)
-        self.__reorder_spritelist(self.z_levels[Z_AUX])
+        aux.set_sprite_pos(HexMap.offset_to_pixel_coords(hex.offset_coordinates))
+        self._set_sprite(aux, tex_code)
+        self._add_sprite(aux.sprite, Z_AUX, hex.offset_coordinates)
 
     def __clear_aux_sprites(self):
         to_be_del: List[(Hexagon, Drawable)] = []
@@ -975,7 +1228,7 @@ class GameLogic:
                 self.scenario.aux_sprites.remove(tbd)
 
     def __rmv_aux_sprite(self, sprite: arcade.Sprite):
-        self.z_levels[Z_AUX].remove(sprite)
+        self._remove_sprite(sprite, Z_AUX)
 
     def __exec_command(self, c_list):
         if not Definitions.ALLOW_CONSOLE_CMDS:
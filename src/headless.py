@@ -0,0 +1,145 @@
+import argparse
+import timeit
+from os import sys, path
+from typing import Optional, Tuple, List
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from src.game_accessoires import Army, Ground
+from src.game_logic import GameLogic
+from src.hex_map import Hexagon
+from src.misc.building import Building
+from src.misc.game_constants import Definitions, PlayerType, error, flush_log
+from src.misc.replay import Replay
+from src.player import Player
+
+DEFAULT_MAX_TURNS = 500
+
+
+class HeadlessGameLogic(GameLogic):
+    """Plays the game without window, sprites, textures and animations.
+    The rules are the ones of the GameLogic, only the rendering methods are overridden. The turns are played
+    synchronously from a plain loop, which allows to simulate a lot of games quickly (e.g. to evaluate the AIs)"""
+
+    def __init__(self, game_xml_file: str, ai_lineup: Optional[List[str]] = None, ai_workers: bool = False,
+                 seed: Optional[int] = None):
+        """ai_lineup optionally replaces the 'ai' attribute of the players in the game file (in the same order).
+        By default, the AIs run in this process (see Definitions.AI_WORKER_PROCESSES)"""
+        Definitions.HEADLESS = True          # must be set before the first Drawable is created
+        Definitions.SHOW_AI_CTRL = False
+        Definitions.AI_WORKER_PROCESSES = ai_workers
+        super().__init__(game_xml_file, None, seed)
+        if ai_lineup:
+            if len(ai_lineup) != len(self.player_list):
+                raise ValueError(f"AI lineup has {len(ai_lineup)} entries, the game file has "
+                                 f"{len(self.player_list)} players")
+            for p, ai_str in zip(self.player_list, ai_lineup):
+                p.ai_str = ai_str
+                p.is_barbaric = ai_str == "barbaric"
+                p.is_villager = ai_str == "villager"
+                p.player_type = PlayerType.get_type_from_strcode(ai_str)
+
+    def play(self, max_turns: int = DEFAULT_MAX_TURNS) -> Optional[Player]:
+        """plays until a player has won or max_turns are over. Returns the winner, if there is one"""
+        if self.has_human_player:
+            error("Headless game logic cannot play with human players")
+            return None
+        while self.winner is None and self.turn_nr < max_turns:
+            if Definitions.SPECULATIVE_AI:
+                self.speculate_next_turn()          # there is no time to gain, but it tests the speculation
+            self.handle_turn(block=True)
+        return self.winner
+
+    def _start_ai_worker(self, player: Player):
+        self._set_ai_move(self.compute_ai_move(player))      # no update loop to keep responsive, thus no thread
+
+    def toggle_fog_of_war_lw(self, show_update_bar=False):
+        pass
+
+    def update_fog_of_war(self, player):
+        pass
+
+    def add_animated_flag(self, colour_code: str, pos: Tuple[int, int]):
+        return None
+
+    def extend_building(self, building: Building, tile: Hexagon, tex_code: str):
+        pass
+
+    def _load_textures(self):
+        pass
+
+    def _draw_ground(self, ground: Ground, offset_coords: Tuple[int, int]):
+        pass
+
+    def _draw_building(self, building: Building, player: Player):
+        pass
+
+    def _animate_move(self, army: Army, new_hex: Hexagon):
+        pass
+
+    def _add_sprite(self, sprite, z_level: int, offset_coords: Optional[Tuple[int, int]] = None):
+        pass
+
+    def _remove_sprite(self, sprite, z_level: int):
+        pass
+
+    def _apply_fog(self, hex: Hexagon):
+        pass
+
+    def _set_sprite(self, drawable, tex_code: str):
+        pass
+
+    def _move_sprite(self, sprite, z_level: int, offset_coords: Tuple[int, int]):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="plays a game without graphical output")
+    parser.add_argument("game_xml_file", nargs="?", help="e.g. ../resources/game_ai_vs_npc.xml (not needed with "
+                                                         "--replay)")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--debug", action="store_true", help="enables the debug output")
+    parser.add_argument("--check-map-state", action="store_true",
+                        help="compares the map state with a full recomputation every turn")
+    parser.add_argument("--ai-workers", action="store_true", help="runs the AIs in worker processes")
+    parser.add_argument("--ai-deadline", type=float, default=Definitions.AI_MOVE_DEADLINE,
+                        help="seconds an AI in a worker process has for its move")
+    parser.add_argument("--speculative-ai", action="store_true",
+                        help="the next AI computes its move in advance (in the AI thread)")
+    parser.add_argument("--seed", type=int, help="seed of the random numbers (random by default)")
+    parser.add_argument("--record", metavar="FILE", help="records the moves to a replay file")
+    parser.add_argument("--replay", metavar="FILE", help="plays the game of a replay file, up to --fast-forward")
+    parser.add_argument("--fast-forward", type=int, metavar="TURN", default=DEFAULT_MAX_TURNS,
+                        help="the turn up to which the recorded moves are played, then the game continues live")
+    args = parser.parse_args()
+
+    Definitions.DEBUG_MODE = args.debug
+    Definitions.CHECK_MAP_STATE = args.check_map_state
+    Definitions.AI_MOVE_DEADLINE = args.ai_deadline
+    Definitions.SPECULATIVE_AI = args.speculative_ai
+    replay = Replay(args.replay) if args.replay else None
+    if replay is None and args.game_xml_file is None:
+        parser.error("the game file is required (unless a replay is played)")
+    gl = HeadlessGameLogic(replay.game_xml_file if replay else args.game_xml_file, ai_workers=args.ai_workers,
+                           seed=replay.seed if replay else args.seed)
+    gl.setup()
+    if args.record:
+        gl.record(args.record)
+    if replay:
+        t1 = timeit.default_timer()
+        gl.fast_forward(replay, args.fast_forward)
+        print(f"fast-forwarded to turn {gl.turn_nr} in {(timeit.default_timer() - t1):.4} s")
+    t1 = timeit.default_timer()
+    winner = gl.play(args.max_turns)
+    t2 = timeit.default_timer()
+    gl.shutdown()
+    flush_log()
+    print(f"played {gl.turn_nr} turns in {(t2 - t1):.4} s, winner: {winner.name if winner else '-'}")
+    if gl.recorder:
+        print(f"recorded {gl.recorder.num_moves} moves to {args.record}")
+    if args.speculative_ai:
+        print(f"speculative moves: {gl.speculations_used} used, {gl.speculations_discarded} discarded")
+
+
+if __name__ == "__main__":
+    main()
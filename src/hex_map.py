@@ -1,7 +1,12 @@
+from __future__ import annotations
+
+from collections.abc import MutableSet
 from enum import Enum
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Iterable, Dict
+
+import numpy as np
 
-from src.misc.game_constants import hint, error
+from src.misc.game_constants import hint, error, GroundType
 
 TILE_HIGHT = 52 * 1
 TILE_WIDTH = 66 * 1
@@ -12,18 +17,44 @@ BOTTOM_MARGIN = 130
 
 
 class Hexagon:
-    def __init__(self, grid_pos: (int, int)):
+    def __init__(self, grid_pos: (int, int), hex_map: Optional[HexMap] = None, index: int = -1):
         self.offset_coordinates: (int, int) = grid_pos
         self.cube_coordinates: (int, int, int) = HexMap.offset_to_cube_coords(grid_pos)
-        self.ground = None
+        self.hex_map: Optional[HexMap] = hex_map
+        self.index: int = index         # position in the linear storage (and the arrays) of the HexMap
+        self.__ground = None
         self.debug_msg = ""
 
+    @property
+    def ground(self):
+        return self.__ground
+
+    @ground.setter
+    def ground(self, ground):
+        """the flags of the ground are stored in the arrays of the HexMap from now on"""
+        self.__ground = ground
+        if ground is not None and self.hex_map is not None:
+            ground.bind(self.hex_map, self.index)
+
 
 class MapStyle(Enum):
     S_V_C = 0   # bottom side horizontal, each row has equal amount of elements
 
 
 class HexMap:
+    """
+    Next to the linear storage of the hexagons, the map keeps the state of each hexagon in arrays (struct of arrays),
+    indexed by Hexagon.index (= offset_to_linear_mapping). This allows to query the map with array operations instead
+    of looping over the hexagons. The flags of the Ground are stored in walkable and buildable. These and the arrays
+    owner and resource are updated by GameLogic whenever an object on the tile changes
+    """
+    # offset of the neighbours (ne, e, se, sw, w, nw) in offset coordinates, for even and odd rows respectively
+    NEIGHBOUR_OFFSETS = (((0, 1), (1, 0), (0, -1), (-1, -1), (-1, 0), (-1, 1)),
+                         ((1, 1), (1, 0), (1, -1), (0, -1), (-1, 0), (0, 1)))
+    # directions (ne, e, se, sw, w, nw) in cube coordinates, as in get_cc_northeast, get_cc_east, ...
+    CUBE_DIRECTIONS = ((0, -1, 1), (1, -1, 0), (1, 0, -1), (0, 1, -1), (-1, 1, 0), (-1, 0, 1))
+    __spiral_offsets: Dict[int, List[Tuple[int, int, int]]] = {}    # radius -> cube offsets within the radius
+
     def __init__(self, map_dim: (int, int), style: MapStyle):
         hint("HexMap size: {}".format(map_dim))
         if style != MapStyle.S_V_C:
@@ -32,7 +63,42 @@ class HexMap:
         self.map: [Hexagon] = []       # linear storage of all hexagons in the map
         for y in range(map_dim[1]):
             for x in range(map_dim[0]):
-                self.map.append(Hexagon((x, y)))
+                self.map.append(Hexagon((x, y), self, len(self.map)))
+
+        size = map_dim[0] * map_dim[1]
+        x = np.tile(np.arange(map_dim[0]), map_dim[1])
+        y = np.repeat(np.arange(map_dim[1]), map_dim[0])
+        cube_x = x - (y - (y & 1)) // 2
+        self.cube_coordinates: np.ndarray = np.stack((cube_x, -cube_x - y, y), axis=1)
+        self.ground_type: np.ndarray = np.full(size, GroundType.OTHER.value, dtype=np.int8)
+        self.walkable: np.ndarray = np.zeros(size, dtype=bool)
+        self.buildable: np.ndarray = np.zeros(size, dtype=bool)
+        self.owner: np.ndarray = np.full(size, -1, dtype=np.int16)        # player id of the building on the hexagon
+        self.resource: np.ndarray = np.full(size, -1, dtype=np.int16)     # value of the ResourceType on the hexagon
+        # index of the neighbours (ne, e, se, sw, w, nw) of each hexagon, -1 if the neighbour is outside of the map
+        offsets = np.array(HexMap.NEIGHBOUR_OFFSETS)[y & 1]
+        n_x = x[:, np.newaxis] + offsets[:, :, 0]
+        n_y = y[:, np.newaxis] + offsets[:, :, 1]
+        inside = (0 <= n_x) & (n_x < map_dim[0]) & (0 <= n_y) & (n_y < map_dim[1])
+        self.neighbour_index: np.ndarray = np.where(inside, n_x + n_y * map_dim[0], -1)
+        self.__neighbour_lists: List[List[int]] = [[i for i in n if i >= 0] for n in self.neighbour_index.tolist()]
+        self.__radius_cache: Dict[Tuple[int, int], List[Hexagon]] = {}  # (index, radius) -> get_neighbours_dist
+
+    def get_mask(self, hexagons: Iterable[Hexagon]) -> np.ndarray:
+        """boolean array, which is True for the given hexagons"""
+        mask = np.zeros(len(self.map), dtype=bool)
+        mask[[h.index for h in hexagons]] = True
+        return mask
+
+    def get_hexagons(self, indices: Iterable[int]) -> List[Hexagon]:
+        return [self.map[i] for i in indices]
+
+    def get_neighbour_mask(self, mask: np.ndarray) -> np.ndarray:
+        """boolean array, which is True for all neighbours of the hexagons in the mask"""
+        nei = self.neighbour_index[mask].ravel()
+        result = np.zeros(len(self.map), dtype=bool)
+        result[nei[nei >= 0]] = True
+        return result
 
     def get_hex_by_cube(self, cube_c: (int, int, int)) -> Optional[Hexagon]:
         x, y = HexMap.cube_to_offset_coords(cube_c)
@@ -127,13 +193,8 @@ class HexMap:
         return self.get_hex_by_cube((x, y, z))
 
     def get_neighbours(self, h: Hexagon) -> List[Hexagon]:
-        nei = [self.get_hex_northeast(h),
-                self.get_hex_east(h),
-                self.get_hex_southeast(h),
-                self.get_hex_southwest(h),
-                self.get_hex_west(h),
-                self.get_hex_northwest(h)]
-        return list(filter(None, nei))
+        """neighbours in the order ne, e, se, sw, w, nw"""
+        return [self.map[i] for i in self.__neighbour_lists[h.index]]
 
     def get_neighbours_dist2(self, h:Hexagon) -> List[Hexagon]:
         x, y ,z = h.cube_coordinates
@@ -158,11 +219,36 @@ class HexMap:
         elif dist == 2:
             return self.get_neighbours_dist2(h)
         else:
-            nei = []
-            for hex in self.map:
-                if HexMap.hex_distance(h, hex) <= dist:
-                    nei.append(hex)
-            return list(filter(None, nei))
+            # the sight ranges are drawn from a handful of building types, hence the results are cached
+            key = (h.index, dist)
+            if key not in self.__radius_cache:
+                self.__radius_cache[key] = self.__get_hexagons_in_radius(h, dist)
+            return list(self.__radius_cache[key])
+
+    def __get_hexagons_in_radius(self, h: Hexagon, radius: int) -> List[Hexagon]:
+        """all hexagons within the radius (including h), O(radius^2) instead of O(size of the map)"""
+        x, y, z = h.cube_coordinates
+        nei = []
+        for d_x, d_y, d_z in HexMap.get_spiral_offsets(radius):
+            n = self.get_hex_by_cube((x + d_x, y + d_y, z + d_z))
+            if n:
+                nei.append(n)
+        return nei
+
+    @staticmethod
+    def get_spiral_offsets(radius: int) -> List[Tuple[int, int, int]]:
+        """cube offsets of all hexagons within the radius, starting at the center and going outwards ring by ring"""
+        if radius not in HexMap.__spiral_offsets:
+            offsets = [(0, 0, 0)]
+            for r in range(1, radius + 1):
+                # start of the ring is r steps in direction w, then walk r steps in each direction
+                x, y, z = (d * r for d in HexMap.CUBE_DIRECTIONS[4])
+                for d_x, d_y, d_z in HexMap.CUBE_DIRECTIONS:
+                    for _ in range(r):
+                        offsets.append((x, y, z))
+                        x, y, z = x + d_x, y + d_y, z + d_z
+            HexMap.__spiral_offsets[radius] = offsets
+        return HexMap.__spiral_offsets[radius]
 
     def get_hex_by_pixel(self, pix_on_screen: Tuple[int, int], camera_pos: Tuple[int, int]):
         # idx_x = 0
@@ -183,18 +269,18 @@ class HexMap:
 
     @staticmethod
     def cube_distance(a: (int, int, int), b: (int, int, int)) -> int:
-        return (abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) / 2
+        return (abs(a[0] - b[0]) + abs(a[1] - b[1]) + abs(a[2] - b[2])) // 2
 
     @staticmethod
     def offset_to_cube_coords(offset_c: (int, int)) -> (int, int, int):
-        x = offset_c[0] - (offset_c[1] - (offset_c[1] & 1)) / 2
+        x = offset_c[0] - (offset_c[1] - (offset_c[1] & 1)) // 2
         z = offset_c[1]
         y = -x - z
         return x, y, z
 
     @staticmethod
     def cube_to_offset_coords(cube_c: (int, int, int)) -> (int, int):
-        x = cube_c[0] + (cube_c[2] - (cube_c[2] & 1)) / 2
+        x = cube_c[0] + (cube_c[2] - (cube_c[2] & 1)) // 2
         y = cube_c[2]
         return int(x), int(y)
 
@@ -205,3 +291,36 @@ class HexMap:
         if offset_c[1] % 2 != 0:
             x_pix = x_pix + TILE_WIDTH / 2
         return x_pix, y_pix
+
+
+class HexagonSet(MutableSet):
+    """A set of hexagons of a HexMap, stored as boolean array (mask) over the index of the hexagons.
+    It behaves like a set of hexagons, while the mask allows vectorised queries (see GameLogic.get_scoutable_mask).
+    Set operations with other sets (e.g. the difference) return a regular set"""
+
+    def __init__(self, hex_map: HexMap):
+        self.hex_map: HexMap = hex_map
+        self.mask: np.ndarray = np.zeros(len(hex_map.map), dtype=bool)
+
+    @classmethod
+    def _from_iterable(cls, it):
+        return set(it)
+
+    def __contains__(self, hexagon) -> bool:
+        return hexagon is not None and bool(self.mask[hexagon.index])
+
+    def __iter__(self):
+        return iter(self.hex_map.get_hexagons(np.flatnonzero(self.mask)))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.mask))
+
+    def add(self, hexagon: Hexagon):
+        if hexagon is not None:
+            self.mask[hexagon.index] = True
+
+    def discard(self, hexagon: Hexagon):
+        self.mask[hexagon.index] = False
+
+    def update(self, hexagons: Iterable[Hexagon]):
+        self.mask[[h.index for h in hexagons if h is not None]] = True
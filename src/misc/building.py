@@ -1,11 +1,14 @@
-from typing import Optional, Dict, Any
+from __future__ import annotations
+from typing import Optional, Dict, Any, TYPE_CHECKING
 
-import arcade
-
-from src.game_accessoires import Drawable, Flag
+from src.game_accessoires import Drawable
 from src.hex_map import Hexagon
 from src.misc.game_constants import BuildingType, BuildingState, error
 
+if TYPE_CHECKING:
+    import arcade
+    from src.misc.sprites import Flag
+
 
 class Building(Drawable):
 
@@ -20,7 +23,7 @@ class Building(Drawable):
         self.building_state: BuildingState = BuildingState.ACTIVE
         self.__idx_texture_construction: int = -1
         self.__idx_texture_destruction: int = -1
-        self.flag: Optional[Flag] = None
+        self.flag: Optional[Flag] = None                # not set in headless mode
         # values from xml file
         self.tex_code = Building.building_info[bui_type]['tex_code']
         self.construction_cost = Building.building_info[bui_type]['construction_cost']
@@ -54,7 +57,7 @@ class Building(Drawable):
         self.building_state = BuildingState.UNDER_CONSTRUCTION
         if self.has_texture_construction():
             super().set_active_texture(self.__idx_texture_construction)
-        else:
+        elif self.sprite is not None:       # headless mode has no textures
             error("Building does not have a construction texture!")
 
     def set_state_destruction(self):
@@ -62,7 +65,7 @@ class Building(Drawable):
         self.building_state = BuildingState.DESTROYED
         if self.has_texture_destruction():
             super().set_active_texture(self.__idx_texture_destruction)
-        else:
+        elif self.sprite is not None:       # headless mode has no textures
             error("Building does not have a destruction texture!")
 
     def set_state_active(self):
@@ -5,6 +5,8 @@ from src.misc.game_constants import CAMERA_SENSITIVITY
 
 class Camera:
     """Simple class, which controls the viewport of the screen
+    The sprites stay at their position on the map, the camera position is the offset which is added to the map
+    position to get the position on the screen. Thus, moving the camera only changes the viewport (see get_viewport)
     This class is not threat safe"""
     def __init__(self, screen_width, screen_height):
         self.__position: Tuple[int, int] = (0, 0)
@@ -21,19 +23,25 @@ class Camera:
         self.right_key = False
 
     def get_position(self) -> Tuple[int, int]:
-        """get the camera position: this is the lower left corner"""
+        """get the camera position: screen position = map position + camera position"""
         return self.__position
 
     def set_position(self, pos: Tuple[int, int]):
-        """set the offset of the lower left corner of the screen in pixels"""
+        """set the offset between the map and the screen in pixels"""
         self.__position = pos
 
     def set_center(self, center: Tuple[int, int]):
         """set the focus point of the camera (center) on a specific pixel offset"""
-        tmp_x = center[0] - self.screen_width / 2
-        tmp_y = center[1] - self.screen_height / 2
+        tmp_x = self.screen_width / 2 - center[0]
+        tmp_y = self.screen_height / 2 - center[1]
         self.__position = (tmp_x, tmp_y)
 
+    def get_viewport(self) -> Tuple[float, float, float, float]:
+        """the visible part of the map in pixels: (left, right, bottom, top)"""
+        left = -self.__position[0]
+        bottom = -self.__position[1]
+        return left, left + self.screen_width, bottom, bottom + self.screen_height
+
     def register(self, obj: Any, callback: Callable[[Tuple[int, int], Tuple[int, int]], None]):
         """if an objects wants to get notified upon movement, it can register with an reference to itself and
         a callback function which deals with the relative and absolute camera movement"""
@@ -60,18 +68,7 @@ class Camera:
 
         if self.camera_has_moved:
             for obj, call in self._camera_event_listener:
-                obj.call((self.rel_x, self.rel_y), self.__position)
-
-            # for s_list in self.z_levels:
-            #     for sp in s_list:
-            #         sp.center_x = sp.center_x + self.rel_x
-            #         sp.center_y = sp.center_y + self.rel_y
-            # self.gl.set_camera_pos(self.camera_x, self.camera_y)
-            # self.gl.animator.update_camera_pos((self.camera_x, self.camera_y))
-            # #self.gl.animator.camera_pos = (self.camera_x, self.camera_y)
-            # self.ui.camera_pos = (self.camera_x, self.camera_y)
-            # for listener in self.camera_event_listener:
-            #     listener.camera_pos = (self.camera_x, self.camera_y)
+                call((self.rel_x, self.rel_y), self.__position)
             self.camera_has_moved = False
             self.rel_x = 0
             self.rel_y = 0
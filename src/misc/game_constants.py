@@ -1,16 +1,18 @@
 from __future__ import annotations
 
-import inspect
+import atexit
+import os
+import queue
 import sys
+import threading
+from collections import deque
 
 ######################
 ### Game Constants ###
 ######################
 from dataclasses import dataclass
 from enum import Enum
-from typing import Tuple
-
-import arcade
+from typing import Tuple, Optional, List
 
 #####################
 ### Game Settings ###
@@ -32,14 +34,38 @@ MAP_HACK_ENABLE_AT_STARTUP = False
 GAME_LOGIC_CLK_SPEED = 0.75
 
 
+class LogLevel:
+    """levels of the log, a message is logged if its level is at least Definitions.LOG_LEVEL"""
+    DEBUG = 0
+    HINT = 1
+    ERROR = 2
+    OFF = 3
+
+
 class Definitions:
     VERSION: str = str(0.3)
     UI_TEXTURE_PATH = "../resources/other/"
+    TEXTURE_ATLAS_PATH = "../resources/generated/atlas/"    # cache of the texture atlas
+    USE_TEXTURE_ATLAS = True            # load the textures from a few packed sheets instead of one file per texture
+    TEXTURE_LOADING_THREADS = 4         # number of threads which decode the images of the textures
+    LAZY_TEXTURE_LOADING = True         # textures which are not on the map at startup are loaded on first use
+    SCENARIO_CACHE_PATH = "../resources/generated/scenarios/"     # compiled game files (see GameFileReader)
+    USE_SCENARIO_CACHE = True           # parse a game file only once, afterwards load the compiled data
+    AI_WORKER_PROCESSES = False         # every AI computes its moves in a process of its own (otherwise in a thread)
+    AI_MOVE_DEADLINE = 2.0              # seconds an AI (in a worker process) has for its move, then it does nothing
+    AI_WORKER_NICENESS = 10             # lower scheduling priority of the worker processes (unix only)
+    SPECULATIVE_AI = False              # the next AI computes its move in advance (e.g. during animations)
+    REPLAY_FILE = None                  # the game records its moves to this file, if set (see --record)
     SHOW_AI_CTRL = True
     SHOW_STARTUP_CTRL = True
     SHOW_STATS_ON_EXIT = True
     DEBUG_MODE = True
     ALLOW_CONSOLE_CMDS = True
+    HEADLESS = False                    # no window, no sprites and no textures (see HeadlessGameLogic)
+    CHECK_MAP_STATE = False             # compare the map state with a full recomputation every turn (slow)
+    LOG_LEVEL = LogLevel.DEBUG          # messages below this level are dropped (debug needs DEBUG_MODE as well)
+    LOG_BUFFER_SIZE = 1000              # number of messages kept in memory (see get_log_records)
+    LOG_ASYNC = True                    # messages are written by a separate thread
 
 
 class bcolors:
@@ -56,52 +82,112 @@ class bcolors:
 ########################
 ### Helper functions ###
 ########################
-def get_caller() -> str:
-    stack = inspect.stack()
-    the_class = stack[2][0].f_locals["self"].__class__.__name__
-    the_method = stack[2][0].f_code.co_name
+# records of all logged messages (bounded, the oldest ones are dropped) and the writer thread (if LOG_ASYNC)
+_log_records: Optional[deque] = None
+_log_queue: Optional[queue.SimpleQueue] = None
+_log_writer_pid: int = -1
+
+
+def get_caller(depth: int = 3) -> str:
+    """the class (or module) of the function which called the log function. Cheap, since only the frame is looked
+    up (no stack walk with loading the source)"""
+    frame = sys._getframe(depth)
+    obj = frame.f_locals.get("self")
+    the_class = obj.__class__.__name__ if obj is not None else frame.f_globals.get("__name__", "?")
     if DETAILED_DEBUG_INFO == 2:
-        return "(Class: {} Function: {})".format(the_class, the_method)
-    elif DETAILED_DEBUG_INFO == 1:
-        return "(Class: {})".format(the_class)
+        return "(Class: {} Function: {})".format(the_class, frame.f_code.co_name)
+    return "(Class: {})".format(the_class)
+
+
+def log_message(level: int, msg, args) -> str:
+    """formats the message (only here, i.e. if the level is enabled), stores it in the records and writes it.
+    msg is either a format string for args (%-style) or a function which returns the message"""
+    if callable(msg):
+        msg = msg()
+    elif args:
+        msg = msg % args
+    if level == LogLevel.DEBUG:
+        line = str(msg)
+    else:
+        caller = get_caller() if DETAILED_DEBUG_INFO else ""
+        if level == LogLevel.HINT:
+            line = "[HINT]{} : {}{}{}".format(caller, bcolors.WARNING, msg, bcolors.ENDC)
+        else:
+            tag = "FATAL" if ERRORS_ARE_FATAL else "ERROR"
+            line = "[{}]{} : {}{}{}".format(tag, caller, bcolors.FAIL, msg, bcolors.ENDC)
+    global _log_records
+    if _log_records is None:
+        _log_records = deque(maxlen=Definitions.LOG_BUFFER_SIZE)
+    _log_records.append((level, line))
+    _write(line)
+    return line
+
+
+def _write(line: str):
+    global _log_queue, _log_writer_pid
+    if not Definitions.LOG_ASYNC:
+        print(line)
+        return
+    if _log_writer_pid != os.getpid():          # not started yet, or in a forked process (threads are not copied)
+        _log_queue = queue.SimpleQueue()
+        _log_writer_pid = os.getpid()
+        threading.Thread(target=_writer_loop, args=(_log_queue,), name="log writer", daemon=True).start()
+    _log_queue.put(line)
+
+
+def _writer_loop(q: queue.SimpleQueue):
+    while True:
+        line = q.get()
+        if isinstance(line, threading.Event):         # see flush_log
+            sys.stdout.flush()
+            line.set()
+        else:
+            sys.stdout.write(line + "\n")
+
 
+def flush_log():
+    """blocks until the writer thread has written all messages"""
+    if _log_queue is not None and _log_writer_pid == os.getpid():
+        written = threading.Event()
+        _log_queue.put(written)
+        written.wait()
 
-def debug(msg: str, colour=0):
-    if not Definitions.DEBUG_MODE:
+
+atexit.register(flush_log)
+
+
+def get_log_records(level: int = LogLevel.DEBUG) -> List[str]:
+    """the last (at most Definitions.LOG_BUFFER_SIZE) logged messages of at least the given level"""
+    return [line for lvl, line in (_log_records or ()) if lvl >= level]
+
+
+def debug(msg, *args):
+    if not Definitions.DEBUG_MODE or Definitions.LOG_LEVEL > LogLevel.DEBUG:
         return
-    print(msg)
-    # caller = ""
-    # if DETAILED_DEBUG_INFO != 0:
-    #     caller = get_caller()
+    log_message(LogLevel.DEBUG, msg, args)
     # c = bcolors.OKBLUE
     # if colour == 1:
     #     c = bcolors.OKGREEN
     # print("[DEBUG]{} : {}{}{}".format(caller, c, str(msg), bcolors.ENDC))
 
 
-def hint(msg: str):
-    caller = ""
-    if DETAILED_DEBUG_INFO:
-        caller = get_caller()
-    print("[HINT]{} : {}{}{}".format(caller, bcolors.WARNING, str(msg), bcolors.ENDC))
+def hint(msg, *args):
+    if Definitions.LOG_LEVEL > LogLevel.HINT:
+        return
+    log_message(LogLevel.HINT, msg, args)
 
 
-def error(msg: str):
-    caller = ""
-    if DETAILED_DEBUG_INFO:
-        try:
-            caller = get_caller()
-        except KeyError:
-            print("unable to get caller object - possible if it is called from 'self'")
+def error(msg, *args):
+    if Definitions.LOG_LEVEL <= LogLevel.ERROR:
+        log_message(LogLevel.ERROR, msg, args)
     if ERRORS_ARE_FATAL:
-        print("[FATAL]{} : {}{}{}".format(caller, bcolors.FAIL, str(msg), bcolors.ENDC))
+        flush_log()
         sys.exit(-1)
-    else:
-        print("[ERROR]{} : {}{}{}".format(caller, bcolors.FAIL, str(msg), bcolors.ENDC))
 
 
 def start_progress(title):
     global progress_x
+    flush_log()
     sys.stdout.write(title + ": [" + "-" * 10 + "]" + chr(8) * 11)
     sys.stdout.flush()
     progress_x = 0
@@ -341,6 +427,7 @@ class PlayerColour(Enum):
 
     @staticmethod
     def player_colour_to_arcade_colour(colour: PlayerColour) -> arcade.Color:
+        import arcade
         if colour == PlayerColour.YELLOW:
             return arcade.color.YELLOW
         elif colour == PlayerColour.TEAL:
@@ -28,9 +28,9 @@ class IncomeCalculator:
                 continue
             income = income + building.resource_per_turn
             for tile in self.hex_map.get_neighbours(building.tile):
-                for res in self.scenario.resource_list:
-                    if res.tile.offset_coordinates == tile.offset_coordinates:
-                        income = income + res.demand_res(building.resource_per_field)
+                res = self.scenario.occupancy.get_resource(tile)
+                if res is not None:
+                    income = income + res.demand_res(building.resource_per_field)
 
         return income
 
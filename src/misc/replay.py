@@ -0,0 +1,160 @@
+import hashlib
+import os
+import struct
+from collections import deque
+from typing import Optional, Tuple, Deque, BinaryIO
+
+from src.ai.AI_GameStatus import AI_Move, AI_GameStatus
+from src.ai.AI_MapRepresentation import AI_Trade
+from src.misc.game_constants import MoveType, BuildingType, UnitType, TradeType, TradeCategory, TradeState, hint
+
+# A replay is the seed of the game and every executed move (including its trades), in the order of execution.
+# Together with the game file, this reproduces the game (see GameLogic.fast_forward). The moves are packed with struct:
+# header:   magic, version, sha1 of the game file, length of the seed and of the path of the game file (followed by
+#           the seed, in decimal, and the path) - the seed can be any int
+# move:     turn, player id, move type, flags (army moves, from human interaction), army destination (x, y),
+#           location (x, y), kind of type (none, building, unit) and type, number of associated tiles and of trades
+#           (followed by the tiles (x, y) and the trades)
+# trade:    owner id, target id, type, state, offer (category, amount), demand (category, amount)
+# The debug output of a move (str_rep_of_action, info_at_tile) is not recorded.
+MAGIC = b"FOSR"
+VERSION = 2
+_HEADER = struct.Struct("<4sB20sHH")
+_MOVE = struct.Struct("<HBBBhhhhBBBB")
+_LOC = struct.Struct("<hh")
+_TRADE = struct.Struct("<bbBBBiBi")
+_FLAG_MOVE_ARMY = 1
+_FLAG_HUMAN = 2
+_TYPE_KINDS = (None, BuildingType, UnitType)
+
+
+def _game_file_digest(game_xml_file: str) -> bytes:
+    with open(game_xml_file, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def encode_move(turn_nr: int, player_id: int, move: AI_Move) -> bytes:
+    flags = (_FLAG_MOVE_ARMY if move.doMoveArmy else 0) | (_FLAG_HUMAN if move.from_human_interaction else 0)
+    kind = _TYPE_KINDS.index(type(move.type)) if move.type is not None else 0
+    data = [_MOVE.pack(turn_nr, player_id, move.move_type.value if move.move_type else 0, flags,
+                       *move.move_army_to, *move.loc, kind, move.type.value if move.type is not None else 0,
+                       len(move.info), len(move.trades))]
+    for loc in move.info:
+        data.append(_LOC.pack(*loc))
+    for t in move.trades:
+        offer = (t.offer[0].value, t.offer[1]) if t.offer else (0, 0)
+        demand = (t.demand[0].value, t.demand[1]) if t.demand else (0, 0)
+        data.append(_TRADE.pack(t.owner_id, t.target_id, t.type.value, t.state.value, *offer, *demand))
+    return b"".join(data)
+
+
+def decode_move(buffer: bytes, offset: int) -> Tuple[int, int, AI_Move, int]:
+    """the turn, the player id and the move at the offset and the offset of the next move"""
+    turn_nr, player_id, move_type, flags, ax, ay, x, y, kind, t, num_info, num_trades = \
+        _MOVE.unpack_from(buffer, offset)
+    offset = offset + _MOVE.size
+    move = AI_Move()
+    move.move_type = MoveType(move_type) if move_type else None
+    move.doMoveArmy = bool(flags & _FLAG_MOVE_ARMY)
+    move.from_human_interaction = bool(flags & _FLAG_HUMAN)
+    move.move_army_to = (ax, ay)
+    move.loc = (x, y)
+    move.type = _TYPE_KINDS[kind](t) if kind else None
+    for _ in range(num_info):
+        move.info.append(_LOC.unpack_from(buffer, offset))
+        offset = offset + _LOC.size
+    for _ in range(num_trades):
+        owner_id, target_id, t_type, state, offer_c, offer_a, demand_c, demand_a = _TRADE.unpack_from(buffer, offset)
+        offset = offset + _TRADE.size
+        move.trades.append(AI_Trade(owner_id, TradeType(t_type),
+                                    (TradeCategory(offer_c), offer_a) if offer_c else None,
+                                    (TradeCategory(demand_c), demand_a) if demand_c else None,
+                                    TradeState(state), target_id))
+    return turn_nr, player_id, move, offset
+
+
+class ReplayRecorder:
+    """writes the moves of a game to a replay file while it is played"""
+
+    def __init__(self, file: str, game_xml_file: str, seed: int):
+        os.makedirs(os.path.dirname(file) or ".", exist_ok=True)
+        self.file: BinaryIO = open(file, "wb")
+        seed, path = str(seed).encode(), game_xml_file.encode()
+        self.file.write(_HEADER.pack(MAGIC, VERSION, _game_file_digest(game_xml_file), len(seed), len(path)))
+        self.file.write(seed + path)
+        self.num_moves: int = 0
+
+    def record(self, turn_nr: int, player_id: int, move: AI_Move):
+        self.file.write(encode_move(turn_nr, player_id, move))
+        self.num_moves = self.num_moves + 1
+
+    def flush(self):
+        """called after every turn of a player, such that the replay is complete up to there (e.g. if the game
+        crashes)"""
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class Replay:
+    """the recorded moves of a game, they are taken in the order they have been recorded"""
+
+    def __init__(self, file: str):
+        with open(file, "rb") as f:
+            buffer = f.read()
+        magic, version, digest, seed_len, path_len = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{file} is not a replay (of version {VERSION})")
+        offset = _HEADER.size + seed_len
+        self.seed: int = int(buffer[_HEADER.size:offset].decode())
+        self.game_xml_file: str = buffer[offset:offset + path_len].decode()
+        offset = offset + path_len
+        self.moves: Deque[Tuple[int, int, AI_Move]] = deque()
+        while offset < len(buffer):
+            try:
+                turn_nr, player_id, move, offset = decode_move(buffer, offset)
+            except struct.error:
+                hint("replay %s is truncated after %s moves", file, len(self.moves))
+                break
+            self.moves.append((turn_nr, player_id, move))
+        self.last_turn: int = self.moves[-1][0] if self.moves else 0      # the turn of the last recorded move
+        if os.path.isfile(self.game_xml_file) and _game_file_digest(self.game_xml_file) != digest:
+            hint("the game file %s has changed since the replay has been recorded", self.game_xml_file)
+
+    def has_move(self, turn_nr: int, player_id: int) -> bool:
+        """True, if the next recorded move is one of the player in this turn"""
+        return len(self.moves) > 0 and self.moves[0][:2] == (turn_nr, player_id)
+
+    def next_move(self, turn_nr: int, player_id: int) -> Optional[AI_Move]:
+        """the next recorded move, if it is one of the player in this turn"""
+        return self.moves.popleft()[2] if self.has_move(turn_nr, player_id) else None
+
+    @staticmethod
+    def is_same_move(a: Optional[AI_Move], b: Optional[AI_Move]) -> bool:
+        if a is None or b is None:
+            return a is b
+        return encode_move(0, 0, a) == encode_move(0, 0, b)
+
+
+class ReplayInteraction:
+    """takes the place of the human interaction while a game is fast-forwarded: the moves of the human player are the
+    recorded ones (see GameLogic.handle_turn)"""
+
+    def __init__(self, replay: Replay):
+        self.replay = replay
+        self.turn_nr: int = -1
+        self.player_id: int = -1
+
+    def request_move(self, status: AI_GameStatus, move: AI_Move, pid: int):
+        self.turn_nr = status.turn_nr
+        self.player_id = pid
+
+    def update_game_status(self, status: AI_GameStatus):
+        pass
+
+    def is_move_complete(self) -> bool:
+        return not self.replay.has_move(self.turn_nr, self.player_id)
+
+    def get_partial_move(self) -> Optional[AI_Move]:
+        return self.replay.next_move(self.turn_nr, self.player_id)
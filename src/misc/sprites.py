@@ -0,0 +1,146 @@
+import bisect
+import math
+from typing import List, Tuple, Dict, Optional
+
+import arcade
+from arcade import AnimationKeyframe
+
+from src.hex_map import HexMap, TILE_HIGHT
+
+
+class Flag(arcade.AnimatedTimeBasedSprite):
+    def __init__(self, pos: Tuple[int, int], animated_tex: List[arcade.Texture], scale=1):
+        super().__init__(scale=scale, center_x=pos[0], center_y=pos[1])
+        i = 0
+        for tex in animated_tex:
+            self.append_texture(tex)
+            self.frames.append(AnimationKeyframe(i, 80, tex))
+            i += 1
+        self.set_texture(0)
+
+
+class DepthSortedSpriteList(arcade.SpriteList):
+    """A sprite list which keeps its sprites ordered by map row, from the top row of the map to the bottom row.
+    Thus, objects further down the map are drawn on top of the ones behind them.
+    The sprites of a row form a contiguous bucket, new sprites are inserted at the end of the bucket of their row
+    and a moving sprite is only repositioned instead of sorting the whole list.
+    Sprites which are appended without a row (e.g. the selection tool) are drawn on top of everything"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.__keys: List[float] = []                   # depth key for each sprite, same order as the sprites
+        self.__key_of: Dict[arcade.Sprite, float] = {}
+
+    def add(self, sprite: arcade.Sprite, row: int):
+        """inserts the sprite behind all sprites of lower rows"""
+        key = float(-row)
+        idx = bisect.bisect_right(self.__keys, key)
+        self.__keys.insert(idx, key)
+        self.__key_of[sprite] = key
+        super().insert(idx, sprite)
+
+    def reposition(self, sprite: arcade.Sprite, row: int):
+        """moves the sprite to the bucket of a new row. Nothing happens if the sprite already is in this row"""
+        if self.__key_of.get(sprite) == float(-row):
+            return
+        self.remove(sprite)
+        self.add(sprite, row)
+
+    def append(self, item: arcade.Sprite):
+        self.__keys.append(math.inf)
+        self.__key_of[item] = math.inf
+        super().append(item)
+
+    def insert(self, index: int, item: arcade.Sprite):
+        # an explicit index cannot be combined with the depth order, hence the sprite is put on top
+        self.append(item)
+
+    def remove(self, item: arcade.Sprite):
+        key = self.__key_of.pop(item)
+        lo = bisect.bisect_left(self.__keys, key)
+        hi = bisect.bisect_right(self.__keys, key)
+        idx = self.sprite_list.index(item, lo, hi)
+        del self.__keys[idx]
+        super().remove(item)
+
+
+class SpriteLayer:
+    """A z level, which is split into chunks of map rows. Each chunk is a DepthSortedSpriteList. Only the chunks
+    which overlap with the viewport are drawn and a change of a sprite only rebuilds the buffers of its chunk. The
+    chunks are drawn from the top rows to the bottom rows, such that the depth order is kept. The chunks span whole
+    rows: chunks side by side could not keep the depth order, and even the ground textures overlap the neighbouring
+    tiles (e.g. water is moved down by 5 pixels).
+    Sprites without a position on the map (e.g. the selection tool) are drawn on top of everything and never culled"""
+
+    CULLING_MARGIN = 3 * TILE_HIGHT         # textures are larger than a tile (e.g. mountains)
+
+    def __init__(self, rows_per_chunk: int = 16):
+        self.rows_per_chunk = rows_per_chunk
+        self.__chunks: Dict[int, DepthSortedSpriteList] = {}
+        self.__bounds: Dict[int, Tuple[float, float]] = {}           # bottom and top of the rows of a chunk
+        self.__chunk_of: Dict[arcade.Sprite, int] = {}
+        self.__draw_order: List[int] = []
+        self.__overlay = arcade.SpriteList()
+
+    def add(self, sprite: arcade.Sprite, offset_coords: Tuple[int, int]):
+        key = self.__get_chunk_key(offset_coords)
+        chunk = self.__chunks.get(key)
+        if chunk is None:
+            chunk = self.__create_chunk(key)
+        chunk.add(sprite, offset_coords[1])
+        self.__chunk_of[sprite] = key
+
+    def reposition(self, sprite: arcade.Sprite, offset_coords: Tuple[int, int]):
+        """the sprite has moved to another tile"""
+        key = self.__get_chunk_key(offset_coords)
+        if self.__chunk_of.get(sprite) == key:
+            self.__chunks[key].reposition(sprite, offset_coords[1])
+        else:
+            self.remove(sprite)
+            self.add(sprite, offset_coords)
+
+    def append(self, sprite: arcade.Sprite):
+        self.__overlay.append(sprite)
+
+    def remove(self, sprite: arcade.Sprite):
+        key = self.__chunk_of.pop(sprite, None)
+        if key is None:
+            self.__overlay.remove(sprite)
+        else:
+            self.__chunks[key].remove(sprite)
+
+    def draw(self, viewport: Optional[Tuple[float, float, float, float]] = None):
+        """viewport: (left, right, bottom, top) in pixels of the map. Draws all chunks if it is None"""
+        for key in self.__draw_order:
+            if viewport is None or self.__is_visible(key, viewport):
+                self.__chunks[key].draw()
+        self.__overlay.draw()
+
+    def get_num_of_drawn_chunks(self, viewport: Tuple[float, float, float, float]) -> int:
+        return sum(1 for key in self.__draw_order if self.__is_visible(key, viewport))
+
+    def __len__(self) -> int:
+        return len(self.__chunk_of) + len(self.__overlay)
+
+    def __iter__(self):
+        for key in self.__draw_order:
+            yield from self.__chunks[key]
+        yield from self.__overlay
+
+    def __get_chunk_key(self, offset_coords: Tuple[int, int]) -> int:
+        return offset_coords[1] // self.rows_per_chunk
+
+    def __create_chunk(self, key: int) -> DepthSortedSpriteList:
+        chunk = DepthSortedSpriteList()
+        self.__chunks[key] = chunk
+        # the chunks of the upper rows are drawn first
+        self.__draw_order.append(key)
+        self.__draw_order.sort(reverse=True)
+        bottom = HexMap.offset_to_pixel_coords((0, key * self.rows_per_chunk))[1]
+        top = HexMap.offset_to_pixel_coords((0, (key + 1) * self.rows_per_chunk - 1))[1]
+        self.__bounds[key] = (bottom - SpriteLayer.CULLING_MARGIN, top + SpriteLayer.CULLING_MARGIN)
+        return chunk
+
+    def __is_visible(self, key: int, viewport: Tuple[float, float, float, float]) -> bool:
+        bottom, top = self.__bounds[key]
+        return bottom < viewport[3] and top > viewport[2]
@@ -0,0 +1,133 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
+
+import numpy as np
+from PIL import Image
+
+from src.misc.game_constants import hint, error, Definitions
+
+
+def decode_images(files: List[str]) -> Dict[str, Image.Image]:
+    """decodes the images with a pool of threads (PIL releases the GIL while decoding)"""
+    files = list(dict.fromkeys(files))
+    if Definitions.TEXTURE_LOADING_THREADS <= 1 or len(files) <= 1:
+        return {f: Image.open(f).convert("RGBA") for f in files}
+    with ThreadPoolExecutor(max_workers=Definitions.TEXTURE_LOADING_THREADS) as pool:
+        return dict(zip(files, pool.map(lambda f: Image.open(f).convert("RGBA"), files)))
+
+
+class TextureAtlas:
+    """Packs the images of the textures into a few large sheets and hands out the regions of the single textures.
+    Instead of decoding one file per texture, the game only reads the sheets. The sheets (uncompressed RGBA, hence no
+    decoding at all) and an index (atlas.json) are cached on disk and rebuilt if a requested image is not part of the
+    atlas or has changed since.
+    Only depends on PIL, the arcade textures are created by the TextureStore"""
+    SHEET_SIZE = 2048           # width and height of a sheet in pixels
+    PADDING = 1                 # transparent pixels between two images
+    INDEX_FILE = "atlas.json"
+
+    def __init__(self, path: str):
+        self.path = path
+        self.sheets: List[Image.Image] = []
+        # key is the path of the image: (index of the sheet, x, y, width, height)
+        self.regions: Dict[str, Tuple[int, int, int, int, int]] = {}
+        self.__sources: Dict[str, int] = {}            # path of the image -> modification time when it was packed
+        self.__sheet_sizes: List[Tuple[int, int]] = []
+
+    def load(self, files: List[str]) -> bool:
+        """loads the atlas from the cache, if it contains all files. Otherwise, the atlas is rebuilt (from the requested
+        files and the unchanged files of the cache) and stored. Returns True if the cache was used"""
+        if self.__read_index() and all(self.__is_up_to_date(f) for f in files):
+            self.sheets = []
+            for i, size in enumerate(self.__sheet_sizes):
+                with open(self.__sheet_file(i), "rb") as f:
+                    self.sheets.append(Image.frombytes("RGBA", size, f.read()))
+            return True
+        cached = [f for f in self.__sources if self.__is_up_to_date(f) and f not in files]
+        self.build(files + cached)
+        self.save()
+        return False
+
+    def build(self, files: List[str]):
+        """packs the images into sheets (skyline packing): the sheet keeps the height of the packed images per column
+        and each image is placed where its bottom edge is lowest. The sheets are cropped to the used area"""
+        images = decode_images(files)
+        self.sheets = []
+        self.regions = {}
+        self.__sources = {f: os.stat(f).st_mtime_ns for f in images}
+        placements: List[List[Tuple[str, int, int]]] = []
+        skyline: Optional[np.ndarray] = None
+        for f, image in sorted(images.items(), key=lambda item: (-item[1].height, -item[1].width)):
+            w, h = image.size
+            if w > TextureAtlas.SHEET_SIZE or h > TextureAtlas.SHEET_SIZE:
+                error(f"TextureAtlas: {f} is larger than a sheet")
+                continue
+            if skyline is not None:
+                # lowest y at which the image fits for each x, the leftmost of the lowest positions is taken
+                fits = np.lib.stride_tricks.sliding_window_view(skyline, w).max(axis=1)
+                x = int(np.argmin(fits))
+                y = int(fits[x])
+            if skyline is None or y + h > TextureAtlas.SHEET_SIZE:            # next sheet
+                skyline = np.zeros(TextureAtlas.SHEET_SIZE, dtype=np.int32)
+                placements.append([])
+                x, y = 0, 0
+            skyline[x:x + w] = y + h + TextureAtlas.PADDING
+            placements[-1].append((f, x, y))
+        for i, placed in enumerate(placements):
+            width = max(x + images[f].width for f, x, y in placed)
+            height = max(y + images[f].height for f, x, y in placed)
+            sheet = Image.new("RGBA", (width, height))
+            for f, x, y in placed:
+                sheet.paste(images[f], (x, y))
+                self.regions[f] = (i, x, y, images[f].width, images[f].height)
+            self.sheets.append(sheet)
+        hint(f"TextureAtlas: packed {len(self.regions)} images into {len(self.sheets)} sheet(s)")
+
+    def save(self):
+        os.makedirs(self.path, exist_ok=True)
+        for i, sheet in enumerate(self.sheets):
+            with open(self.__sheet_file(i), "wb") as f:
+                f.write(sheet.tobytes())
+        index = {'sheets': [sheet.size for sheet in self.sheets],
+                 'regions': self.regions,
+                 'sources': self.__sources}
+        with open(os.path.join(self.path, TextureAtlas.INDEX_FILE), "w") as f:
+            json.dump(index, f, indent=1)
+
+    def get_region(self, file: str) -> Optional[Tuple[int, int, int, int, int]]:
+        """returns (index of the sheet, x, y, width, height) of the image or None if it is not in the atlas"""
+        return self.regions.get(file)
+
+    def get_image(self, file: str) -> Optional[Image.Image]:
+        """cuts the image out of its sheet"""
+        region = self.regions.get(file)
+        if region is None:
+            return None
+        s, x, y, w, h = region
+        return self.sheets[s].crop((x, y, x + w, y + h))
+
+    def __read_index(self) -> bool:
+        try:
+            with open(os.path.join(self.path, TextureAtlas.INDEX_FILE)) as f:
+                index = json.load(f)
+            self.__sheet_sizes = [tuple(size) for size in index['sheets']]
+            self.regions = {k: tuple(v) for k, v in index['regions'].items()}
+            self.__sources = index['sources']
+        except (OSError, ValueError, KeyError):
+            self.__sheet_sizes = []
+            self.regions = {}
+            self.__sources = {}
+            return False
+        return all(os.path.isfile(self.__sheet_file(i)) and os.path.getsize(self.__sheet_file(i)) == w * h * 4
+                   for i, (w, h) in enumerate(self.__sheet_sizes))
+
+    def __is_up_to_date(self, file: str) -> bool:
+        try:
+            return file in self.regions and self.__sources.get(file) == os.stat(file).st_mtime_ns
+        except OSError:
+            return False
+
+    def __sheet_file(self, i: int) -> str:
+        return os.path.join(self.path, f"sheet_{i}.rgba")
@@ -95,13 +95,13 @@ class TradeHub:
                 TradeHub.balance(trade_cat, player, amount)
         return True
 
-    def __get_trade(self, ai_trade: AI_Trade) -> Optional[Tuple[int, Trade]]:
+    def __get_trade(self, ai_trade: AI_Trade) -> Tuple[int, Optional[Trade]]:
         for tid, trade in self.trades.items():
             if trade.owner == ai_trade.owner_id:
                 if trade.offer == ai_trade.offer and trade.demand == ai_trade.demand:
                     if trade.type == ai_trade.type:
                         return tid, trade
-        return None
+        return -1, None         # the trade might have expired already
 
     @staticmethod
     def balance(tc: TradeCategory, p: Player, diff: int):
@@ -130,4 +130,5 @@ class TradeHub:
     def print_active_trades(self):
         debug("Current Trades:")
         for tid, trade in self.trades.items():
-            debug(f"ID: {tid}, T: {trade.owner}, {trade.type.name}, {trade.offer}, {trade.demand} LT: {trade.life_time}.")
+            debug("ID: %s, T: %s, %s, %s, %s LT: %s.", tid, trade.owner, trade.type.name, trade.offer, trade.demand,
+                  trade.life_time)
@@ -1,8 +1,8 @@
 import warnings
-from typing import Set, Tuple
+from typing import Set, Tuple, Optional
 from src.game_accessoires import Army
 from src.misc.building import Building
-from src.hex_map import Hexagon
+from src.hex_map import HexagonSet
 from src.misc.game_constants import BuildingType, PlayerColour, UnitType, BuildingState, PlayerType
 
 
@@ -24,7 +24,7 @@ class Player:
         self.culture = 0
         self.has_lost = False
         self.buildings: [Building] = []
-        self.discovered_tiles: Set[Hexagon] = set()
+        self.discovered_tiles: Optional[HexagonSet] = None     # created with the map (see GameLogic.setup)
         self.armies: [Army] = []
         self.player_type: PlayerType = PlayerType.AI
         self.is_barbaric = False
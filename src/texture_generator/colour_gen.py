@@ -1,5 +1,12 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from PIL import Image
 
+from tex_gen import is_up_to_date
+
 OLD_PATH = "../../resources/objects/animated/flag_100_sprite.png"
 NEW_PATH = "../../resources/objects/animated/flag_100_sprite_blue.png"
 
@@ -16,38 +23,57 @@ MATRIX_PINK = [(1,0,0), (0,0,0), (1,0,0)]
 IGNORE_1 = [(170, 190), (140, 160), (40, 70)]
 IGNORE_2 = [(130, 150), (130, 140), (102, 112)]
 
-def change_color(m, path: str, new_path: str):
-    img: Image = Image.open(path)
-    pixels = img.load() # create the pixel map
-    ignore_list = []
-    ignore_list.append(IGNORE_1)
-    ignore_list.append(IGNORE_2)
-
-    for i in range(img.size[0]): # for every pixel:
-        for j in range(int(img.size[1])):
-            r, g, b, a = pixels[i, j]
-            change = True
-            for ig in ignore_list:
-                if ig[0][0] < r < ig[0][1] and \
-                    ig[1][0] < g < ig[1][1] and \
-                    ig[2][0] < b < ig[2][1]:
-                    change = False
-            if not change:
-                continue
-            r_new = min(m[0][0] * r + m[0][1] * g + m[0][2] * b, 255)
-            g_new = min(m[1][0] * r + m[1][1] * g + m[1][2] * b, 255)
-            b_new = min(m[2][0] * r + m[2][1] * g + m[2][2] * b, 255)
-
-            pixels[i, j] = (int(r_new), int(g_new), int(b_new), a)
-
-    img.save(new_path)
-
-change_color(MATRIX_BLUE, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_blue_1.png")
-change_color(MATRIX_PINK, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_pink_1.png")
-change_color(MATRIX_GREEN, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_green_1.png")
-# change_color(MATRIX_BLUE, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('blue'))
-# change_color(MATRIX_GREEN, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('green'))
-# change_color(MATRIX_TEAL, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('teal'))
-# change_color(MATRIX_YELLOW, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('yellow'))
-# change_color(MATRIX_PINK, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('pink'))
+# (colour matrix, source, result)
+JOBS = [(MATRIX_BLUE, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_blue_1.png"),
+        (MATRIX_PINK, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_pink_1.png"),
+        (MATRIX_GREEN, "../../resources/objects/flag_red_1.png", "../../resources/objects/flag_green_1.png")]
+        # (MATRIX_BLUE, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('blue')),
+        # (MATRIX_GREEN, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('green')),
+        # (MATRIX_TEAL, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('teal')),
+        # (MATRIX_YELLOW, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('yellow')),
+        # (MATRIX_PINK, OLD_PATH, "../../resources/objects/animated/flag_100_sprite_{}.png".format('pink'))]
+
+
+def change_color(m, path: str, new_path: str, force: bool = False) -> bool:
+    """applies the colour matrix to all pixels, except for the ones in the ignore ranges (e.g. the flagpole).
+    Returns False if the result was up to date"""
+    if not force and is_up_to_date([new_path], [path, __file__]):
+        return False
+    pixels = np.array(Image.open(path).convert('RGBA'))
+    r, g, b = (pixels[..., c].astype(np.float64) for c in range(3))
+    change = np.ones(r.shape, dtype=bool)
+    for ig in (IGNORE_1, IGNORE_2):
+        change &= ~((ig[0][0] < r) & (r < ig[0][1]) &
+                    (ig[1][0] < g) & (g < ig[1][1]) &
+                    (ig[2][0] < b) & (b < ig[2][1]))
+    # row by row of the matrix (in this order of the terms, to get the same rounding as with single pixels)
+    for c in range(3):
+        new = np.minimum(m[c][0] * r + m[c][1] * g + m[c][2] * b, 255)
+        pixels[..., c] = np.where(change, new.astype(np.uint8), pixels[..., c])
+
+    Image.fromarray(pixels, 'RGBA').save(new_path)
+    return True
+
+
+def change_color_job(job) -> bool:
+    return change_color(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="recolours the flags, run from the texture_generator directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of processes")
+    parser.add_argument("--force", action="store_true", help="generates all textures, even if they are up to date")
+    args = parser.parse_args()
+
+    jobs = [(m, path, new_path, args.force) for m, path, new_path in JOBS]
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            generated = list(pool.map(change_color_job, jobs))
+    else:
+        generated = [change_color_job(job) for job in jobs]
+    for job, g in zip(JOBS, generated):
+        print("{}: {}".format(job[2], "generated" if g else "up to date"))
+
 
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,11 @@
-from PIL import Image, ImageOps
-import glob, os
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+import numpy as np
+from PIL import Image
 
 
 # im1 = Image.open('stone_var0.bmp')
@@ -28,43 +34,78 @@ TILE_WIDTH = 66
 TILE_HIGHT = 64
 
 MASK_ROOT = "./masks/"
+MASK_FILES = ['mask_1_4.bmp', 'mask_2_5.bmp', 'mask_3_6.bmp', 'mask_round.bmp']
 MAKS_OFFSET = [(99, 0), (132, 26), (99, 52),
                (33, 52), (0, 26), (33, 0)]
 MASK_CODE = ["1_4", "2_5", "3_6", "3_5", "4_6", "1_5", "2_6", "1_3", "2_4"]
 
-
-def generate_merged_textures(path_tex_1: str, path_tex_2: str, res_str: str, inv: bool = False, var: int = 0):
-    tex_1 = Image.open(path_tex_1)
-    tex_2 = Image.open(path_tex_2)
-
-    masks  = []
-
-    masks.append(Image.open(MASK_ROOT + 'mask_1_4.bmp'))
-    masks.append(Image.open(MASK_ROOT + 'mask_2_5.bmp'))
-    masks.append(Image.open(MASK_ROOT + 'mask_3_6.bmp'))
-    masks.append(Image.open(MASK_ROOT + 'mask_round.bmp'))
-
-    current_mask = None
-    for i in range(9):
-        if i <= 2:
-            current_mask = masks[i].convert('L')
-            print(current_mask.size)
-            if current_mask.size == (66, 66):
-                current_mask = current_mask.crop((0, 2, TILE_WIDTH, TILE_HIGHT+2)).convert('L')
-            # if not inv:
-            #     current_mask = ImageOps.invert(current_mask)
-
-        else:
-            current_mask = masks[3]
-            current_mask = current_mask.crop((MAKS_OFFSET[i-3][0], MAKS_OFFSET[i-3][1],
-                                          MAKS_OFFSET[i-3][0] + TILE_WIDTH,
-                                          MAKS_OFFSET[i-3][1] + TILE_HIGHT)).convert('L')
-        if inv:
-            current_mask = ImageOps.invert(current_mask)
-
-        res = Image.composite(tex_1, tex_2, current_mask)
-        #res.save(ROOT + res_str + "_" + MASK_CODE[i] + "_var_" + str(var) + '.png', quality=95)
-        res.save('{}{}_{}_var_{}.png'.format(ROOT, res_str, MASK_CODE[i], str(var)), quality=95)
+# (texture 1, texture 2, name of the result)
+PAIRS = [("lg_var0.png", "dg_var0.png", "dg_lg"),
+         ("dg_var0.png", "lg_var0.png", "lg_dg"),
+         ("stone_var0.bmp", "lg_var0.png", "st_lg"),
+         ("lg_var0.png", "stone_var0.bmp", "lg_st"),
+         ("stone_var0.bmp", "dg_var0.png", "st_dg"),
+         ("dg_var0.png", "stone_var0.bmp", "dg_st")]
+
+_masks: Optional[np.ndarray] = None
+
+
+def load_masks() -> np.ndarray:
+    """all 9 masks (one per MASK_CODE) as an array of shape (9, TILE_HIGHT, TILE_WIDTH), loaded once per process"""
+    global _masks
+    if _masks is None:
+        files = [Image.open(MASK_ROOT + f).convert('L') for f in MASK_FILES]
+        masks = []
+        for i in range(9):
+            if i <= 2:
+                current_mask = files[i]
+                if current_mask.size == (66, 66):
+                    current_mask = current_mask.crop((0, 2, TILE_WIDTH, TILE_HIGHT+2))
+            else:
+                current_mask = files[3].crop((MAKS_OFFSET[i-3][0], MAKS_OFFSET[i-3][1],
+                                              MAKS_OFFSET[i-3][0] + TILE_WIDTH,
+                                              MAKS_OFFSET[i-3][1] + TILE_HIGHT))
+            masks.append(np.asarray(current_mask))
+        _masks = np.stack(masks)
+    return _masks
+
+
+def composite(tex_1: np.ndarray, tex_2: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """same as Image.composite(tex_1, tex_2, mask) for all masks at once (including the rounding of PIL)"""
+    m = masks.astype(np.uint32)[..., np.newaxis]
+    tmp = tex_2.astype(np.uint32) * (255 - m) + tex_1.astype(np.uint32) * m + 128
+    return (((tmp >> 8) + tmp) >> 8).astype(np.uint8)
+
+
+def output_files(res_str: str, var: int = 0) -> List[str]:
+    return ['{}{}_{}_var_{}.png'.format(ROOT, res_str, code, str(var)) for code in MASK_CODE]
+
+
+def is_up_to_date(outputs: List[str], inputs: List[str]) -> bool:
+    """True, if all outputs exist and are newer than the inputs"""
+    if not all(os.path.isfile(f) for f in outputs):
+        return False
+    return min(os.path.getmtime(f) for f in outputs) >= max(os.path.getmtime(f) for f in inputs)
+
+
+def generate_merged_textures(path_tex_1: str, path_tex_2: str, res_str: str, inv: bool = False, var: int = 0,
+                             force: bool = False) -> bool:
+    """generates the transitions of all masks between the two textures. Returns False if they were up to date"""
+    outputs = output_files(res_str, var)
+    if not force and is_up_to_date(outputs, [path_tex_1, path_tex_2, __file__] + [MASK_ROOT + f for f in MASK_FILES]):
+        return False
+    tex_1 = np.asarray(Image.open(path_tex_1).convert('RGBA'))
+    tex_2 = np.asarray(Image.open(path_tex_2).convert('RGBA'))
+    masks = load_masks()
+    if inv:
+        masks = 255 - masks
+    for file, res in zip(outputs, composite(tex_1, tex_2, masks)):
+        Image.fromarray(res, 'RGBA').save(file, quality=95)
+    return True
+
+
+def generate_pair(pair) -> bool:
+    return generate_merged_textures(*pair)
 
 
 def generate_texture_info():
@@ -80,11 +121,25 @@ def generate_texture_info():
 
     os.chdir(cur_dir)
 
-generate_merged_textures("lg_var0.png", "dg_var0.png", "dg_lg")
-generate_merged_textures("dg_var0.png", "lg_var0.png", "lg_dg")
-generate_merged_textures("stone_var0.bmp", "lg_var0.png", "st_lg")
-generate_merged_textures("lg_var0.png", "stone_var0.bmp", "lg_st")
-generate_merged_textures("stone_var0.bmp", "dg_var0.png", "st_dg")
-generate_merged_textures("dg_var0.png", "stone_var0.bmp", "dg_st")
 
-generate_texture_info()
\ No newline at end of file
+def main():
+    parser = argparse.ArgumentParser(description="generates the transitions between the ground textures, "
+                                                 "run from the texture_generator directory")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="number of processes")
+    parser.add_argument("--force", action="store_true", help="generates all textures, even if they are up to date")
+    args = parser.parse_args()
+
+    pairs = [(tex_1, tex_2, res_str, False, 0, args.force) for tex_1, tex_2, res_str in PAIRS]
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            generated = list(pool.map(generate_pair, pairs))
+    else:
+        generated = [generate_pair(pair) for pair in pairs]
+    for pair, g in zip(PAIRS, generated):
+        print("{}: {}".format(pair[2], "generated" if g else "up to date"))
+
+    generate_texture_info()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,9 @@
-from typing import Dict
+import timeit
+from typing import Dict, List, Optional, Set, Tuple
 
 import arcade
 
-from src.misc.game_constants import start_progress, progress, end_progress, Definitions
+from src.misc.game_constants import start_progress, progress, end_progress, Definitions, hint
 from src.misc.singleton import Singleton
 
 
@@ -14,50 +15,96 @@ class TextureStore:
         # key is a str_code
         self.textures = {}
         self.animated_textures = {}
+        # all textures which can be loaded, key is a str_code: (path, offsetX, offsetY, scale)
+        self.__requested: Dict[str, Tuple[str, int, int, float]] = {}
         from src.ui.ui_accessoires import UI_Texture
         self.ui_textures: Dict[UI_Texture, arcade.Texture] = {}
+        from src.misc.texture_atlas import TextureAtlas
+        self.atlas: Optional[TextureAtlas] = None
 
-    def load_textures(self, dict_requested):
+    def load_textures(self, dict_requested, sprite_sheets: List[str] = (), eager: Optional[Set[str]] = None):
+        """registers the requested textures and loads the ones in eager (all of them, if eager is None) right away. The
+        others are loaded on first use (see get_texture). The images are decoded by a pool of threads, the textures
+        are created on the calling thread. If the texture atlas is enabled, the images are cut out of the atlas. The
+        sprite sheets (of the animated textures) are packed into the atlas as well"""
+        from src.misc.texture_atlas import TextureAtlas, decode_images
+        t1 = timeit.default_timer()
+        self.__requested.update(dict_requested)
+        if Definitions.USE_TEXTURE_ATLAS:
+            self.atlas = TextureAtlas(Definitions.TEXTURE_ATLAS_PATH)
+            self.atlas.load([dict_requested[elem][0] for elem in dict_requested] + list(sprite_sheets))
+        keys = [elem for elem in dict_requested if elem not in self.textures and (eager is None or elem in eager)]
+        images = decode_images([dict_requested[elem][0] for elem in keys
+                                if self.atlas is None or self.atlas.get_region(dict_requested[elem][0]) is None])
         start_progress("loading textures")
-        total = float(len(dict_requested))
+        total = float(max(len(keys), 1))
         prog = 0
-        for elem in dict_requested:
-            if elem not in self.textures:
-                self.textures[elem] = (arcade.load_texture(dict_requested[elem][0]),
-                                       dict_requested[elem][1],  # offsetX
-                                       dict_requested[elem][2],  # offsetY
-                                       dict_requested[elem][3])  # scale
-                # print("tex loaded for : " + elem)
+        for elem in keys:
+            path = dict_requested[elem][0]
+            image = images[path] if path in images else self.atlas.get_image(path)
+            self.textures[elem] = (self.__create_texture(path, image),
+                                   dict_requested[elem][1],  # offsetX
+                                   dict_requested[elem][2],  # offsetY
+                                   dict_requested[elem][3])  # scale
             prog = prog + 1
             progress(float(prog)/total)
         end_progress()
+        hint(f"TextureStore: loaded {len(keys)} textures in {timeit.default_timer() - t1:.3f} s, "
+             f"{len(dict_requested) - len(keys)} on first use")
 
     def get_texture(self, key):
-        if key in self.textures:
+        if self.__load_on_first_use(key):
             return self.textures[key][0]
         print("TextureStore: Unable to find texture: " + key)
 
     def get_tex_offest(self, key: str) -> (int, int):
         """returns offset of texture in pixels"""
-        if key in self.textures:
-            return self.textures[key][1], self.textures[key][2]
+        if key in self.__requested:
+            entry = self.__requested[key]
+            return entry[1], entry[2]
         print("TextureStore: Unable to find texture: " + key)
 
     def get_tex_scale(self, key: str) -> float:
         """returns scale of texture """
-        if key in self.textures:
-            return self.textures[key][3]
+        if key in self.__requested:
+            entry = self.__requested[key]
+            return entry[3]
         print("TextureStore: Unable to find texture: " + key)
 
+    def __load_on_first_use(self, key: str) -> bool:
+        """makes sure that a requested texture is loaded. Returns False if the texture is unknown"""
+        if key in self.textures:
+            return True
+        if key not in self.__requested:
+            return False
+        path, offset_x, offset_y, scale = self.__requested[key]
+        self.textures[key] = (self.__load_texture(path), offset_x, offset_y, scale)
+        return True
+
     def load_animated_texture(self, name: str, amount: int, index_function,
                               width, height, path: str):
         self.animated_textures[name] = []
         for i in range(amount):
             pixel_pos: (int, int) = index_function(i)
-            tex: arcade.Texture = arcade.load_texture(path, x=pixel_pos[0], y=pixel_pos[1],
+            tex: arcade.Texture = self.__load_texture(path, x=pixel_pos[0], y=pixel_pos[1],
                                                       width=width, height=height)
             self.animated_textures[name].append(tex)
 
+    def __load_texture(self, path: str, x: int = 0, y: int = 0, width: int = 0, height: int = 0) -> arcade.Texture:
+        """loads the texture (or a part of it) from the atlas, if the image is packed. Otherwise, from the file"""
+        image = self.atlas.get_image(path) if self.atlas is not None else None
+        if image is None:
+            return arcade.load_texture(path, x=x, y=y, width=width, height=height)
+        if width > 0 and height > 0:
+            image = image.crop((x, y, x + width, y + height))
+            return self.__create_texture(f"{path}-{x}-{y}-{width}-{height}", image)
+        return self.__create_texture(path, image)
+
+    @staticmethod
+    def __create_texture(name: str, image) -> arcade.Texture:
+        # the sprite lists build their own atlas per texture name, hence the name must be unique for each image
+        return arcade.Texture(name, image=image)
+
     def get_animated_texture(self, name: str):
         return self.animated_textures[name]
 
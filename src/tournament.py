@@ -0,0 +1,166 @@
+import argparse
+import itertools
+import os
+import timeit
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from dataclasses import dataclass, field
+from os import sys, path
+from typing import List, Dict, Tuple, Optional
+
+sys.path.append(path.dirname(path.dirname(path.abspath(__file__))))
+
+from src.headless import HeadlessGameLogic, DEFAULT_MAX_TURNS
+from src.misc.game_constants import Definitions
+
+AI_STRINGS = ["expansionist", "cultivated", "barbaric", "villager"]     # see AI_GameInterface.launch_AI
+
+
+@dataclass
+class MatchResult:
+    lineup: Tuple[str, ...]
+    seed: int
+    winner: int                                     # player id (= index in the lineup), -1 if no one has won
+    turns: int
+    scores: Dict[int, List[Tuple[int, int]]]        # player id -> list of (turn_nr, ScoreSpentResources)
+
+
+@dataclass
+class LineupStats:
+    games: int = 0
+    draws: int = 0
+    total_turns: int = 0
+    wins: Dict[int, int] = field(default_factory=dict)      # player id -> number of wins
+
+
+def play_match(game_xml_file: str, lineup: Tuple[str, ...], seed: int, max_turns: int,
+               verbose: bool) -> MatchResult:
+    """plays a single game. This is executed in a worker process"""
+    Definitions.DEBUG_MODE = False
+    with open(os.devnull, "w") as devnull, redirect_stdout(sys.stdout if verbose else devnull):
+        gl = HeadlessGameLogic(game_xml_file, list(lineup), seed=seed)
+        gl.setup()
+        winner = gl.play(max_turns)
+    from src.ai.performance import PerformanceLogger
+    scores = {pid: [(log.turn_nr, log.score) for log in logs] for pid, logs in PerformanceLogger.data.items()}
+    return MatchResult(lineup, seed, winner.id if winner else -1, gl.turn_nr, scores)
+
+
+class Tournament:
+    """Plays a number of seeded games for each lineup (one AI string per player of the game file) across a
+    process pool and aggregates win rates, game length and the ScoreSpentResources curves"""
+
+    def __init__(self, game_xml_file: str, lineups: List[Tuple[str, ...]], games_per_lineup: int,
+                 max_turns: int, seed: int):
+        self.game_xml_file = game_xml_file
+        self.lineups = lineups
+        self.games_per_lineup = games_per_lineup
+        self.max_turns = max_turns
+        self.seed = seed
+        self.results: List[MatchResult] = []
+        self.failed: int = 0
+
+    def run(self, workers: Optional[int] = None, verbose: bool = False):
+        # the same seeds are used for every lineup, so that the lineups play comparable games
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_match, self.game_xml_file, lineup, self.seed + i, self.max_turns, verbose)
+                       for lineup in self.lineups for i in range(self.games_per_lineup)]
+            for completed, future in enumerate(as_completed(futures), 1):
+                try:
+                    self.results.append(future.result())
+                except Exception:
+                    self.failed = self.failed + 1
+                    traceback.print_exc()
+                if completed % 10 == 0:
+                    print(f"{completed}/{len(futures)} games finished")
+
+    def get_lineup_stats(self) -> Dict[Tuple[str, ...], LineupStats]:
+        stats: Dict[Tuple[str, ...], LineupStats] = {}
+        for r in self.results:
+            s = stats.setdefault(r.lineup, LineupStats())
+            s.games = s.games + 1
+            s.total_turns = s.total_turns + r.turns
+            if r.winner == -1:
+                s.draws = s.draws + 1
+            else:
+                s.wins[r.winner] = s.wins.get(r.winner, 0) + 1
+        return stats
+
+    def get_ai_stats(self) -> Dict[str, Tuple[int, int]]:
+        """returns the amount of played games and the amount of won games per AI string"""
+        stats: Dict[str, Tuple[int, int]] = {}
+        for r in self.results:
+            for pid, ai_str in enumerate(r.lineup):
+                played, won = stats.get(ai_str, (0, 0))
+                stats[ai_str] = (played + 1, won + (1 if r.winner == pid else 0))
+        return stats
+
+    def get_score_curves(self) -> Dict[str, Dict[int, float]]:
+        """returns the mean ScoreSpentResources per turn for each AI string"""
+        acc: Dict[str, Dict[int, List[int]]] = {}
+        for r in self.results:
+            for pid, logs in r.scores.items():
+                curve = acc.setdefault(r.lineup[pid], {})
+                for turn_nr, score in logs:
+                    curve.setdefault(turn_nr, []).append(score)
+        return {ai_str: {t: sum(v) / len(v) for t, v in sorted(curve.items())} for ai_str, curve in acc.items()}
+
+    def print_summary(self):
+        print(f"\n{len(self.results)} games played, {self.failed} failed")
+        print(f"{'lineup':<45}{'games':>6}{'draws':>6}{'turns':>8}  wins per player")
+        for lineup, s in self.get_lineup_stats().items():
+            wins = "/".join(str(s.wins.get(pid, 0)) for pid in range(len(lineup)))
+            print(f"{' vs '.join(lineup):<45}{s.games:>6}{s.draws:>6}{s.total_turns / s.games:>8.1f}  {wins}")
+        print(f"\n{'AI':<15}{'games':>6}{'wins':>6}{'win rate':>10}")
+        for ai_str, (played, won) in sorted(self.get_ai_stats().items()):
+            print(f"{ai_str:<15}{played:>6}{won:>6}{won / played:>10.2%}")
+
+    def write_score_curves(self, file: str):
+        with open(file, "w") as f:
+            f.write("ai,turn,mean_score\n")
+            for ai_str, curve in self.get_score_curves().items():
+                for turn_nr, score in curve.items():
+                    f.write(f"{ai_str},{turn_nr},{score:.2f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="plays seeded games for each AI lineup in parallel")
+    parser.add_argument("game_xml_file", help="e.g. ../resources/game_ai_vs_npc.xml")
+    parser.add_argument("--games", type=int, default=10, help="number of games per lineup")
+    parser.add_argument("--ais", help=f"comma separated pool of AIs ({', '.join(AI_STRINGS)}). Every combination "
+                                      f"of the pool is played. By default the lineup of the game file is played")
+    parser.add_argument("--lineup", action="append", default=[],
+                        help="comma separated AI per player, e.g. expansionist,barbaric,villager (repeatable)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game of each lineup")
+    parser.add_argument("--workers", type=int, default=None, help="default: number of processors")
+    parser.add_argument("--max-turns", type=int, default=DEFAULT_MAX_TURNS)
+    parser.add_argument("--curves", help="writes the mean score per turn and AI to this csv file")
+    parser.add_argument("--verbose", action="store_true", help="do not suppress the output of the games")
+    args = parser.parse_args()
+
+    from src.game_file_reader import GameFileReader
+    player_info: [(str, {})] = []
+    GameFileReader(args.game_xml_file).read_player_info(player_info)
+
+    lineups: List[Tuple[str, ...]] = [tuple(l.split(",")) for l in args.lineup]
+    if args.ais:
+        lineups.extend(itertools.combinations_with_replacement(args.ais.split(","), len(player_info)))
+    if len(lineups) == 0:
+        lineups.append(tuple(p_info[1]['ai'] for p_info in player_info))
+    for lineup in lineups:
+        if len(lineup) != len(player_info) or any(ai_str not in AI_STRINGS for ai_str in lineup):
+            parser.error(f"invalid lineup {','.join(lineup)}: expected {len(player_info)} of {AI_STRINGS}")
+
+    tournament = Tournament(args.game_xml_file, lineups, args.games, args.max_turns, args.seed)
+    t1 = timeit.default_timer()
+    tournament.run(args.workers, args.verbose)
+    t2 = timeit.default_timer()
+    tournament.print_summary()
+    print(f"\ntournament took {(t2 - t1):.1f} s")
+    if args.curves:
+        tournament.write_score_curves(args.curves)
+
+
+if __name__ == "__main__":
+    main()
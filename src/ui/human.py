@@ -160,6 +160,13 @@ class HumanInteraction:
         self.cursor = cursor
         self.set_cost_panel = cost_panel_callback
 
+    def update_camera_pos(self, rel: Tuple[int, int], camera_pos: Tuple[int, int]):
+        self.camera_pos = camera_pos
+
+    def __to_map(self, x: int, y: int) -> Tuple[int, int]:
+        """the mouse position is on the screen, the icons are drawn on the map (they move with the camera)"""
+        return x - self.camera_pos[0], y - self.camera_pos[1]
+
     def get_icon_coordinates(self, pos: Tuple[int, int], num: int) -> List[Tuple[int, int]] :
         """the location of the icons (up to 4) is hardcoded"""
         if num == 1:
@@ -314,6 +321,7 @@ class HumanInteraction:
         return None
 
     def __check_icon_boudning_box(self, x, y, icon: SelectionIcon, use_elliptic_bounding_box=True) -> bool:
+        x, y = self.__to_map(x, y)
         if use_elliptic_bounding_box:
             # Elliptical bounding box
             dist = sqrt(((x - icon.center_x)*0.5 * (x - icon.center_x)*0.5) +
@@ -336,7 +344,7 @@ class HumanInteraction:
         # tiles is scoutable
         if essentials.is_obj_in_list(h, self.game_status.map.scoutable_tiles):
             has_res_for_scouting = self.game_status.me.resources >= 1
-            pos_list = self.get_icon_coordinates((mouse_x, mouse_y), 1)
+            pos_list = self.get_icon_coordinates(self.__to_map(mouse_x, mouse_y), 1)
             self.active_selection.append(SelectionIcon(pos_list[0][0], pos_list[0][1],
                                                        self.textures['hi_scout'],
                                                        Action.SCOUT, h, is_active=has_res_for_scouting))
@@ -350,7 +358,7 @@ class HumanInteraction:
                 has_res_for_racks = Building.building_info[BuildingType.BARRACKS][
                                         'construction_cost'] <= self.game_status.me.resources
                 can_raise_army = len(self.game_status.map.army_list) == 0
-                pos_list = self.get_icon_coordinates((mouse_x, mouse_y), 4)
+                pos_list = self.get_icon_coordinates(self.__to_map(mouse_x, mouse_y), 4)
                 idx = 0
                 self.active_selection.append(SelectionIcon(pos_list[idx][0], pos_list[idx][1],
                                                            self.textures['hi_build_farm'],
@@ -383,7 +391,7 @@ class HumanInteraction:
                                      self.game_status.me.culture >= knight_cost.culture and \
                                      self.game_status.me.population + knight_cost.population <= self.game_status.me.population_limit
                 army_pop = self.game_status.map.army_list[0].population and self.movement_specified is not MoveState.USED
-                pos_list = self.get_icon_coordinates((mouse_x, mouse_y), 3)
+                pos_list = self.get_icon_coordinates(self.__to_map(mouse_x, mouse_y), 3)
                 idx = 0
                 self.active_selection.append(SelectionIcon(pos_list[idx][0], pos_list[idx][1],
                                                            self.textures['hi_recruit_merc'],
@@ -476,7 +484,7 @@ class HumanInteraction:
             ######
             for c in candidates:
                 pix_c = HexMap.offset_to_pixel_coords(c.offset_coordinates)
-                si = SelectionIcon(pix_c[0] + self.camera_pos[0], pix_c[1] + self.camera_pos[1],
+                si = SelectionIcon(pix_c[0], pix_c[1],
                                    self.textures['hi_specify'], Action.NONE, c, scale=0.9)
                 self.zlvl_icons.append(si)
                 self.candidates.append(si)
@@ -562,6 +570,7 @@ class HumanInteraction:
         c = arcade.color.WHITE if icon.is_active else arcade.color.RED
 
         self.cost_panel = CostPanel(x + 100, y + 60, txt, c)
+        self.cost_panel.sprite.position = self.__to_map(x + 100, y + 60)      # the text is drawn on the screen
         self.zlvl_icons.append(self.cost_panel.sprite)
         self.set_cost_panel(self.cost_panel)
         self.cost_panel.show = True
@@ -1,4 +1,6 @@
-from typing import Union, Dict, List
+from typing import Union, Dict, List, Tuple
+
+import arcade
 
 from src.ui.human import HumanInteraction
 from src.game_logic import GameLogic
@@ -335,6 +337,9 @@ class UI:
         self.gl.map_hack = active
         self.gl.change_in_map_view = True
 
+    def update_camera_pos(self, rel: Tuple[int, int], camera_pos: Tuple[int, int]):
+        self.camera_pos = camera_pos
+
     def cost_panel_callback(self, cost_panel):
         self.cost_panel = cost_panel
 
@@ -1,5 +1,7 @@
 from typing import Optional
 
+import arcade
+
 from src.game_accessoires import Army, Unit, Resource
 from src.misc.building import Building
 from src.misc.game_constants import PlayerColour